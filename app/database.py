@@ -1,18 +1,116 @@
 import json
-from contextlib import contextmanager
+import time
+from collections.abc import Callable
+from contextlib import contextmanager, asynccontextmanager
+from datetime import datetime
 from app.models import *
 from pathlib import Path
 
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.utility.constant import MAX_RECENT_WRITERS
+from app.utility.env import get_database_environment, \
+    get_read_your_writes_seconds
 from app.utility.logger import get_logger
-from app.utility.others import get_database_configuration
+from app.utility.others import get_database_configuration, \
+    get_optional_database_configuration, load_configuration
+from app.utility.pool_metrics import timed_pool_class
 
 logger = get_logger()
 
 db_path = Path(__file__).parent.parent / "config.json"
 
-engine = create_engine(get_database_configuration("database_dev", "url", db_path),
-                       echo=get_database_configuration("database_dev", "echo", db_path))
+database_environment = get_database_environment()
+
+if database_environment not in load_configuration(db_path):
+    raise ValueError(
+        f"Unknown database environment {database_environment} in {db_path}")
+
+
+def get_pool_options(environment: str) -> dict:
+    configuration = load_configuration(db_path)[environment]
+    return {
+        "pool_size": configuration.get("pool_size", 5),
+        "max_overflow": configuration.get("max_overflow", 10),
+        "pool_timeout": configuration.get("pool_timeout", 30),
+        "pool_recycle": configuration.get("pool_recycle", -1),
+        "pool_pre_ping": configuration.get("pool_pre_ping", False),
+    }
+
+
+pool_options = get_pool_options(database_environment)
+
+# Milliseconds, applied per connection so a runaway query releases its slot
+statement_timeout = get_optional_database_configuration(
+    database_environment, "statement_timeout", db_path)
+
+engine = create_engine(
+    get_database_configuration(database_environment, "url", db_path),
+    echo=get_database_configuration(database_environment, "echo", db_path),
+    poolclass=timed_pool_class(QueuePool, "sync",
+                               pool_options["pool_size"],
+                               pool_options["max_overflow"]),
+    connect_args={"options": f"-c statement_timeout={statement_timeout}"}
+    if statement_timeout else {},
+    **pool_options)
+
+
+def encode_timestamp(value: datetime) -> str:
+    # The models default to aware UTC datetimes on TIMESTAMP WITHOUT TIME ZONE
+    # columns. psycopg2 sends them as literals and Postgres drops the offset,
+    # asyncpg rejects them, so keep the psycopg2 behaviour on the async path.
+    return value.replace(tzinfo=None).isoformat()
+
+
+def register_timestamp_codec(dbapi_connection, connection_record):
+    dbapi_connection.run_async(
+        lambda connection: connection.set_type_codec(
+            "timestamp", schema="pg_catalog", format="text",
+            encoder=encode_timestamp, decoder=datetime.fromisoformat))
+
+
+def create_async_database_engine(url: str, pool_name: str,
+                                 **kwargs) -> AsyncEngine:
+    async_database_engine = create_async_engine(
+        make_url(url).set(drivername="postgresql+asyncpg"),
+        echo=get_database_configuration(database_environment, "echo",
+                                        db_path),
+        poolclass=timed_pool_class(AsyncAdaptedQueuePool, pool_name,
+                                   pool_options["pool_size"],
+                                   pool_options["max_overflow"]),
+        connect_args={"server_settings": {
+            "statement_timeout": str(statement_timeout)}}
+        if statement_timeout else {},
+        **pool_options,
+        **kwargs)
+    event.listen(async_database_engine.sync_engine, "connect",
+                 register_timestamp_codec)
+    return async_database_engine
+
+
+async_engine = create_async_database_engine(
+    get_database_configuration(database_environment, "url", db_path),
+    "async")
+
+# Reads that tolerate replication lag. Without a read_url this is the primary
+# engine, with one every transaction is READ ONLY, so a write routed here by
+# mistake fails even when read_url points at the primary itself.
+read_url = get_optional_database_configuration(database_environment,
+                                               "read_url", db_path)
+
+async_read_engine = create_async_database_engine(
+    read_url, "async_read",
+    execution_options={"postgresql_readonly": True}) \
+    if read_url else async_engine
+
+# Authorization header -> time of that client's last committed write, only
+# kept when READ_YOUR_WRITES_SECONDS is set
+recent_writes: dict[str, float] = {}
 
 
 def create_db_and_tables():
@@ -32,5 +130,129 @@ def get_session():
         session.close()
 
 
+@asynccontextmanager
+async def get_async_session(bind: AsyncEngine | None = None):
+    session = AsyncSession(bind or async_engine, expire_on_commit=False)
+    try:
+        yield session
+    except Exception as e:
+        logger.error(f"Database session error: {e}")
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+def get_async_read_session():
+    return get_async_session(async_read_engine)
+
+
+def get_client_key(request: Request) -> str | None:
+    return request.headers.get("authorization")
+
+
+def record_write(client_key: str | None):
+    window = get_read_your_writes_seconds()
+    if not window or client_key is None:
+        return
+
+    now = time.monotonic()
+    recent_writes[client_key] = now
+    if len(recent_writes) > MAX_RECENT_WRITERS:
+        for key, written_at in list(recent_writes.items()):
+            if now - written_at >= window:
+                del recent_writes[key]
+
+
+def has_recent_write(client_key: str | None) -> bool:
+    window = get_read_your_writes_seconds()
+    written_at = recent_writes.get(client_key)
+    return bool(window) and written_at is not None and \
+        time.monotonic() - written_at < window
+
+
+async def get_db_session(request: Request):
+    # FastAPI dependency, one session per request committed once at the end
+    session = AsyncSession(async_engine, expire_on_commit=False)
+    try:
+        yield session
+        await session.commit()
+        if session.sync_session.info.pop("wrote", False):
+            record_write(get_client_key(request))
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+async def get_db_read_session(
+        request: Request, session: AsyncSession = Depends(get_db_session)):
+    # FastAPI dependency for read only endpoints. Clients that opted into
+    # read your writes and wrote recently are served by the primary, the
+    # replica may not have their rows yet.
+    if async_read_engine is async_engine or has_recent_write(
+            get_client_key(request)):
+        yield session
+        return
+
+    read_session = AsyncSession(async_read_engine, expire_on_commit=False)
+    try:
+        yield read_session
+    finally:
+        await read_session.close()
+
+
+@asynccontextmanager
+async def session_scope(session: AsyncSession | None = None):
+    # Services join the request session when given one and leave the commit
+    # to get_db_session, otherwise they run in their own transaction
+    if session is not None:
+        yield session
+        return
+
+    async with get_async_session() as own_session:
+        yield own_session
+        await own_session.commit()
+
+
+@asynccontextmanager
+async def read_session_scope(session: AsyncSession | None = None):
+    # Same as session_scope for reads that may be served by the read engine
+    if session is not None:
+        yield session
+        return
+
+    async with get_async_read_session() as own_session:
+        yield own_session
+
+
+def on_commit(session: AsyncSession, callback: Callable[[], None]):
+    # Cache invalidation has to wait for the data it invalidates to be visible
+    session.sync_session.info.setdefault("on_commit", []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def run_on_commit_callbacks(session):
+    for callback in session.info.pop("on_commit", []):
+        callback()
+
+
+@event.listens_for(Session, "after_flush")
+def flag_flush_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def flag_statement_write(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_on_commit_callbacks(session):
+    session.info.pop("on_commit", None)
+
+
 if __name__ == '__main__':
     create_db_and_tables()
@@ -1,4 +1,7 @@
+import asyncio
 import time
+from contextlib import asynccontextmanager, suppress
+
 import logfire
 
 from fastapi import FastAPI, Request
@@ -6,9 +9,45 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.routers import auth, public, protected_roles, protected_permissions, \
     protected_nurses, protected_ai
 from app.routers import protected_user
+from app.services.auth_service import run_api_key_expiry_sweeper
+from app.services.ingest_service import vital_signs_writer
+from app.services.partition_service import run_partition_maintenance
+from app.services.provider_service import provider_registry
+from app.services.revocation_service import run_revocation_feed
+from app.utility.constant import AUTH_MODE_STATELESS
+from app.utility.env import get_api_key_sweep_interval_seconds, \
+    get_auth_mode, get_revocation_refresh_seconds, \
+    get_partition_maintenance_interval_seconds
 from app.utility.logger import get_logger
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    provider_registry.start()
+
+    background_tasks = [
+        asyncio.create_task(
+            run_api_key_expiry_sweeper(get_api_key_sweep_interval_seconds())),
+        asyncio.create_task(vital_signs_writer.run()),
+        asyncio.create_task(run_partition_maintenance(
+            get_partition_maintenance_interval_seconds())),
+    ]
+
+    if get_auth_mode() == AUTH_MODE_STATELESS:
+        background_tasks.append(asyncio.create_task(
+            run_revocation_feed(get_revocation_refresh_seconds())))
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    await provider_registry.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 logfire.configure()
 
@@ -1,4 +1,4 @@
 from .user import User
 from .user_profile import UserProfile
-from .api_keys import APIKeys
+from .api_keys import APIKeys, RevokedAPIKeys
 from .nurses import Nurses
\ No newline at end of file
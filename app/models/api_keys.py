@@ -7,6 +7,8 @@ from sqlmodel import Field, SQLModel
 class APIKeys(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
     api_key: str
+    api_key_digest: str | None = Field(default=None, max_length=64,
+                                       unique=True, index=True)
     expires_at: Optional[datetime] = Field(
         default_factory=lambda: datetime.now(timezone.utc)
     )
@@ -20,3 +22,12 @@ class APIKeys(SQLModel, table=True):
     )
 
     user_id: int = Field(default=None, foreign_key="user.id")
+
+
+class RevokedAPIKeys(SQLModel, table=True):
+    id: int | None = Field(default=None, primary_key=True)
+    api_key_digest: str = Field(max_length=64, unique=True, index=True)
+    expires_at: datetime = Field(index=True)
+    revoked_at: Optional[datetime] = Field(
+        default_factory=lambda: datetime.now(timezone.utc)
+    )
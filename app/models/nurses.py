@@ -2,7 +2,19 @@ from datetime import datetime, timezone, date
 from typing import Optional
 
 from sqlmodel import Field, SQLModel
-from sqlalchemy import JSON, Column
+from sqlalchemy import Column, DDL, Index, event, text
+from sqlalchemy.dialects.postgresql import JSONB
+
+# Full text over the recommendation strings of an SBAR report. Queries have to
+# repeat this exact expression for Postgres to use the expression index.
+RECOMMENDATION_SEARCH = ("jsonb_to_tsvector('english', "
+                         "report_text -> 'sbar_report' -> 'recommendation', "
+                         "'[\"string\"]')")
+
+# Clinical tables are range partitioned by month on time_stamp, so time_stamp
+# is part of the primary key and can no longer be NULL. Readings sent without
+# one are stamped with the time they were received.
+PARTITION_BY_TIME_STAMP = {"postgresql_partition_by": "RANGE (time_stamp)"}
 
 
 class Patients(SQLModel, table=True):
@@ -30,8 +42,16 @@ class Patients(SQLModel, table=True):
 
 
 class VitalSigns(SQLModel, table=True):
-    id: int | None = Field(default=None, primary_key=True)
-    time_stamp: Optional[datetime]
+    __table_args__ = (
+        Index("ix_vitalsigns_patient_id_time_stamp", "patient_id",
+              text("time_stamp DESC")),
+        PARTITION_BY_TIME_STAMP,
+    )
+
+    id: int | None = Field(default=None, primary_key=True,
+                           sa_column_kwargs={"autoincrement": True})
+    time_stamp: Optional[datetime] = Field(default_factory=datetime.now,
+                                           primary_key=True)
     blood_pressure_systolic: int
     blood_pressure_diastolic: int
     heart_rate: int
@@ -50,11 +70,62 @@ class VitalSigns(SQLModel, table=True):
     patient_id: int = Field(default=None, foreign_key="patients.id")
 
 
+# Vitals summarised per patient and hour in VitalSignsHourly
+VITAL_SIGN_FIELDS = ("blood_pressure_systolic", "blood_pressure_diastolic",
+                     "heart_rate", "respiratory_rate", "oxygen_saturation",
+                     "temperature")
+
+
+class VitalSignsHourly(SQLModel, table=True):
+    # Kept up to date on every vital signs insert, see rollup_service. The
+    # sums and readings give the mean and let a batch merge into the hour.
+    patient_id: int = Field(foreign_key="patients.id", primary_key=True)
+    hour: datetime = Field(primary_key=True)
+    readings: int
+    last_time_stamp: datetime
+
+    blood_pressure_systolic_min: int
+    blood_pressure_systolic_max: int
+    blood_pressure_systolic_sum: int
+    blood_pressure_systolic_last: int
+    blood_pressure_diastolic_min: int
+    blood_pressure_diastolic_max: int
+    blood_pressure_diastolic_sum: int
+    blood_pressure_diastolic_last: int
+    heart_rate_min: int
+    heart_rate_max: int
+    heart_rate_sum: int
+    heart_rate_last: int
+    respiratory_rate_min: int
+    respiratory_rate_max: int
+    respiratory_rate_sum: int
+    respiratory_rate_last: int
+    oxygen_saturation_min: int
+    oxygen_saturation_max: int
+    oxygen_saturation_sum: int
+    oxygen_saturation_last: int
+    temperature_min: float
+    temperature_max: float
+    temperature_sum: float
+    temperature_last: float
+
+
 class VitalMedicalData(SQLModel, table=True):
-    id: int | None = Field(default=None, primary_key=True)
-    time_stamp: Optional[datetime]
+    __table_args__ = (
+        Index("ix_vitalmedicaldata_patient_id_time_stamp", "patient_id",
+              text("time_stamp DESC")),
+        # jsonb_ops so both key existence (?) and containment (@>) use it
+        Index("ix_vitalmedicaldata_data_value", "data_value",
+              postgresql_using="gin"),
+        PARTITION_BY_TIME_STAMP,
+    )
+
+    id: int | None = Field(default=None, primary_key=True,
+                           sa_column_kwargs={"autoincrement": True})
+    time_stamp: Optional[datetime] = Field(default_factory=datetime.now,
+                                           primary_key=True)
     data_type: str
-    data_value: dict = Field(default_factory=dict, sa_column=Column(JSON))
+    data_value: dict = Field(default_factory=dict, sa_column=Column(JSONB))
     source: str
     created_at: Optional[datetime] = Field(
         default_factory=lambda: datetime.now(timezone.utc)
@@ -68,8 +139,16 @@ class VitalMedicalData(SQLModel, table=True):
 
 
 class NurseNotes(SQLModel, table=True):
-    id: int | None = Field(default=None, primary_key=True)
-    time_stamp: Optional[datetime]
+    __table_args__ = (
+        Index("ix_nursenotes_patient_id_nurse_id_time_stamp", "patient_id",
+              "nurse_id", text("time_stamp DESC")),
+        PARTITION_BY_TIME_STAMP,
+    )
+
+    id: int | None = Field(default=None, primary_key=True,
+                           sa_column_kwargs={"autoincrement": True})
+    time_stamp: Optional[datetime] = Field(default_factory=datetime.now,
+                                           primary_key=True)
     note_text: str
     category: str
     created_at: Optional[datetime] = Field(
@@ -84,6 +163,16 @@ class NurseNotes(SQLModel, table=True):
     nurse_id: int = Field(default=None, foreign_key="nurses.id")
 
 
+PARTITIONED_MODELS = (VitalSigns, VitalMedicalData, NurseNotes)
+
+for partitioned_model in PARTITIONED_MODELS:
+    # Catches rows outside every monthly partition until partition
+    # maintenance creates their month, see partition_service
+    event.listen(partitioned_model.__table__, "after_create", DDL(
+        f"CREATE TABLE {partitioned_model.__tablename__}_default "
+        f"PARTITION OF {partitioned_model.__tablename__} DEFAULT"))
+
+
 class Nurses(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
     first_name: str = Field(unique=False, index=True)
@@ -101,10 +190,27 @@ class Nurses(SQLModel, table=True):
 
 
 class Handoffs(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_handoffs_patient_id_outgoing_nurse_id_model_created_at",
+              "patient_id", "outgoing_nurse_id", "model",
+              text("created_at DESC")),
+        # Keyset order of the handoff listing
+        Index("ix_handoffs_created_at_id", text("created_at DESC"),
+              text("id DESC")),
+        Index("ix_handoffs_report_text", "report_text",
+              postgresql_using="gin",
+              postgresql_ops={"report_text": "jsonb_path_ops"}),
+        Index("ix_handoffs_recommendation_search",
+              text(RECOMMENDATION_SEARCH), postgresql_using="gin"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
-    report_text: dict = Field(default_factory=dict, sa_column=Column(JSON))
+    report_text: dict = Field(default_factory=dict, sa_column=Column(JSONB))
     status: str
     model: str
+    # sha256 of the prompts and model the report was generated from, see
+    # get_sbar_input_digest in ai_service
+    input_digest: str | None = Field(default=None, index=True)
 
     created_at: Optional[datetime] = Field(
         default_factory=lambda: datetime.now(timezone.utc)
@@ -3,13 +3,17 @@ from datetime import timedelta, datetime
 
 from fastapi import Depends, HTTPException, status, APIRouter
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.database import get_db_session
 from app.schemas.apikeys import ApiKeysBase
-from app.services.auth_service import service_create_api_key
-from app.services.user_service import get_role_permission, get_user_role
+from app.services.auth_service import service_create_api_key, \
+    service_deactivate_api_key
+from app.services.authorization_service import get_permission_index
 from app.utility.constant import ROLES, PERMISSIONS
 from app.utility.env import get_token_expire_minutes
 from app.utility.jwt import authenticate_user, Token, create_access_token
+from dependencies import get_current_active_user, oauth2_scheme
 
 router = APIRouter()
 
@@ -17,9 +21,10 @@ router = APIRouter()
 @router.post("/token")
 async def login_for_access_token(
         form_data: Annotated[OAuth2PasswordRequestForm,
-        Depends()], ) -> Token:
-    user = authenticate_user(form_data.username,
-                             form_data.password)
+        Depends()],
+        session: Annotated[AsyncSession, Depends(get_db_session)]) -> Token:
+    user = await authenticate_user(form_data.username,
+                                   form_data.password)
 
     if not user:
         raise HTTPException(
@@ -30,10 +35,12 @@ async def login_for_access_token(
 
     await is_allowed_to_generate_token(user)
 
-    access_token_expires = timedelta(minutes=int(get_token_expire_minutes()))
+    access_token_expires = timedelta(minutes=get_token_expire_minutes())
 
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "uid": user.id,
+              "active": user.is_active, "disabled": user.is_disabled},
+        expires_delta=access_token_expires
     )
 
     now = datetime.now()
@@ -45,25 +52,29 @@ async def login_for_access_token(
         is_active=True
     )
 
-    service_create_api_key(db_api_key)
+    await service_create_api_key(db_api_key, session)
 
     return Token(access_token=access_token, token_type="bearer")
 
 
+@router.delete("/token", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_access_token(
+        token: Annotated[str, Depends(oauth2_scheme)],
+        current_user: Annotated[dict, Depends(get_current_active_user)],
+        session: Annotated[AsyncSession, Depends(get_db_session)]):
+    # Logs out the token the request was made with
+    if not await service_deactivate_api_key(token, session):
+        raise HTTPException(status_code=404, detail="Token not found")
+    return
+
+
 async def is_allowed_to_generate_token(user):
-    role = next(
-        (r for r in get_user_role(user.id)
-         if r.role_name == ROLES.API_USER.value),
-        None
-    )
-    if not role or role is None:
+    permission_index = await get_permission_index()
+
+    if not permission_index.has_role(user.id, ROLES.API_USER.value):
         raise HTTPException(status_code=404,
                             detail="The username is not allowed to generate a token.")
-    permission = next(
-        (p for p in get_role_permission(ROLES.API_USER.value)
-         if p.permission_name == PERMISSIONS.API_GENERATE_TOKEN.value),
-        None
-    )
-    if not permission or permission is None:
+    if not permission_index.role_has_permission(
+            ROLES.API_USER.value, PERMISSIONS.API_GENERATE_TOKEN.value):
         raise HTTPException(status_code=404,
                             detail="The username is not allowed to generate a token.")
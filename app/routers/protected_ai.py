@@ -1,7 +1,11 @@
 from fastapi import APIRouter, Depends, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sse_starlette.sse import EventSourceResponse
 
 from app.schemas.nurses import GenerateSbarBase, ChatBot
-from app.services.ai_service import service_generate_sbar, service_chat_patient
+from app.services.ai_service import service_generate_sbar, \
+    service_chat_patient, service_stream_sbar
+from app.database import get_db_session, get_db_read_session
 from dependencies import get_current_active_user
 
 router = APIRouter()
@@ -10,11 +14,22 @@ router = APIRouter()
 @router.post("/generate_sbar/", status_code=status.HTTP_201_CREATED)
 async def generate_sbar(generate_sbar: GenerateSbarBase = Depends(),
                         current_user: dict = Depends(
-                            get_current_active_user)):
-    return_generate_sbar = service_generate_sbar(generate_sbar, False)
+                            get_current_active_user),
+                        session: AsyncSession = Depends(get_db_session),
+                        read_session: AsyncSession = Depends(
+                            get_db_read_session)):
+    return_generate_sbar = await service_generate_sbar(generate_sbar, False,
+                                                       session, read_session)
     return return_generate_sbar
 
 
+@router.post("/generate_sbar/stream")
+async def generate_sbar_stream(generate_sbar: GenerateSbarBase = Depends(),
+                               current_user: dict = Depends(
+                                   get_current_active_user)):
+    return EventSourceResponse(service_stream_sbar(generate_sbar, False))
+
+
 @router.post("/chatbot/", status_code=status.HTTP_201_CREATED)
 async def chatbot(chatbot: ChatBot = Depends(),
                   current_user: dict = Depends(
@@ -26,6 +41,17 @@ async def chatbot(chatbot: ChatBot = Depends(),
 @router.post("/re_generate_sbar/", status_code=status.HTTP_201_CREATED)
 async def re_generate_sbar(generate_sbar: GenerateSbarBase = Depends(),
                            current_user: dict = Depends(
-                               get_current_active_user)):
-    return_generate_sbar = service_generate_sbar(generate_sbar, True)
-    return return_generate_sbar
\ No newline at end of file
+                               get_current_active_user),
+                           session: AsyncSession = Depends(get_db_session),
+                           read_session: AsyncSession = Depends(
+                               get_db_read_session)):
+    return_generate_sbar = await service_generate_sbar(generate_sbar, True,
+                                                       session, read_session)
+    return return_generate_sbar
+
+
+@router.post("/re_generate_sbar/stream")
+async def re_generate_sbar_stream(generate_sbar: GenerateSbarBase = Depends(),
+                                  current_user: dict = Depends(
+                                      get_current_active_user)):
+    return EventSourceResponse(service_stream_sbar(generate_sbar, True))
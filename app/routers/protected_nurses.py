@@ -1,22 +1,36 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, Depends, status, Request, \
+    WebSocket, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models import Nurses
 from app.models.nurses import Patients, VitalSigns, VitalMedicalData, \
     NurseNotes
 from app.schemas.nurses import NursesBase, PatientsBase, VitalSignsBase, \
-    VitalMedicalDataBase, NurseNotesBase
+    VitalMedicalDataBase, NurseNotesBase, BulkInsertResult, CursorPage, \
+    VitalSignsHourlySummary
 from app.services.nurse_services import get_nurse_by_id, get_patient_by_id, \
     service_create_nurse, service_create_patient, service_create_vital_signs, \
-    service_create_vital_medical, service_create_nurse_note
-from dependencies import get_current_active_user
+    service_create_vital_medical, service_create_nurse_note, \
+    parse_bulk_payload, service_bulk_create_vital_signs, \
+    service_bulk_create_vital_medical, service_bulk_create_nurse_notes, \
+    get_patients_page, get_vital_signs_page, get_nurse_notes_page, \
+    get_handoffs_page
+from app.services.ingest_service import service_stream_vital_signs
+from app.services.rollup_service import get_vital_signs_rollups
+from app.database import get_db_session, get_db_read_session
+from app.utility.constant import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from dependencies import get_current_active_user, get_current_websocket_user
 
 router = APIRouter()
 
 
 @router.get("/nurses/{nurse_id}", response_model=Nurses)
 async def get_nurse(nurse_id: int,
-                    current_user: dict = Depends(get_current_active_user)):
-    db_nurse = get_nurse_by_id(nurse_id)
+                    current_user: dict = Depends(get_current_active_user),
+                    session: AsyncSession = Depends(get_db_read_session)):
+    db_nurse = await get_nurse_by_id(nurse_id, session)
     if db_nurse is None:
         raise HTTPException(status_code=404, detail="Nurse not found")
 
@@ -26,19 +40,98 @@ async def get_nurse(nurse_id: int,
 @router.get("/patient/{patient_id}", response_model=Patients)
 async def create_patient(patient_id: int,
                          current_user: dict = Depends(
-                             get_current_active_user)):
-    db_patient = get_patient_by_id(patient_id)
+                             get_current_active_user),
+                         session: AsyncSession = Depends(get_db_read_session)):
+    db_patient = await get_patient_by_id(patient_id, session)
     if db_patient is None:
         raise HTTPException(status_code=404, detail="Patient not found")
 
     return db_patient
 
 
+@router.get("/patients/", response_model=CursorPage)
+async def list_patients(room_number: str | None = None,
+                        admitted: bool | None = None,
+                        fields: str | None = None,
+                        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1,
+                                           le=MAX_PAGE_SIZE),
+                        cursor: str | None = None,
+                        current_user: dict = Depends(get_current_active_user),
+                        session: AsyncSession = Depends(get_db_read_session)):
+    return await get_patients_page(room_number, admitted, fields, limit,
+                                   cursor, session)
+
+
+@router.get("/vital_signs/", response_model=CursorPage)
+async def list_vital_signs(patient_id: int,
+                           start: datetime | None = None,
+                           end: datetime | None = None,
+                           fields: str | None = None,
+                           limit: int = Query(DEFAULT_PAGE_SIZE, ge=1,
+                                              le=MAX_PAGE_SIZE),
+                           cursor: str | None = None,
+                           current_user: dict = Depends(
+                               get_current_active_user),
+                           session: AsyncSession = Depends(
+                               get_db_read_session)):
+    return await get_vital_signs_page(patient_id, start, end, fields, limit,
+                                      cursor, session)
+
+
+@router.get("/vital_signs/hourly",
+            response_model=list[VitalSignsHourlySummary])
+async def list_vital_signs_hourly(patient_id: int,
+                                  start: datetime | None = None,
+                                  end: datetime | None = None,
+                                  current_user: dict = Depends(
+                                      get_current_active_user),
+                                  session: AsyncSession = Depends(
+                                      get_db_read_session)):
+    return await get_vital_signs_rollups(patient_id, start, end, session)
+
+
+@router.get("/nurse_notes/", response_model=CursorPage)
+async def list_nurse_notes(patient_id: int,
+                           nurse_id: int | None = None,
+                           start: datetime | None = None,
+                           end: datetime | None = None,
+                           fields: str | None = None,
+                           limit: int = Query(DEFAULT_PAGE_SIZE, ge=1,
+                                              le=MAX_PAGE_SIZE),
+                           cursor: str | None = None,
+                           current_user: dict = Depends(
+                               get_current_active_user),
+                           session: AsyncSession = Depends(
+                               get_db_read_session)):
+    return await get_nurse_notes_page(patient_id, nurse_id, start, end,
+                                      fields, limit, cursor, session)
+
+
+@router.get("/handoffs/", response_model=CursorPage)
+async def list_handoffs(patient_id: int | None = None,
+                        outgoing_nurse_id: int | None = None,
+                        incoming_nurse_id: int | None = None,
+                        handoff_status: str | None = Query(None,
+                                                           alias="status"),
+                        start: datetime | None = None,
+                        end: datetime | None = None,
+                        fields: str | None = None,
+                        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1,
+                                           le=MAX_PAGE_SIZE),
+                        cursor: str | None = None,
+                        current_user: dict = Depends(get_current_active_user),
+                        session: AsyncSession = Depends(get_db_read_session)):
+    return await get_handoffs_page(patient_id, outgoing_nurse_id,
+                                   incoming_nurse_id, handoff_status, start,
+                                   end, fields, limit, cursor, session)
+
+
 @router.post("/nurses/", response_model=Nurses,
              status_code=status.HTTP_201_CREATED, )
 async def create_nurse(nurse: NursesBase,
-                       current_user: dict = Depends(get_current_active_user)):
-    db_nurse = service_create_nurse(nurse)
+                       current_user: dict = Depends(get_current_active_user),
+                       session: AsyncSession = Depends(get_db_session)):
+    db_nurse = await service_create_nurse(nurse, session)
     return db_nurse
 
 
@@ -46,8 +139,9 @@ async def create_nurse(nurse: NursesBase,
              status_code=status.HTTP_201_CREATED)
 async def create_patient(patient: PatientsBase,
                          current_user: dict = Depends(
-                             get_current_active_user)):
-    db_patient = service_create_patient(patient)
+                             get_current_active_user),
+                         session: AsyncSession = Depends(get_db_session)):
+    db_patient = await service_create_patient(patient, session)
     return db_patient
 
 
@@ -55,8 +149,9 @@ async def create_patient(patient: PatientsBase,
              status_code=status.HTTP_201_CREATED)
 async def create_vital_signs(vital_signs: VitalSignsBase,
                              current_user: dict = Depends(
-                                 get_current_active_user)):
-    db_vital_signs = service_create_vital_signs(vital_signs)
+                                 get_current_active_user),
+                             session: AsyncSession = Depends(get_db_session)):
+    db_vital_signs = await service_create_vital_signs(vital_signs, session)
     return db_vital_signs
 
 
@@ -64,8 +159,9 @@ async def create_vital_signs(vital_signs: VitalSignsBase,
              status_code=status.HTTP_201_CREATED)
 async def create_medical_data(vital_medical: VitalMedicalDataBase,
                               current_user: dict = Depends(
-                                  get_current_active_user)):
-    db_vital_medical = service_create_vital_medical(vital_medical)
+                                  get_current_active_user),
+                              session: AsyncSession = Depends(get_db_session)):
+    db_vital_medical = await service_create_vital_medical(vital_medical, session)
     return db_vital_medical
 
 
@@ -73,6 +169,44 @@ async def create_medical_data(vital_medical: VitalMedicalDataBase,
              status_code=status.HTTP_201_CREATED)
 async def create_nurse_notes(nurse_notes: NurseNotesBase,
                              current_user: dict = Depends(
-                                 get_current_active_user)):
-    db_nurse_notes = service_create_nurse_note(nurse_notes)
+                                 get_current_active_user),
+                             session: AsyncSession = Depends(get_db_session)):
+    db_nurse_notes = await service_create_nurse_note(nurse_notes, session)
     return db_nurse_notes
+
+
+@router.post("/vital_signs/bulk", response_model=BulkInsertResult)
+async def create_vital_signs_bulk(request: Request,
+                                  current_user: dict = Depends(
+                                      get_current_active_user),
+                                  session: AsyncSession = Depends(get_db_session)):
+    rows = parse_bulk_payload(await request.body(),
+                              request.headers.get("content-type"))
+    return await service_bulk_create_vital_signs(rows, session)
+
+
+@router.post("/vital_medical/bulk", response_model=BulkInsertResult)
+async def create_medical_data_bulk(request: Request,
+                                   current_user: dict = Depends(
+                                       get_current_active_user),
+                                   session: AsyncSession = Depends(get_db_session)):
+    rows = parse_bulk_payload(await request.body(),
+                              request.headers.get("content-type"))
+    return await service_bulk_create_vital_medical(rows, session)
+
+
+@router.post("/nurse_notes/bulk", response_model=BulkInsertResult)
+async def create_nurse_notes_bulk(request: Request,
+                                  current_user: dict = Depends(
+                                      get_current_active_user),
+                                  session: AsyncSession = Depends(get_db_session)):
+    rows = parse_bulk_payload(await request.body(),
+                              request.headers.get("content-type"))
+    return await service_bulk_create_nurse_notes(rows, session)
+
+
+@router.websocket("/vital_signs/stream")
+async def stream_vital_signs(websocket: WebSocket,
+                             current_user: dict = Depends(
+                                 get_current_websocket_user)):
+    await service_stream_vital_signs(websocket)
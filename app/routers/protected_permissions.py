@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends, status
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.user import Roles, Permissions
 from app.schemas.permissions import PermissionBase
@@ -6,6 +7,7 @@ from app.services.permissions_service import service_get_permission_by_id, \
     service_get_permission_by_name, service_create_permission, \
     service_delete_permission, service_update_permission
 
+from app.database import get_db_session, get_db_read_session
 from dependencies import get_current_active_user
 
 router = APIRouter()
@@ -14,8 +16,9 @@ router = APIRouter()
 @router.get("/permissions/{permission_id}", response_model=Permissions)
 async def get_permission_by_Id(permission_id: int,
                                 current_user: dict = Depends(
-                                    get_current_active_user)):
-    db_permission = service_get_permission_by_id(permission_id)
+                                    get_current_active_user),
+                               session: AsyncSession = Depends(get_db_read_session)):
+    db_permission = await service_get_permission_by_id(permission_id, session)
     if db_permission is None:
         raise HTTPException(status_code=404, detail="Permission not found")
 
@@ -25,8 +28,9 @@ async def get_permission_by_Id(permission_id: int,
 @router.get("/permissions/{permission_name}", response_model=Permissions)
 async def get_permission_by_Name(permission_name: str,
                                   current_user: dict = Depends(
-                                      get_current_active_user)):
-    db_permission = service_get_permission_by_name(permission_name)
+                                      get_current_active_user),
+                                 session: AsyncSession = Depends(get_db_read_session)):
+    db_permission = await service_get_permission_by_name(permission_name, session)
     if db_permission is None:
         raise HTTPException(status_code=404, detail="Permission not found")
 
@@ -35,8 +39,9 @@ async def get_permission_by_Name(permission_name: str,
 
 @router.post("/permissions/", response_model=Permissions,
              status_code=status.HTTP_201_CREATED)
-async def create_permission(permission: PermissionBase):
-    db_permission = service_create_permission(permission)
+async def create_permission(permission: PermissionBase,
+                            session: AsyncSession = Depends(get_db_session)):
+    db_permission = await service_create_permission(permission, session)
     return db_permission
 
 
@@ -44,11 +49,12 @@ async def create_permission(permission: PermissionBase):
                status_code=status.HTTP_204_NO_CONTENT)
 async def delete_permission(permission_id: int,
                             current_user: dict = Depends(
-                                get_current_active_user)):
-    db_permission = get_permission_by_Id(permission_id)
+                                get_current_active_user),
+                            session: AsyncSession = Depends(get_db_session)):
+    db_permission = await service_get_permission_by_id(permission_id, session)
     if db_permission is None:
         raise HTTPException(status_code=404, detail="Permission not found")
-    db_permission = service_delete_permission(permission_id)
+    db_permission = await service_delete_permission(permission_id, session)
     if db_permission is None:
         raise HTTPException(status_code=409,
                             detail="Permission logical constraints")
@@ -58,5 +64,6 @@ async def delete_permission(permission_id: int,
 @router.put("/permissions/{permission_id}", response_model=Permissions)
 async def update_permission(permission_id: int, permission: PermissionBase,
                             current_user: dict = Depends(
-                                get_current_active_user)):
-    return service_update_permission(permission_id, permission)
+                                get_current_active_user),
+                            session: AsyncSession = Depends(get_db_session)):
+    return await service_update_permission(permission_id, permission, session)
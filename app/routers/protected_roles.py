@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends, status
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.user import Roles
 from app.schemas.roles import RoleBase
@@ -6,6 +7,7 @@ from app.services.roles_service import service_get_role_by_id, \
     service_get_role_by_name, service_create_role, service_delete_role, \
     service_update_role
 
+from app.database import get_db_session, get_db_read_session
 from dependencies import get_current_active_user
 
 router = APIRouter()
@@ -14,8 +16,9 @@ router = APIRouter()
 @router.get("/roles/{role_id}", response_model=Roles)
 async def read_roles_by_Id(role_id: int,
                            current_user: dict = Depends(
-                               get_current_active_user)):
-    db_role = service_get_role_by_id(role_id)
+                               get_current_active_user),
+                           session: AsyncSession = Depends(get_db_read_session)):
+    db_role = await service_get_role_by_id(role_id, session)
     if db_role is None:
         raise HTTPException(status_code=404, detail="Role not found")
 
@@ -25,8 +28,9 @@ async def read_roles_by_Id(role_id: int,
 @router.get("/roles/{role_name}", response_model=Roles)
 async def read_roles_by_Name(role_name: str,
                              current_user: dict = Depends(
-                                 get_current_active_user)):
-    db_role = service_get_role_by_name(role_name)
+                                 get_current_active_user),
+                             session: AsyncSession = Depends(get_db_read_session)):
+    db_role = await service_get_role_by_name(role_name, session)
     if db_role is None:
         raise HTTPException(status_code=404, detail="Role not found")
 
@@ -35,18 +39,20 @@ async def read_roles_by_Name(role_name: str,
 
 @router.post("/roles/", response_model=Roles,
              status_code=status.HTTP_201_CREATED)
-async def create_role(role: RoleBase):
-    db_role = service_create_role(role)
+async def create_role(role: RoleBase,
+                      session: AsyncSession = Depends(get_db_session)):
+    db_role = await service_create_role(role, session)
     return db_role
 
 
 @router.delete("/roles/{role_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_role(role_id: int,
-                      current_user: dict = Depends(get_current_active_user)):
-    db_role = read_roles_by_Id(role_id)
+                      current_user: dict = Depends(get_current_active_user),
+                      session: AsyncSession = Depends(get_db_session)):
+    db_role = await service_get_role_by_id(role_id, session)
     if db_role is None:
         raise HTTPException(status_code=404, detail="Role not found")
-    db_deleted = service_delete_role(role_id)
+    db_deleted = await service_delete_role(role_id, session)
     if db_deleted is None:
         raise HTTPException(status_code=409,
                             detail="Role logical constraints")
@@ -55,5 +61,6 @@ async def delete_role(role_id: int,
 
 @router.put("/roles/{role_id}", response_model=Roles)
 async def update_user(role_id: int, role: RoleBase,
-                      current_user: dict = Depends(get_current_active_user)):
-    return service_update_role(role_id, role)
+                      current_user: dict = Depends(get_current_active_user),
+                      session: AsyncSession = Depends(get_db_session)):
+    return await service_update_role(role_id, role, session)
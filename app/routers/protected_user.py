@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends, status
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.user import UserRoles
 from app.schemas.role_permission import RolePermission
@@ -10,6 +11,7 @@ from app.services.user_service import get_user_by_id, service_create_user, \
     service_delete_user, service_update_user, service_create_user_profile, \
     service_assign_role, service_assign_permission
 
+from app.database import get_db_session, get_db_read_session
 from dependencies import get_current_active_user
 
 router = APIRouter()
@@ -17,8 +19,9 @@ router = APIRouter()
 
 @router.get("/users/{user_id}", response_model=User)
 async def read_user(user_id: int,
-                    current_user: dict = Depends(get_current_active_user)):
-    db_user = get_user_by_id(user_id)
+                    current_user: dict = Depends(get_current_active_user),
+                    session: AsyncSession = Depends(get_db_read_session)):
+    db_user = await get_user_by_id(user_id, session)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -27,23 +30,26 @@ async def read_user(user_id: int,
 
 @router.post("/users/", response_model=User,
              status_code=status.HTTP_201_CREATED)
-async def create_user(user: UserCreate):
-    return service_create_user(user)
+async def create_user(user: UserCreate,
+                      session: AsyncSession = Depends(get_db_session)):
+    return await service_create_user(user, session)
 
 
 @router.post("/users/profile", response_model=UserProfile,
              status_code=status.HTTP_201_CREATED)
-async def create_user_profile(user_profile: UserProfileBase):
-    return service_create_user_profile(user_profile)
+async def create_user_profile(user_profile: UserProfileBase,
+                              session: AsyncSession = Depends(get_db_session)):
+    return await service_create_user_profile(user_profile, session)
 
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(user_id: int,
-                      current_user: dict = Depends(get_current_active_user)):
-    db_user = get_user_by_id(user_id)
+                      current_user: dict = Depends(get_current_active_user),
+                      session: AsyncSession = Depends(get_db_session)):
+    db_user = await get_user_by_id(user_id, session)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    db_deleted = service_delete_user(user_id)
+    db_deleted = await service_delete_user(user_id, session)
     if db_deleted is None:
         raise HTTPException(status_code=409,
                             detail="User logical constraints")
@@ -52,17 +58,20 @@ async def delete_user(user_id: int,
 
 @router.put("/users/{user_id}", response_model=User)
 async def update_user(user_id: int, user: UserUpdate,
-                      current_user: dict = Depends(get_current_active_user)):
-    return service_update_user(user_id, user)
+                      current_user: dict = Depends(get_current_active_user),
+                      session: AsyncSession = Depends(get_db_session)):
+    return await service_update_user(user_id, user, session)
 
 
 @router.post("/users/assign_roles", response_model=UserRoles,
              status_code=status.HTTP_201_CREATED)
-async def user_assign_roles(user_roles: UserRole):
-    return service_assign_role(user_roles)
+async def user_assign_roles(user_roles: UserRole,
+                            session: AsyncSession = Depends(get_db_session)):
+    return await service_assign_role(user_roles, session)
 
 
 @router.post("/users/assign_permission", response_model=RolePermission,
              status_code=status.HTTP_201_CREATED)
-async def assign_permission(role_permission: RolePermission):
-    return service_assign_permission(role_permission)
+async def assign_permission(role_permission: RolePermission,
+                            session: AsyncSession = Depends(get_db_session)):
+    return await service_assign_permission(role_permission, session)
@@ -1,6 +1,10 @@
 from fastapi import APIRouter, Depends, status
 
+from app.services.ingest_service import vital_signs_writer
+from app.services.rate_limit_service import get_rate_limit_metrics
+from app.services.routing_service import provider_router
 from app.utility.logger import get_logger
+from app.utility.pool_metrics import get_pool_metrics
 from dependencies import get_current_user
 
 router = APIRouter()
@@ -11,3 +15,25 @@ logger = get_logger()
 async def welcome_message(current_user: dict = Depends(get_current_user)):
     logger.info({"event": "Welcome Message"})
     return {"message": "This is a welcome message from AI Backend"}
+
+
+@router.get("/metrics/database", status_code=status.HTTP_200_OK)
+async def database_pool_metrics(
+        current_user: dict = Depends(get_current_user)):
+    return get_pool_metrics()
+
+
+@router.get("/metrics/ingest", status_code=status.HTTP_200_OK)
+async def ingest_metrics(current_user: dict = Depends(get_current_user)):
+    return vital_signs_writer.snapshot()
+
+
+@router.get("/metrics/llm", status_code=status.HTTP_200_OK)
+async def llm_rate_limit_metrics(
+        current_user: dict = Depends(get_current_user)):
+    return get_rate_limit_metrics()
+
+
+@router.get("/metrics/routing", status_code=status.HTTP_200_OK)
+async def llm_routing_metrics(current_user: dict = Depends(get_current_user)):
+    return provider_router.snapshot()
@@ -2,6 +2,8 @@ from datetime import datetime
 
 from pydantic import BaseModel
 
+from app.models import User
+
 
 class ApiKeysBase(BaseModel):
     api_key: str
@@ -20,3 +22,9 @@ class ApiKeys(ApiKeysBase):
 
     class Config:
         from_attributes = True
+
+
+class ApiKeysPrincipal(BaseModel):
+    user: User
+    is_active: bool
+    expires_at: datetime | None
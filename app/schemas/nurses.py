@@ -47,6 +47,40 @@ class VitalSigns(VitalSignsBase):
         from_attributes = True
 
 
+class VitalSignsHourlySummary(BaseModel):
+    patient_id: int
+    hour: datetime
+    readings: int
+    last_time_stamp: datetime
+    blood_pressure_systolic_min: int
+    blood_pressure_systolic_max: int
+    blood_pressure_systolic_mean: float
+    blood_pressure_systolic_last: int
+    blood_pressure_diastolic_min: int
+    blood_pressure_diastolic_max: int
+    blood_pressure_diastolic_mean: float
+    blood_pressure_diastolic_last: int
+    heart_rate_min: int
+    heart_rate_max: int
+    heart_rate_mean: float
+    heart_rate_last: int
+    respiratory_rate_min: int
+    respiratory_rate_max: int
+    respiratory_rate_mean: float
+    respiratory_rate_last: int
+    oxygen_saturation_min: int
+    oxygen_saturation_max: int
+    oxygen_saturation_mean: float
+    oxygen_saturation_last: int
+    temperature_min: float
+    temperature_max: float
+    temperature_mean: float
+    temperature_last: float
+
+    class Config:
+        from_attributes = True
+
+
 class VitalMedicalDataBase(BaseModel):
     time_stamp: datetime = None
     data_type: str
@@ -100,7 +134,7 @@ class Nurses(NursesBase):
 
 
 class HandoffsBase(BaseModel):
-    report_text: str
+    report_text: dict
     status: str
     model: str
     patient_id: int
@@ -118,11 +152,47 @@ class Handoffs(HandoffsBase):
         from_attributes = True
 
 
+class ShiftContext(BaseModel):
+    patient: Patients | None
+    nurse: Nurses | None
+    vital_signs: tuple[VitalSigns, ...] = ()
+    # Replaces vital_signs when the shift has too many readings to list
+    vital_signs_hourly: tuple[VitalSignsHourlySummary, ...] = ()
+    medical_data: tuple[VitalMedicalData, ...] = ()
+    nurse_notes: tuple[NurseNotes, ...] = ()
+
+    class Config:
+        frozen = True
+
+
+class CursorPage(BaseModel):
+    items: list[dict]
+    next_cursor: str | None = None
+
+
+class BulkRowStatus(BaseModel):
+    index: int
+    status: str
+    id: int | None = None
+    detail: str | None = None
+
+
+class BulkInsertResult(BaseModel):
+    created: int
+    failed: int
+    rows: list[BulkRowStatus]
+
+
+class StreamAcknowledgement(BulkInsertResult):
+    frame: int
+
+
 class CLIENTS(Enum):
     CHAT_GPT = constant.CHAT_GPT
     GEMINI = constant.GEMINI
     GROQ = constant.GROQ
     XAI = constant.XAI
+    AUTO = constant.AUTO
 
 
 class GenerateSbarBase(BaseModel):
@@ -1,34 +1,49 @@
-import openai
+import asyncio
+import hashlib
 import json
-from google import genai
-from groq import Groq
+import time
+from functools import partial
+
+import logfire
 
 from pydantic import BaseModel
 from fastapi import HTTPException
-from openai import OpenAI
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database import get_session
+from app.database import session_scope, read_session_scope
 from app.models.nurses import Handoffs
 from app.schemas.nurses import GenerateSbarBase
-from app.services.nurse_services import get_latest_handoff, get_nurse_by_id, \
-    get_nurse_notes_by_patient_id_by_shift, get_patient_data, \
-    get_vital_signs_by_patient_id_by_shift, \
-    get_medical_data_by_patient_id_by_shift
+from app.services.nurse_services import get_latest_handoff, \
+    load_shift_context, get_handoff_by_input_digest
+from app.services.provider_service import provider_registry, PROVIDER_MODELS
+from app.services.rate_limit_service import rate_limiters
+from app.services.routing_service import provider_router
 from app.utility.constant import CHAT_GPT, STATUS_DRAFT, \
-    GEMINI, GROQ, XAI, XAI_BASEURL, CHAT_GPT_PRICE_PER_TOKEN, GEMINI_PRICE_PER_TOKEN, LLAMA_PRICE_PER_TOKEN, \
-    XAI_PRICE_PER_TOKEN
-from app.utility.env import get_open_ai_key, get_gemini_key, get_groq_key, \
-    get_groq_model, get_gemini_model, get_open_ai_model, get_xai_key, \
-    get_xai_model
+    GEMINI, GROQ, XAI, CHARS_PER_TOKEN, SBAR_COMPLETION_TOKENS, \
+    SBAR_PROMPT_VERSION, SBAR_CACHE_HIT, SBAR_CACHE_MISS, SBAR_EVENT_HANDOFF, \
+    SBAR_EVENT_ERROR, AUTO, PRICE_PER_TOKEN
+from app.utility.env import get_groq_model, get_gemini_model, \
+    get_open_ai_model, get_xai_model
+from app.utility.json_stream import JsonMemberStream
+from app.utility.logger import get_logger
 from app.utility.others import construct_sbar_report
 from sqlalchemy.exc import IntegrityError
 
 from app.utility.prompt import system_prompt_regeneration_sbar_main, \
     system_prompt_regeneration_sbar_body, system_prompt_generate
-from ratelimit import limits, sleep_and_retry
 
 from app.utility.rag_qa import generate_user_message
 
+logger = get_logger()
+
+sbar_cache_counter = logfire.metric_counter(
+    "sbar.cache", unit="1",
+    description="SBAR requests answered from a stored report (hit) or by "
+                "the provider (miss)")
+routing_counter = logfire.metric_counter(
+    "sbar.routing", unit="1",
+    description="Automatically routed SBAR requests by winning provider")
+
 
 class Situation(BaseModel):
     patient_name: str
@@ -65,42 +80,140 @@ class HandoffReport(BaseModel):
     reported_by: ReportedBy
 
 
-@sleep_and_retry
-@limits(calls=1, period=1)
-def generate_sbar(patient_id: int, nurse_id: int, model: str,
-                  is_regenerate_sbar: bool):
-    patient = get_patient_data(patient_id)
-
-    vital_signs = get_vital_signs_by_patient_id_by_shift(patient_id)
+async def load_sbar_prompts(patient_id: int, nurse_id: int, model: str,
+                            is_regenerate_sbar: bool,
+                            read_session: AsyncSession | None = None
+                            ) -> tuple[str, str]:
+    async with read_session_scope(read_session) as read_session:
+        context = await load_shift_context(patient_id, nurse_id,
+                                           read_session)
 
-    medical_data = get_medical_data_by_patient_id_by_shift(patient_id)
+        if is_regenerate_sbar:
+            hand_off = await get_latest_handoff(
+                patient_id, nurse_id, None if model == AUTO else model,
+                read_session)
 
-    nurse = get_nurse_by_id(nurse_id)
+        # End the read transaction so the pooled connection is not held
+        # while the provider call runs
+        await read_session.commit()
 
-    nurse_notes = get_nurse_notes_by_patient_id_by_shift(patient_id, nurse_id)
+    if context.vital_signs_hourly:
+        vital_signs = ("Hourly Vital Signs (min, max, mean and last per "
+                       f"hour) : {list(context.vital_signs_hourly)}")
+    else:
+        vital_signs = f"Vital Signs : {list(context.vital_signs)}"
 
     if is_regenerate_sbar:
-
-        hand_off = get_latest_handoff(patient_id, nurse_id, model)
-
         user_prompt = (
-            f"Regenerate SBAR using the following:\n Patient Data : {patient},"
-            f"\nVital Signs : {vital_signs}, \nMedical Data : {medical_data}, \nNurse Notes : {nurse_notes} , "
-            f"Nurse Data : {nurse} ")
+            f"Regenerate SBAR using the following:\n Patient Data : {context.patient},"
+            f"\n{vital_signs}, \nMedical Data : {list(context.medical_data)}, \nNurse Notes : {list(context.nurse_notes)} , "
+            f"Nurse Data : {context.nurse} ")
 
-        system_prompt = system_prompt_regeneration_sbar_main + str(
+        system_prompt = system_prompt_regeneration_sbar_main + json.dumps(
             hand_off.report_text) + system_prompt_regeneration_sbar_body
     else:
         user_prompt = (
-            f"Generate a SBAR using the following:\n Patient Data : {patient},"
-            f"\nVital Signs : {vital_signs}, \nMedical Data : {medical_data}, \nNurse Notes : {nurse_notes} , "
-            f"Nurse Data : {nurse} ")
+            f"Generate a SBAR using the following:\n Patient Data : {context.patient},"
+            f"\n{vital_signs}, \nMedical Data : {list(context.medical_data)}, \nNurse Notes : {list(context.nurse_notes)} , "
+            f"Nurse Data : {context.nurse} ")
 
         system_prompt = system_prompt_generate
 
+    return system_prompt, user_prompt
+
+
+def get_sbar_input_digest(model: str, system_prompt: str,
+                          user_prompt: str) -> str:
+    # The prompts carry the shift inputs in a fixed order (patient, vitals,
+    # medical data, notes, nurse and for a regeneration the previous report)
+    # and the prompt templates, so equal prompts give an equal report
+    key = json.dumps({
+        "prompt_version": SBAR_PROMPT_VERSION,
+        "model": model,
+        "provider_model": PROVIDER_MODELS[model]()
+        if model in PROVIDER_MODELS else None,
+        "system_prompt": system_prompt,
+        "user_prompt": user_prompt,
+    }, sort_keys=True)
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def estimate_tokens(system_prompt: str, user_prompt: str) -> int:
+    # Charged against the rate limit before the call, corrected with the
+    # usage the provider reports
+    return (len(system_prompt) + len(user_prompt)) // CHARS_PER_TOKEN \
+        + SBAR_COMPLETION_TOKENS
+
+
+def get_cancelled_tokens(estimated_tokens: int) -> int:
+    # A cancelled call reports no usage. The provider has likely read the
+    # prompt already, the completion it never finished is given back.
+    return max(estimated_tokens - SBAR_COMPLETION_TOKENS, 0)
+
+
+async def request_sbar(model: str, system_prompt: str, user_prompt: str):
+    estimated_tokens = estimate_tokens(system_prompt, user_prompt)
+    limiter = rate_limiters[model]
+    await limiter.acquire(estimated_tokens)
+
+    start_time = time.perf_counter()
+    try:
+        response_sbar, token_usage = await complete_sbar(model, system_prompt,
+                                                         user_prompt)
+    except asyncio.CancelledError:
+        limiter.settle(estimated_tokens, get_cancelled_tokens(estimated_tokens))
+        provider_router.record(model, time.perf_counter() - start_time, None)
+        raise
+    except Exception:
+        limiter.settle(estimated_tokens, 0)
+        provider_router.record(model, time.perf_counter() - start_time, False)
+        raise
+    limiter.settle(estimated_tokens, get_total_tokens(model, token_usage))
+
+    is_valid = isinstance(response_sbar, HandoffReport)
+    provider_router.record(model, time.perf_counter() - start_time, is_valid)
+    if not is_valid:
+        raise HTTPException(status_code=502,
+                            detail=f"Model {model} returned no valid SBAR")
+    return response_sbar, token_usage
+
+
+async def request_sbar_routed(system_prompt: str, user_prompt: str
+                              ) -> tuple[str, HandoffReport, object, bool]:
+    provider, (response_sbar, token_usage), hedged = \
+        await provider_router.request(partial(
+            request_sbar, system_prompt=system_prompt,
+            user_prompt=user_prompt))
+    routing_counter.add(1, {"provider": provider, "hedged": hedged})
+    return provider, response_sbar, token_usage, hedged
+
+
+async def generate_sbar(patient_id: int, nurse_id: int, model: str,
+                        is_regenerate_sbar: bool,
+                        read_session: AsyncSession | None = None):
+    system_prompt, user_prompt = await load_sbar_prompts(
+        patient_id, nurse_id, model, is_regenerate_sbar, read_session)
+    return await request_sbar(model, system_prompt, user_prompt)
+
+
+def get_token_counts(model: str, token_usage) -> tuple[int, int, int]:
+    # Prompt, completion and total tokens
+    if model == GEMINI:
+        return (token_usage.prompt_token_count,
+                token_usage.candidates_token_count,
+                token_usage.total_token_count)
+    return (token_usage.prompt_tokens, token_usage.completion_tokens,
+            token_usage.total_tokens)
+
+
+def get_total_tokens(model: str, token_usage) -> int:
+    return get_token_counts(model, token_usage)[2]
+
+
+async def complete_sbar(model: str, system_prompt: str, user_prompt: str):
     if model == CHAT_GPT:
-        client = openai.OpenAI(api_key=get_open_ai_key())
-        response = client.beta.chat.completions.parse(
+        client = provider_registry.get(CHAT_GPT)
+        response = await client.beta.chat.completions.parse(
             model=get_open_ai_model(),
             messages=[
                 {"role": "system",
@@ -117,22 +230,23 @@ def generate_sbar(patient_id: int, nurse_id: int, model: str,
     elif model == GEMINI:
         prompt = system_prompt + "\n\n" + user_prompt + "\n\n"
 
-        client = genai.Client(api_key=get_gemini_key())
+        client = provider_registry.get(GEMINI)
 
-        response = client.models.generate_content(
-            model=get_gemini_model(),
-            contents=prompt,
-            config={
-                'response_mime_type': 'application/json',
-                'response_schema': HandoffReport,
-            },
-        )
+        async with provider_registry.gemini_connections:
+            response = await client.aio.models.generate_content(
+                model=get_gemini_model(),
+                contents=prompt,
+                config={
+                    'response_mime_type': 'application/json',
+                    'response_schema': HandoffReport,
+                },
+            )
         return response.parsed, response.usage_metadata
 
     elif model == GROQ:
-        client = Groq(api_key=get_groq_key())
+        client = provider_registry.get(GROQ)
 
-        chat_completion = client.chat.completions.create(
+        chat_completion = await client.chat.completions.create(
             messages=[
                 {
                     "role": "system",
@@ -153,12 +267,9 @@ def generate_sbar(patient_id: int, nurse_id: int, model: str,
         return HandoffReport.model_validate_json(chat_completion.choices[0].message.content), chat_completion.usage
 
     elif model == XAI:
-        client = OpenAI(
-            api_key=get_xai_key(),
-            base_url=XAI_BASEURL,
-        )
+        client = provider_registry.get(XAI)
 
-        completion = client.beta.chat.completions.parse(
+        completion = await client.beta.chat.completions.parse(
             model=get_xai_model(),
             messages=[
                 {"role": "system",
@@ -171,72 +282,295 @@ def generate_sbar(patient_id: int, nurse_id: int, model: str,
         return completion.choices[0].message.parsed, completion.usage
 
 
-def service_generate_sbar(sbar: GenerateSbarBase, is_regenerated: bool):
-    try:
-        response_sbar, token_usage = (
-            generate_sbar(sbar.patient_id, sbar.outgoing_nurse_id, sbar.model.value, is_regenerated))
-
-        situation = response_sbar.situation
-        background = response_sbar.background
-        assessment = response_sbar.assessment
-        recommendation = response_sbar.recommendation
-        reported_by = response_sbar.reported_by
-
-        if sbar.model.value == CHAT_GPT or sbar.model.value == XAI:
-            prompt_tokens = token_usage.prompt_tokens
-            completion_tokens = token_usage.completion_tokens
-            total_tokens = token_usage.total_tokens
-            cost_estimate = total_tokens * CHAT_GPT_PRICE_PER_TOKEN
-
-        elif sbar.model.value == GROQ:
-            prompt_tokens = token_usage.prompt_tokens
-            completion_tokens = token_usage.completion_tokens
-            total_tokens = token_usage.total_tokens
-            cost_estimate = total_tokens * LLAMA_PRICE_PER_TOKEN
-
-        elif sbar.model.value == XAI:
-            prompt_tokens = token_usage.prompt_tokens
-            completion_tokens = token_usage.completion_tokens
-            total_tokens = token_usage.total_tokens
-            cost_estimate = total_tokens * XAI_PRICE_PER_TOKEN
-
-        elif sbar.model.value == GEMINI:
-            prompt_tokens = token_usage.total_token_count
-            completion_tokens = token_usage.candidates_token_count
-            total_tokens = token_usage.total_token_count
-            cost_estimate = total_tokens * GEMINI_PRICE_PER_TOKEN
-
-        json_result = construct_sbar_report(situation, background,
-                                            assessment,
-                                            recommendation,
-                                            reported_by,
-                                            prompt_tokens,
-                                            completion_tokens,
-                                            total_tokens,
-                                            cost_estimate
-                                            )
-
-        db_hand_offs = Handoffs(
-            report_text=json_result,
-            status=STATUS_DRAFT,
-            model=sbar.model.value,
-            patient_id=sbar.patient_id,
-            outgoing_nurse_id=sbar.outgoing_nurse_id,
-            incoming_nurse_id=sbar.incoming_nurse_id
-        )
+async def stream_sbar_completion(model: str, system_prompt: str,
+                                 user_prompt: str):
+    # Yields the report JSON as the provider produces it, then the token
+    # usage as the last item
+    if model in (CHAT_GPT, XAI):
+        async with provider_registry.get(model).beta.chat.completions.stream(
+                model=PROVIDER_MODELS[model](),
+                messages=[
+                    {"role": "system",
+                     "content": f"{system_prompt}"},
+                    {"role": "user", "content": f"{user_prompt}"}
+                ],
+                temperature=0,
+                response_format=HandoffReport,
+                stream_options={"include_usage": True},
+        ) as stream:
+            async for event in stream:
+                if event.type == "content.delta":
+                    yield event.delta
+            yield (await stream.get_final_completion()).usage
 
-        with get_session() as session:
-            session.add(db_hand_offs)
-            session.commit()
-            session.refresh(db_hand_offs)
-        return json.loads(json_result)
+    elif model == GEMINI:
+        prompt = system_prompt + "\n\n" + user_prompt + "\n\n"
+        client = provider_registry.get(GEMINI)
+
+        async with provider_registry.gemini_connections:
+            usage_metadata = None
+            async for chunk in await client.aio.models.generate_content_stream(
+                    model=get_gemini_model(),
+                    contents=prompt,
+                    config={
+                        'response_mime_type': 'application/json',
+                        'response_schema': HandoffReport,
+                    },
+            ):
+                if chunk.text:
+                    yield chunk.text
+                usage_metadata = chunk.usage_metadata or usage_metadata
+            yield usage_metadata
+
+    else:
+        # Groq does not stream in JSON mode, the report arrives in one piece
+        response_sbar, token_usage = await complete_sbar(model, system_prompt,
+                                                         user_prompt)
+        yield response_sbar.model_dump_json()
+        yield token_usage
+
+
+def load_handoff_report(report_text: dict) -> HandoffReport:
+    # Inverse of construct_sbar_report
+    sbar_report = report_text["sbar_report"]
+    patient = sbar_report["patient"]
+    return HandoffReport(
+        situation=Situation(
+            patient_name=patient["name"],
+            mrn=patient["mrn"],
+            age=patient["age"],
+            gender=patient["gender"],
+            room_number=patient["room_number"],
+            admission_date=patient["admission_date"],
+            list_situations_feedback=sbar_report["situation"]["feedback"]),
+        background=Background(list_backgrounds=sbar_report["background"]),
+        assessment=Assessment(list_assessments=sbar_report["assessment"]),
+        recommendation=Recommendation(
+            list_recommendations=sbar_report["recommendation"]),
+        reported_by=ReportedBy(**sbar_report["reported_by"]))
+
+
+def build_report_text(model: str, response_sbar: HandoffReport, token_usage,
+                      cache: str) -> dict:
+    situation = response_sbar.situation
+    background = response_sbar.background
+    assessment = response_sbar.assessment
+    recommendation = response_sbar.recommendation
+    reported_by = response_sbar.reported_by
+
+    prompt_tokens, completion_tokens, total_tokens = get_token_counts(
+        model, token_usage)
+    cost_estimate = total_tokens * PRICE_PER_TOKEN[model]
+
+    json_result = construct_sbar_report(situation, background,
+                                        assessment,
+                                        recommendation,
+                                        reported_by,
+                                        prompt_tokens,
+                                        completion_tokens,
+                                        total_tokens,
+                                        cost_estimate,
+                                        cache
+                                        )
+
+    # Stored as a JSONB document, not as a JSON encoded string
+    return json.loads(json_result)
+
+
+async def get_cached_handoff(sbar: GenerateSbarBase, input_digest: str,
+                             read_session: AsyncSession | None = None
+                             ) -> Handoffs | None:
+    async with read_session_scope(read_session) as read_session:
+        cached_handoff = await get_handoff_by_input_digest(
+            sbar.patient_id, input_digest, read_session)
+        await read_session.commit()
+
+    sbar_cache_counter.add(1, {
+        "model": sbar.model.value,
+        "result": SBAR_CACHE_MISS if cached_handoff is None
+        else SBAR_CACHE_HIT})
+    return cached_handoff
+
+
+async def reuse_cached_handoff(sbar: GenerateSbarBase,
+                               cached_handoff: Handoffs,
+                               session: AsyncSession | None = None
+                               ) -> tuple[int, dict]:
+    # Same inputs, the stored report is returned without calling the
+    # provider. Nothing was spent, the token usage stays to show what the
+    # report cost when it was generated.
+    report_text = {**cached_handoff.report_text, "token_usage": {
+        **cached_handoff.report_text["token_usage"],
+        "cache": SBAR_CACHE_HIT}, "cost_estimate": 0}
+    if cached_handoff.incoming_nurse_id == sbar.incoming_nurse_id:
+        return cached_handoff.id, report_text
+
+    # Handed off to another nurse, recorded as a handoff of its own
+    db_hand_offs = await save_handoff(sbar, cached_handoff.model, report_text,
+                                      cached_handoff.input_digest, session)
+    return db_hand_offs.id, report_text
+
+
+async def service_generate_sbar(sbar: GenerateSbarBase,
+                                is_regenerated: bool,
+                                session: AsyncSession | None = None,
+                                read_session: AsyncSession | None = None):
+    try:
+        system_prompt, user_prompt = await load_sbar_prompts(
+            sbar.patient_id, sbar.outgoing_nurse_id, sbar.model.value,
+            is_regenerated, read_session)
+        input_digest = get_sbar_input_digest(sbar.model.value, system_prompt,
+                                             user_prompt)
+
+        cached_handoff = await get_cached_handoff(sbar, input_digest,
+                                                  read_session)
+        if cached_handoff is not None:
+            _, report_text = await reuse_cached_handoff(sbar, cached_handoff,
+                                                        session)
+            return report_text
+
+        if sbar.model.value == AUTO:
+            provider, response_sbar, token_usage, hedged = \
+                await request_sbar_routed(system_prompt, user_prompt)
+        else:
+            provider = sbar.model.value
+            response_sbar, token_usage = await request_sbar(
+                provider, system_prompt, user_prompt)
+        report_text = build_report_text(provider, response_sbar,
+                                        token_usage, SBAR_CACHE_MISS)
+        if sbar.model.value == AUTO:
+            report_text["routing"] = {"provider": provider, "hedged": hedged}
+
+        db_hand_offs = await save_handoff(sbar, provider, report_text,
+                                          input_digest, session)
+        return db_hand_offs.report_text
 
     except IntegrityError:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=400,
                             detail="Error adding handoffs")
 
 
+async def service_stream_sbar(sbar: GenerateSbarBase, is_regenerated: bool):
+    # Runs after the response has started, past the request scoped
+    # sessions, so every step uses a session of its own
+    try:
+        system_prompt, user_prompt = await load_sbar_prompts(
+            sbar.patient_id, sbar.outgoing_nurse_id, sbar.model.value,
+            is_regenerated)
+        input_digest = get_sbar_input_digest(sbar.model.value, system_prompt,
+                                             user_prompt)
+
+        cached_handoff = await get_cached_handoff(sbar, input_digest)
+        if cached_handoff is not None:
+            handoff_id, report_text = await reuse_cached_handoff(
+                sbar, cached_handoff)
+            # Replayed as the section events a generated report streams,
+            # clients see the same sequence whether or not it was cached
+            sections = load_handoff_report(report_text).model_dump()
+            for section, value in sections.items():
+                yield {"event": section, "data": json.dumps(value)}
+        else:
+            # A stream cannot be hedged once sections went out, auto streams
+            # from the best ranked provider and only moves on to the next
+            # one when it fails before its first section
+            providers = provider_router.rank() \
+                if sbar.model.value == AUTO else [sbar.model.value]
+            estimated_tokens = estimate_tokens(system_prompt, user_prompt)
+
+            while True:
+                provider = providers.pop(0)
+                limiter = rate_limiters[provider]
+                await limiter.acquire(estimated_tokens)
+
+                members = JsonMemberStream()
+                token_usage = None
+                is_started = False
+                start_time = time.perf_counter()
+                try:
+                    async for item in stream_sbar_completion(
+                            provider, system_prompt, user_prompt):
+                        if not isinstance(item, str):
+                            token_usage = item
+                            continue
+                        # One event per section as soon as it is complete
+                        for section, value in members.feed(item):
+                            is_started = True
+                            yield {"event": section,
+                                   "data": json.dumps(value)}
+                except asyncio.CancelledError:
+                    limiter.settle(estimated_tokens,
+                                   get_cancelled_tokens(estimated_tokens))
+                    provider_router.record(
+                        provider, time.perf_counter() - start_time, None)
+                    raise
+                except Exception as e:
+                    limiter.settle(estimated_tokens, 0)
+                    provider_router.record(
+                        provider, time.perf_counter() - start_time, False)
+                    if is_started or not providers:
+                        raise
+                    logger.warning(f"SBAR stream from {provider} failed: {e}")
+                    continue
+                limiter.settle(estimated_tokens,
+                               get_total_tokens(provider, token_usage))
+                break
+
+            try:
+                response_sbar = HandoffReport.model_validate_json(
+                    members.buffer)
+            except ValueError:
+                provider_router.record(provider,
+                                       time.perf_counter() - start_time, False)
+                raise
+            provider_router.record(provider, time.perf_counter() - start_time,
+                                   True)
+
+            report_text = build_report_text(provider, response_sbar,
+                                            token_usage, SBAR_CACHE_MISS)
+            if sbar.model.value == AUTO:
+                report_text["routing"] = {"provider": provider,
+                                          "hedged": False}
+            db_hand_offs = await save_handoff(sbar, provider, report_text,
+                                              input_digest)
+            handoff_id = db_hand_offs.id
+
+        yield {"event": SBAR_EVENT_HANDOFF, "data": json.dumps({
+            "handoff_id": handoff_id,
+            "token_usage": report_text["token_usage"],
+            "cost_estimate": report_text["cost_estimate"],
+            "report_text": report_text,
+        })}
+
+    except HTTPException as e:
+        yield {"event": SBAR_EVENT_ERROR,
+               "data": json.dumps({"detail": e.detail})}
+    except Exception as e:
+        logger.error(f"Streaming SBAR failed: {e}")
+        yield {"event": SBAR_EVENT_ERROR,
+               "data": json.dumps({"detail": "Error generating SBAR"})}
+
+
+async def save_handoff(sbar: GenerateSbarBase, model: str, report_text: dict,
+                       input_digest: str,
+                       session: AsyncSession | None = None) -> Handoffs:
+    # model is the provider that wrote the report, never auto
+    db_hand_offs = Handoffs(
+        report_text=report_text,
+        status=STATUS_DRAFT,
+        model=model,
+        input_digest=input_digest,
+        patient_id=sbar.patient_id,
+        outgoing_nurse_id=sbar.outgoing_nurse_id,
+        incoming_nurse_id=sbar.incoming_nurse_id
+    )
+
+    async with session_scope(session) as session:
+        session.add(db_hand_offs)
+        await session.flush()
+        return db_hand_offs
+
+
 def service_chat_patient(message: str, thread_id: str):
     return generate_user_message(message, thread_id)
 
@@ -244,8 +578,8 @@ def service_chat_patient(message: str, thread_id: str):
 def main():
     # situation, background, assessment, recommendation, reported_by = generate_sbar(1, 2, CHAT_GPT, False)
 
-    response_sbar, token_usage = generate_sbar(
-        3, 2, XAI, False)
+    response_sbar, token_usage = asyncio.run(generate_sbar(
+        3, 2, XAI, False))
 
     print("--------------------------------------------------------------------------------------------------")
     print(response_sbar)
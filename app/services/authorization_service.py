@@ -0,0 +1,101 @@
+import asyncio
+import time
+from collections import defaultdict
+
+from sqlmodel import select
+
+from app.database import get_async_session
+from app.models.user import Roles, Permissions, RolePermissions, UserRoles
+from app.utility.env import get_permission_index_ttl_seconds
+
+
+class PermissionIndex:
+    def __init__(self, user_roles: dict[int, frozenset[str]],
+                 role_permissions: dict[str, frozenset[str]]):
+        self.user_roles = user_roles
+        self.role_permissions = role_permissions
+        self.user_permissions = {
+            user_id: frozenset(
+                permission
+                for role in roles
+                for permission in role_permissions.get(role, ()))
+            for user_id, roles in user_roles.items()
+        }
+        self.loaded_at = time.monotonic()
+
+    def has_role(self, user_id: int, role_name: str) -> bool:
+        return role_name in self.user_roles.get(user_id, ())
+
+    def role_has_permission(self, role_name: str,
+                            permission_name: str) -> bool:
+        return permission_name in self.role_permissions.get(role_name, ())
+
+    def has_permission(self, user_id: int, permission_name: str) -> bool:
+        return permission_name in self.user_permissions.get(user_id, ())
+
+
+_permission_index: PermissionIndex | None = None
+_permission_index_generation = 0
+_permission_index_lock = asyncio.Lock()
+
+
+async def load_permission_index() -> PermissionIndex:
+    user_roles = defaultdict(set)
+    role_permissions = defaultdict(set)
+
+    async with get_async_session() as session:
+        statement = select(UserRoles.user_id, Roles.role_name).join(
+            Roles, Roles.id == UserRoles.role_id)
+
+        for user_id, role_name in await session.exec(statement):
+            user_roles[user_id].add(role_name)
+
+        statement = select(Roles.role_name, Permissions.permission_name).join(
+            RolePermissions, RolePermissions.role_id == Roles.id).join(
+            Permissions, Permissions.id == RolePermissions.permission_id)
+
+        for role_name, permission_name in await session.exec(statement):
+            role_permissions[role_name].add(permission_name)
+
+    return PermissionIndex(
+        user_roles={user_id: frozenset(roles)
+                    for user_id, roles in user_roles.items()},
+        role_permissions={role_name: frozenset(permissions)
+                          for role_name, permissions in
+                          role_permissions.items()}
+    )
+
+
+def is_permission_index_stale(index: PermissionIndex | None) -> bool:
+    # Other workers cannot invalidate this process, so the index also ages out
+    return index is None or (time.monotonic() - index.loaded_at >
+                             get_permission_index_ttl_seconds())
+
+
+async def get_permission_index() -> PermissionIndex:
+    global _permission_index
+
+    if not is_permission_index_stale(_permission_index):
+        return _permission_index
+
+    async with _permission_index_lock:
+        if is_permission_index_stale(_permission_index):
+            generation = _permission_index_generation
+            index = await load_permission_index()
+            if generation != _permission_index_generation:
+                # Data changed while loading, serve it but do not keep it
+                return index
+            _permission_index = index
+        return _permission_index
+
+
+def invalidate_permission_index():
+    global _permission_index, _permission_index_generation
+
+    _permission_index_generation += 1
+    _permission_index = None
+
+
+async def user_has_permission(user_id: int, permission_name: str) -> bool:
+    index = await get_permission_index()
+    return index.has_permission(user_id, permission_name)
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import time
+from collections import deque
+
+import logfire
+from fastapi import WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from app.models.nurses import VitalSigns
+from app.schemas.nurses import VitalSignsBase, BulkRowStatus, \
+    StreamAcknowledgement
+from app.services.nurse_services import service_bulk_create
+from app.utility.constant import BULK_STATUS_CREATED, BULK_STATUS_INVALID, \
+    BULK_STATUS_ERROR, MAX_PENDING_INGEST_FRAMES
+from app.utility.env import get_ingest_queue_size, get_ingest_batch_size, \
+    get_ingest_flush_interval_ms
+from app.utility.logger import get_logger
+from app.utility.others import get_latency_snapshot
+
+logger = get_logger()
+
+queue_depth_gauge = logfire.metric_gauge(
+    "ingest.queue_depth", unit="1",
+    description="Vital signs waiting for the group commit writer")
+commit_latency_histogram = logfire.metric_histogram(
+    "ingest.commit_latency", unit="ms",
+    description="Time to validate and commit one group of vital signs")
+batch_size_histogram = logfire.metric_histogram(
+    "ingest.batch_size", unit="1",
+    description="Vital signs committed per group")
+rows_counter = logfire.metric_counter(
+    "ingest.rows", unit="1",
+    description="Vital signs handled by the group commit writer")
+
+
+class VitalSignsWriter:
+    def __init__(self, max_queue_size: int, batch_size: int,
+                 flush_interval: float, samples: int = 1000):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.batches = 0
+        self.rows = 0
+        self.commit_latencies = deque(maxlen=samples)
+
+    async def submit(self, vital_sign: VitalSignsBase) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        # Blocks while the queue is full, which stops the caller reading
+        # from its socket and pushes back on the device gateway
+        await self.queue.put((vital_sign, future))
+        queue_depth_gauge.set(self.queue.qsize())
+        return future
+
+    async def next_batch(self) -> list:
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(),
+                                                    timeout))
+            except asyncio.TimeoutError:
+                break
+
+        queue_depth_gauge.set(self.queue.qsize())
+        return batch
+
+    async def write(self, batch: list):
+        start_time = time.perf_counter()
+        try:
+            result = await service_bulk_create(
+                VitalSigns, VitalSignsBase,
+                [vital_sign for vital_sign, _ in batch])
+            statuses = result.rows
+        except Exception as e:
+            logger.error(f"Vital signs group commit failed: {e}")
+            statuses = [BulkRowStatus(index=index, status=BULK_STATUS_ERROR,
+                                      detail=str(e))
+                        for index in range(len(batch))]
+        commit_latency = time.perf_counter() - start_time
+
+        self.batches += 1
+        self.rows += len(batch)
+        self.commit_latencies.append(commit_latency)
+        commit_latency_histogram.record(commit_latency * 1000)
+        batch_size_histogram.record(len(batch))
+        rows_counter.add(len(batch))
+
+        for (_, future), status in zip(batch, statuses):
+            if not future.done():
+                future.set_result(status)
+
+    async def run(self):
+        try:
+            while True:
+                await self.write(await self.next_batch())
+        except asyncio.CancelledError:
+            # Commit what was already accepted before shutting down
+            while not self.queue.empty():
+                batch = [self.queue.get_nowait()
+                         for _ in range(min(self.batch_size,
+                                            self.queue.qsize()))]
+                await self.write(batch)
+            raise
+
+    def snapshot(self) -> dict:
+        latencies = list(self.commit_latencies)
+        snapshot = {
+            "queue_depth": self.queue.qsize(),
+            "max_queue_size": self.max_queue_size,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": self.flush_interval * 1000,
+            "batches": self.batches,
+            "rows": self.rows,
+        }
+        if latencies:
+            snapshot["commit_latency_ms"] = get_latency_snapshot(latencies)
+        return snapshot
+
+
+vital_signs_writer = VitalSignsWriter(
+    max_queue_size=get_ingest_queue_size(),
+    batch_size=get_ingest_batch_size(),
+    flush_interval=get_ingest_flush_interval_ms() / 1000)
+
+
+def parse_stream_frame(message: str) -> list:
+    # A frame holds one JSON object, a JSON array or NDJSON lines
+    try:
+        rows = json.loads(message)
+    except json.JSONDecodeError:
+        rows = [json.loads(line) for line in message.splitlines()
+                if line.strip()]
+    return rows if isinstance(rows, list) else [rows]
+
+
+async def submit_frame(message: str, writer: VitalSignsWriter) -> list:
+    statuses = []
+    for index, row in enumerate(parse_stream_frame(message)):
+        try:
+            vital_sign = VitalSignsBase.model_validate(row)
+        except ValidationError as e:
+            statuses.append(BulkRowStatus(
+                index=index, status=BULK_STATUS_INVALID,
+                detail="; ".join(f"{'.'.join(map(str, error['loc']))}: "
+                                 f"{error['msg']}" for error in e.errors())))
+            continue
+        statuses.append(await writer.submit(vital_sign))
+    return statuses
+
+
+async def send_acknowledgements(websocket: WebSocket,
+                                acknowledgements: asyncio.Queue):
+    while True:
+        frame, pending = await acknowledgements.get()
+        rows = []
+        for index, status in enumerate(pending):
+            if isinstance(status, asyncio.Future):
+                status = await status
+            rows.append(status.model_copy(update={"index": index}))
+
+        created = sum(row.status == BULK_STATUS_CREATED for row in rows)
+        await websocket.send_text(StreamAcknowledgement(
+            frame=frame,
+            created=created,
+            failed=len(rows) - created,
+            rows=rows
+        ).model_dump_json())
+
+
+async def service_stream_vital_signs(
+        websocket: WebSocket,
+        writer: VitalSignsWriter = vital_signs_writer):
+    await websocket.accept()
+
+    # Bounded, so a client that outruns the writer stops being read from
+    acknowledgements = asyncio.Queue(maxsize=MAX_PENDING_INGEST_FRAMES)
+    sender = asyncio.create_task(
+        send_acknowledgements(websocket, acknowledgements))
+
+    frame = 0
+    try:
+        while True:
+            message = await websocket.receive_text()
+            try:
+                pending = await submit_frame(message, writer)
+            except json.JSONDecodeError as e:
+                await websocket.send_json(
+                    {"frame": frame, "error": f"Malformed frame: {e}"})
+            else:
+                await acknowledgements.put((frame, pending))
+            frame += 1
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
@@ -1,57 +1,84 @@
+import asyncio
+import base64
+import json
 from datetime import date, datetime, timedelta
 
-from app.database import get_session
+from app.database import session_scope, read_session_scope
 from app.models.nurses import Patients, VitalSigns, VitalMedicalData, \
-    NurseNotes, Nurses, Handoffs
+    NurseNotes, Nurses, Handoffs, RECOMMENDATION_SEARCH
 from app.schemas.nurses import PatientsBase, VitalSignsBase, \
-    VitalMedicalDataBase, NurseNotesBase, NursesBase, HandoffsBase
+    VitalMedicalDataBase, NurseNotesBase, NursesBase, HandoffsBase, \
+    BulkRowStatus, BulkInsertResult, ShiftContext, CursorPage
+from app.services.rollup_service import record_vital_signs_rollups, \
+    shift_rollups_as_json
+from app.utility.constant import BULK_STATUS_CREATED, BULK_STATUS_INVALID, \
+    BULK_STATUS_PATIENT_NOT_FOUND, BULK_STATUS_NURSE_NOT_FOUND, \
+    MAX_BULK_ROWS, DEFAULT_PAGE_SIZE
+from app.utility.env import get_shift_rollup_threshold
 from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy import func, literal_column, insert, text, bindparam, \
+    tuple_, case, select as select_columns
+from sqlalchemy.dialects.postgresql import JSONB, aggregate_order_by
 from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 
-def get_patient_by_id(patient_id: int) -> Patients:
-    with get_session() as session:
+async def get_patient_by_id(patient_id: int,
+                            session: AsyncSession | None = None) -> Patients:
+    async with read_session_scope(session) as session:
         statement = select(Patients).where(Patients.id == patient_id)
-        results = session.exec(statement)
+        results = await session.exec(statement)
         return results.first()
 
 
-def get_vital_signs_by_patient_id(patient_id: int) -> VitalSigns:
-    with get_session() as session:
+async def get_vital_signs_by_patient_id(
+        patient_id: int, session: AsyncSession | None = None) -> VitalSigns:
+    async with read_session_scope(session) as session:
         statement = select(VitalSigns).where(
             VitalSigns.patient_id == patient_id)
-        results = session.exec(statement)
+        results = await session.exec(statement)
         return results.first()
 
 
-def get_vital_medical_data_by_patient_id(patient_id: int) -> VitalMedicalData:
-    with get_session() as session:
+async def get_vital_medical_data_by_patient_id(
+        patient_id: int,
+        session: AsyncSession | None = None) -> VitalMedicalData:
+    async with read_session_scope(session) as session:
         statement = select(VitalMedicalData).where(
             VitalMedicalData.patient_id == patient_id)
-        results = session.exec(statement)
+        results = await session.exec(statement)
         return results.first()
 
 
-def get_nurse_notes_by_patient_id(patient_id: int,
-                                  nurse_id: int) -> NurseNotes:
-    with get_session() as session:
+async def get_nurse_notes_by_patient_id(patient_id: int,
+                                        nurse_id: int,
+                                        session: AsyncSession | None = None) -> NurseNotes:
+    async with read_session_scope(session) as session:
         statement = select(NurseNotes).where(
             NurseNotes.patient_id == patient_id).where(
             NurseNotes.nurse_id == nurse_id)
-        results = session.exec(statement)
+        results = await session.exec(statement)
         return results.all()
 
 
-def get_nurse_notes_by_patient_id_by_shift(patient_id: int,
-                                           nurse_id: int) -> NurseNotes:
+def get_shift_window() -> tuple[datetime, datetime]:
     start_shift = datetime.today() - timedelta(hours=9)
 
     start_of_day = datetime.combine(start_shift, datetime.min.time())
 
     end_of_day = datetime.today()
 
-    with get_session() as session:
+    return start_of_day, end_of_day
+
+
+async def get_nurse_notes_by_patient_id_by_shift(patient_id: int,
+                                                 nurse_id: int,
+                                                 session: AsyncSession | None = None) -> NurseNotes:
+    start_of_day, end_of_day = get_shift_window()
+
+    async with read_session_scope(session) as session:
         statement = select(NurseNotes).where(
             NurseNotes.patient_id == patient_id).where(
             NurseNotes.nurse_id == nurse_id).where(
@@ -59,77 +86,392 @@ def get_nurse_notes_by_patient_id_by_shift(patient_id: int,
             NurseNotes.time_stamp < end_of_day
         ).order_by(NurseNotes.time_stamp.desc())
 
-        results = session.exec(statement)
+        results = await session.exec(statement)
         return results.all()
 
 
-def get_vital_signs_by_patient_id_by_shift(patient_id: int) -> VitalSigns:
-    start_shift = datetime.today() - timedelta(hours=9)
-
-    start_of_day = datetime.combine(start_shift, datetime.min.time())
+async def get_vital_signs_by_patient_id_by_shift(
+        patient_id: int, session: AsyncSession | None = None) -> VitalSigns:
+    start_of_day, end_of_day = get_shift_window()
 
-    end_of_day = datetime.today()
-
-    with get_session() as session:
+    async with read_session_scope(session) as session:
         statement = select(VitalSigns).where(
             VitalSigns.patient_id == patient_id).where(
             VitalSigns.time_stamp >= start_of_day,
             VitalSigns.time_stamp < end_of_day
         ).order_by(VitalSigns.time_stamp.desc())
 
-        results = session.exec(statement)
+        results = await session.exec(statement)
         return results.all()
 
 
-def get_medical_data_by_patient_id_by_shift(
-        patient_id: int) -> VitalMedicalData:
-    start_shift = datetime.today() - timedelta(hours=9)
-
-    start_of_day = datetime.combine(start_shift, datetime.min.time())
+async def get_medical_data_by_patient_id_by_shift(
+        patient_id: int,
+        session: AsyncSession | None = None) -> VitalMedicalData:
+    start_of_day, end_of_day = get_shift_window()
 
-    end_of_day = datetime.today()
-
-    with get_session() as session:
+    async with read_session_scope(session) as session:
         statement = select(VitalMedicalData).where(
             VitalMedicalData.patient_id == patient_id).where(
             VitalMedicalData.time_stamp >= start_of_day,
             VitalMedicalData.time_stamp < end_of_day
         ).order_by(VitalMedicalData.time_stamp.desc())
 
-        results = session.exec(statement)
+        results = await session.exec(statement)
         return results.all()
 
 
-def get_latest_handoff(patient_id: int,
-                       nurse_id: int,
-                       model: str) -> Handoffs:
-    with get_session() as session:
+async def get_latest_handoff(patient_id: int,
+                             nurse_id: int,
+                             model: str | None,
+                             session: AsyncSession | None = None) -> Handoffs:
+    async with read_session_scope(session) as session:
         statement = select(Handoffs).where(
             Handoffs.patient_id == patient_id).where(
-            Handoffs.outgoing_nurse_id == nurse_id).where(
-            Handoffs.model == model).order_by(
+            Handoffs.outgoing_nurse_id == nurse_id)
+        # None takes the latest handoff of any model
+        if model is not None:
+            statement = statement.where(Handoffs.model == model)
+        statement = statement.order_by(Handoffs.created_at.desc())
+
+        results = await session.exec(statement)
+        return results.first()
+
+
+async def get_handoff_by_input_digest(
+        patient_id: int, input_digest: str,
+        session: AsyncSession | None = None) -> Handoffs | None:
+    async with read_session_scope(session) as session:
+        statement = select(Handoffs).where(
+            Handoffs.input_digest == input_digest).where(
+            Handoffs.patient_id == patient_id).order_by(
             Handoffs.created_at.desc())
 
-        results = session.exec(statement)
+        results = await session.exec(statement)
         return results.first()
 
 
-def get_patient_data(patient_id: int):
-    with (get_session() as session):
+async def get_medical_data_by_type_with_key(
+        data_type: str, key: str, patient_id: int | None = None,
+        session: AsyncSession | None = None) -> list[VitalMedicalData]:
+    async with read_session_scope(session) as session:
+        statement = select(VitalMedicalData).where(
+            VitalMedicalData.data_type == data_type).where(
+            VitalMedicalData.data_value.has_key(key))
+
+        if patient_id is not None:
+            statement = statement.where(
+                VitalMedicalData.patient_id == patient_id)
+
+        results = await session.exec(
+            statement.order_by(VitalMedicalData.time_stamp.desc()))
+        return results.all()
+
+
+async def get_medical_data_containing(
+        data_value: dict, patient_id: int | None = None,
+        session: AsyncSession | None = None) -> list[VitalMedicalData]:
+    async with read_session_scope(session) as session:
+        statement = select(VitalMedicalData).where(
+            VitalMedicalData.data_value.contains(data_value))
+
+        if patient_id is not None:
+            statement = statement.where(
+                VitalMedicalData.patient_id == patient_id)
+
+        results = await session.exec(
+            statement.order_by(VitalMedicalData.time_stamp.desc()))
+        return results.all()
+
+
+async def get_handoffs_containing(
+        report_text: dict, patient_id: int | None = None,
+        session: AsyncSession | None = None) -> list[Handoffs]:
+    async with read_session_scope(session) as session:
+        statement = select(Handoffs).where(
+            Handoffs.report_text.contains(report_text))
+
+        if patient_id is not None:
+            statement = statement.where(Handoffs.patient_id == patient_id)
+
+        results = await session.exec(
+            statement.order_by(Handoffs.created_at.desc()))
+        return results.all()
+
+
+async def get_handoffs_by_recommendation(
+        phrase: str, patient_id: int | None = None,
+        session: AsyncSession | None = None) -> list[Handoffs]:
+    async with read_session_scope(session) as session:
+        statement = select(Handoffs).where(
+            literal_column(RECOMMENDATION_SEARCH).op("@@")(
+                func.phraseto_tsquery(literal_column("'english'"), phrase)))
+
+        if patient_id is not None:
+            statement = statement.where(Handoffs.patient_id == patient_id)
+
+        results = await session.exec(
+            statement.order_by(Handoffs.created_at.desc()))
+        return results.all()
+
+
+async def get_patient_data(patient_id: int,
+                           session: AsyncSession | None = None):
+    async with read_session_scope(session) as session:
         statement = select(Patients).where(
             Patients.id == patient_id)
-        results = session.exec(statement)
+        results = await session.exec(statement)
         return results.first()
 
 
-def get_nurse_by_id(nurse_id: int) -> Nurses:
-    with get_session() as session:
+async def get_nurse_by_id(nurse_id: int,
+                          session: AsyncSession | None = None) -> Nurses:
+    async with read_session_scope(session) as session:
         statement = select(Nurses).where(Nurses.id == nurse_id)
-        results = session.exec(statement)
+        results = await session.exec(statement)
         return results.first()
 
 
-def service_create_patient(patient: PatientsBase) -> Patients:
+def encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(
+        json.dumps(values, default=str).encode()).decode()
+
+
+def decode_cursor(cursor: str, keyed_by_time: bool) -> tuple:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if keyed_by_time:
+            time_stamp, row_id = values
+            return datetime.fromisoformat(time_stamp), int(row_id)
+        row_id, = values
+        return int(row_id),
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def get_projection(model, fields: str | None, default_fields: list[str],
+                   required_fields: list[str]) -> list:
+    names = default_fields if fields is None else [
+        name.strip() for name in fields.split(",") if name.strip()]
+
+    columns = model.__table__.columns
+    unknown = [name for name in names if name not in columns]
+    if unknown:
+        raise HTTPException(status_code=400,
+                            detail=f"Unknown fields: {', '.join(unknown)}")
+
+    # The cursor is built from the sort columns, they are always returned
+    return [columns[name] for name in dict.fromkeys(required_fields + names)]
+
+
+async def get_page(model, criteria: list, fields: str | None,
+                   default_fields: list[str], limit: int, cursor: str | None,
+                   time_column=None,
+                   session: AsyncSession | None = None) -> CursorPage:
+    # Keyset pagination: the cursor holds the sort key of the last row and
+    # the next page starts right after it, so every page is an index range
+    # scan no matter how deep the client pages
+    if time_column is None:
+        required_fields = ["id"]
+        order_by = [model.id]
+        if cursor is not None:
+            row_id, = decode_cursor(cursor, keyed_by_time=False)
+            criteria = [*criteria, model.id > row_id]
+    else:
+        required_fields = [time_column.key, "id"]
+        order_by = [time_column.desc(), model.id.desc()]
+        if cursor is not None:
+            time_stamp, row_id = decode_cursor(cursor, keyed_by_time=True)
+            # The plain range lets Postgres use the time index and prune
+            # partitions, the row comparison breaks ties on id
+            criteria = [*criteria, time_column <= time_stamp,
+                        tuple_(time_column, model.id) < (time_stamp, row_id)]
+
+    # sqlalchemy's select keeps rows as rows even for a single column
+    statement = select_columns(
+        *get_projection(model, fields, default_fields, required_fields)
+    ).where(*criteria).order_by(*order_by).limit(limit + 1)
+
+    async with read_session_scope(session) as session:
+        rows = (await session.exec(statement)).mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(
+            [rows[-1][name] for name in required_fields])
+
+    return CursorPage(items=[dict(row) for row in rows],
+                      next_cursor=next_cursor)
+
+
+def get_time_range_criteria(column, start: datetime | None,
+                            end: datetime | None) -> list:
+    criteria = []
+    if start is not None:
+        criteria.append(column >= start)
+    if end is not None:
+        criteria.append(column < end)
+    return criteria
+
+
+async def get_patients_page(room_number: str | None = None,
+                            admitted: bool | None = None,
+                            fields: str | None = None,
+                            limit: int = DEFAULT_PAGE_SIZE,
+                            cursor: str | None = None,
+                            session: AsyncSession | None = None) -> CursorPage:
+    criteria = []
+    if room_number is not None:
+        criteria.append(Patients.room_number == room_number)
+    if admitted is not None:
+        criteria.append(Patients.discharge_date.is_(None) if admitted
+                        else Patients.discharge_date.is_not(None))
+
+    return await get_page(Patients, criteria, fields,
+                          list(Patients.__table__.columns.keys()), limit,
+                          cursor, session=session)
+
+
+async def get_vital_signs_page(patient_id: int,
+                               start: datetime | None = None,
+                               end: datetime | None = None,
+                               fields: str | None = None,
+                               limit: int = DEFAULT_PAGE_SIZE,
+                               cursor: str | None = None,
+                               session: AsyncSession | None = None) -> CursorPage:
+    criteria = [VitalSigns.patient_id == patient_id,
+                *get_time_range_criteria(VitalSigns.time_stamp, start, end)]
+
+    return await get_page(VitalSigns, criteria, fields,
+                          list(VitalSigns.__table__.columns.keys()), limit,
+                          cursor, VitalSigns.time_stamp, session)
+
+
+async def get_nurse_notes_page(patient_id: int,
+                               nurse_id: int | None = None,
+                               start: datetime | None = None,
+                               end: datetime | None = None,
+                               fields: str | None = None,
+                               limit: int = DEFAULT_PAGE_SIZE,
+                               cursor: str | None = None,
+                               session: AsyncSession | None = None) -> CursorPage:
+    criteria = [NurseNotes.patient_id == patient_id,
+                *get_time_range_criteria(NurseNotes.time_stamp, start, end)]
+    if nurse_id is not None:
+        criteria.append(NurseNotes.nurse_id == nurse_id)
+
+    return await get_page(NurseNotes, criteria, fields,
+                          list(NurseNotes.__table__.columns.keys()), limit,
+                          cursor, NurseNotes.time_stamp, session)
+
+
+async def get_handoffs_page(patient_id: int | None = None,
+                            outgoing_nurse_id: int | None = None,
+                            incoming_nurse_id: int | None = None,
+                            status: str | None = None,
+                            start: datetime | None = None,
+                            end: datetime | None = None,
+                            fields: str | None = None,
+                            limit: int = DEFAULT_PAGE_SIZE,
+                            cursor: str | None = None,
+                            session: AsyncSession | None = None) -> CursorPage:
+    criteria = get_time_range_criteria(Handoffs.created_at, start, end)
+    if patient_id is not None:
+        criteria.append(Handoffs.patient_id == patient_id)
+    if outgoing_nurse_id is not None:
+        criteria.append(Handoffs.outgoing_nurse_id == outgoing_nurse_id)
+    if incoming_nurse_id is not None:
+        criteria.append(Handoffs.incoming_nurse_id == incoming_nurse_id)
+    if status is not None:
+        criteria.append(Handoffs.status == status)
+
+    # The report is by far the largest column, listings only send it when
+    # it is asked for in fields
+    default_fields = [name for name in Handoffs.__table__.columns.keys()
+                      if name != "report_text"]
+
+    return await get_page(Handoffs, criteria, fields, default_fields, limit,
+                          cursor, Handoffs.created_at, session)
+
+
+def shift_rows_as_json(model, *criteria):
+    rows = select(model).where(
+        *criteria,
+        model.time_stamp >= bindparam("start_of_day"),
+        model.time_stamp < bindparam("end_of_day")
+    ).subquery()
+
+    return select(func.coalesce(
+        func.jsonb_agg(aggregate_order_by(rows.table_valued(),
+                                          rows.c.time_stamp.desc())),
+        text("'[]'::jsonb"), type_=JSONB)).scalar_subquery()
+
+
+def build_shift_context_statement():
+    # Patient, nurse and the three shift queries as scalar subqueries of one
+    # statement, one roundtrip instead of five. Nulls are stripped so the
+    # schema defaults apply to unset columns such as discharge_date.
+    patient = select(func.jsonb_strip_nulls(
+        func.to_jsonb(Patients.__table__.table_valued()),
+        type_=JSONB)).where(
+        Patients.id == bindparam("patient_id")).scalar_subquery()
+    nurse = select(func.jsonb_strip_nulls(
+        func.to_jsonb(Nurses.__table__.table_valued()),
+        type_=JSONB)).where(
+        Nurses.id == bindparam("nurse_id")).scalar_subquery()
+
+    # Past the threshold the hourly rollups stand in for the raw vital
+    # signs. Postgres only runs the subquery of the CASE branch taken.
+    readings = select(func.count().label("readings")).where(
+        VitalSigns.patient_id == bindparam("patient_id"),
+        VitalSigns.time_stamp >= bindparam("start_of_day"),
+        VitalSigns.time_stamp < bindparam("end_of_day")
+    ).subquery("shift_readings")
+    use_rollups = readings.c.readings > bindparam("rollup_threshold")
+    no_rows = literal_column("'[]'::jsonb", JSONB)
+
+    return select(
+        patient.label("patient"),
+        nurse.label("nurse"),
+        case((use_rollups, no_rows), else_=shift_rows_as_json(
+            VitalSigns,
+            VitalSigns.patient_id == bindparam("patient_id")
+        )).label("vital_signs"),
+        case((use_rollups, shift_rollups_as_json()),
+             else_=no_rows).label("vital_signs_hourly"),
+        shift_rows_as_json(
+            VitalMedicalData,
+            VitalMedicalData.patient_id == bindparam("patient_id")
+        ).label("medical_data"),
+        shift_rows_as_json(
+            NurseNotes,
+            NurseNotes.patient_id == bindparam("patient_id"),
+            NurseNotes.nurse_id == bindparam("nurse_id")
+        ).label("nurse_notes")).select_from(readings)
+
+
+# Built once, constructing the subqueries costs more than running them
+SHIFT_CONTEXT_STATEMENT = build_shift_context_statement()
+
+
+async def load_shift_context(patient_id: int, nurse_id: int,
+                             session: AsyncSession | None = None) -> ShiftContext:
+    start_of_day, end_of_day = get_shift_window()
+
+    async with read_session_scope(session) as session:
+        results = await session.exec(SHIFT_CONTEXT_STATEMENT, params={
+            "patient_id": patient_id,
+            "nurse_id": nurse_id,
+            "start_of_day": start_of_day,
+            "end_of_day": end_of_day,
+            "rollup_threshold": get_shift_rollup_threshold(),
+        })
+        return ShiftContext.model_validate(results.one()._asdict())
+
+
+async def service_create_patient(patient: PatientsBase,
+                                 session: AsyncSession | None = None) -> Patients:
     try:
         db_patients = Patients(
             first_name=patient.first_name,
@@ -141,99 +483,101 @@ def service_create_patient(patient: PatientsBase) -> Patients:
             admission_date=patient.admission_date,
         )
 
-        with get_session() as session:
+        async with session_scope(session) as session:
             session.add(db_patients)
-            session.commit()
-            session.refresh(db_patients)
+            await session.flush()
             return db_patients
     except IntegrityError:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=409,
                             detail="Patient already exists")
 
 
-def service_create_vital_signs(vital_signs: VitalSignsBase) -> VitalSigns:
-    patient = get_patient_by_id(vital_signs.patient_id)
-    if patient is None:
-        raise HTTPException(status_code=404, detail="Patient not found")
+async def service_create_vital_signs(vital_signs: VitalSignsBase,
+                                     session: AsyncSession | None = None) -> VitalSigns:
+    async with session_scope(session) as session:
+        patient = await get_patient_by_id(vital_signs.patient_id, session)
+        if patient is None:
+            raise HTTPException(status_code=404, detail="Patient not found")
+
+        try:
+            db_vital_sign = VitalSigns(
+                time_stamp=vital_signs.time_stamp,
+                blood_pressure_systolic=vital_signs.blood_pressure_systolic,
+                blood_pressure_diastolic=vital_signs.blood_pressure_diastolic,
+                heart_rate=vital_signs.heart_rate,
+                respiratory_rate=vital_signs.respiratory_rate,
+                oxygen_saturation=vital_signs.oxygen_saturation,
+                temperature=vital_signs.temperature,
+                source=vital_signs.source,
+                patient_id=patient.id
+            )
 
-    try:
-        db_vital_sign = VitalSigns(
-            time_stamp=vital_signs.time_stamp,
-            blood_pressure_systolic=vital_signs.blood_pressure_systolic,
-            blood_pressure_diastolic=vital_signs.blood_pressure_diastolic,
-            heart_rate=vital_signs.heart_rate,
-            respiratory_rate=vital_signs.respiratory_rate,
-            oxygen_saturation=vital_signs.oxygen_saturation,
-            temperature=vital_signs.temperature,
-            source=vital_signs.source,
-            patient_id=patient.id
-        )
-
-        with get_session() as session:
             session.add(db_vital_sign)
-            session.commit()
-            session.refresh(db_vital_sign)
+            await session.flush()
+            await record_vital_signs_rollups([db_vital_sign.model_dump()],
+                                             session)
             return db_vital_sign
-    except IntegrityError:
-        session.rollback()
-        raise HTTPException(status_code=409,
-                            detail="Error adding vital signs")
-
+        except IntegrityError:
+            await session.rollback()
+            raise HTTPException(status_code=409,
+                                detail="Error adding vital signs")
+
+
+async def service_create_vital_medical(
+        vital_medical: VitalMedicalDataBase,
+        session: AsyncSession | None = None) -> VitalMedicalData:
+    async with session_scope(session) as session:
+        patient = await get_patient_by_id(vital_medical.patient_id, session)
+        if patient is None:
+            raise HTTPException(status_code=404, detail="Patient not found")
+
+        try:
+            db_vital_medical = VitalMedicalData(
+                time_stamp=vital_medical.time_stamp,
+                data_type=vital_medical.data_type,
+                data_value=vital_medical.data_value,
+                source=vital_medical.source,
+                patient_id=patient.id
+            )
 
-def service_create_vital_medical(
-        vital_medical: VitalMedicalDataBase) -> VitalMedicalData:
-    patient = get_patient_by_id(vital_medical.patient_id)
-    if patient is None:
-        raise HTTPException(status_code=404, detail="Patient not found")
-
-    try:
-        db_vital_medical = VitalMedicalData(
-            time_stamp=vital_medical.time_stamp,
-            data_type=vital_medical.data_type,
-            data_value=vital_medical.data_value,
-            source=vital_medical.source,
-            patient_id=patient.id
-        )
-
-        with get_session() as session:
             session.add(db_vital_medical)
-            session.commit()
-            session.refresh(db_vital_medical)
+            await session.flush()
             return db_vital_medical
-    except IntegrityError:
-        session.rollback()
-        raise HTTPException(status_code=409,
-                            detail="Error adding vital medical")
-
-
-def service_create_nurse_note(
-        nurse_note: NurseNotesBase) -> NurseNotes:
-    patient = get_patient_by_id(nurse_note.patient_id)
-    if patient is None:
-        raise HTTPException(status_code=404, detail="Patient not found")
+        except IntegrityError:
+            await session.rollback()
+            raise HTTPException(status_code=409,
+                                detail="Error adding vital medical")
+
+
+async def service_create_nurse_note(
+        nurse_note: NurseNotesBase,
+        session: AsyncSession | None = None) -> NurseNotes:
+    async with session_scope(session) as session:
+        patient = await get_patient_by_id(nurse_note.patient_id, session)
+        if patient is None:
+            raise HTTPException(status_code=404, detail="Patient not found")
+
+        try:
+            db_nurse_notes = NurseNotes(
+                time_stamp=nurse_note.time_stamp,
+                note_text=nurse_note.note_text,
+                category=nurse_note.category,
+                patient_id=nurse_note.patient_id,
+                nurse_id=nurse_note.nurse_id
+            )
 
-    try:
-        db_nurse_notes = NurseNotes(
-            time_stamp=nurse_note.time_stamp,
-            note_text=nurse_note.note_text,
-            category=nurse_note.category,
-            patient_id=nurse_note.patient_id,
-            nurse_id=nurse_note.nurse_id
-        )
-
-        with get_session() as session:
             session.add(db_nurse_notes)
-            session.commit()
-            session.refresh(db_nurse_notes)
+            await session.flush()
             return db_nurse_notes
-    except IntegrityError:
-        session.rollback()
-        raise HTTPException(status_code=400,
-                            detail="Error adding nurse notes")
+        except IntegrityError:
+            await session.rollback()
+            raise HTTPException(status_code=400,
+                                detail="Error adding nurse notes")
 
 
-def service_create_nurse(nurse: NursesBase) -> Nurses:
+async def service_create_nurse(nurse: NursesBase,
+                               session: AsyncSession | None = None) -> Nurses:
     try:
         db_nurse = Nurses(
             first_name=nurse.first_name,
@@ -241,18 +585,18 @@ def service_create_nurse(nurse: NursesBase) -> Nurses:
             license_number=nurse.license_number
         )
 
-        with get_session() as session:
+        async with session_scope(session) as session:
             session.add(db_nurse)
-            session.commit()
-            session.refresh(db_nurse)
+            await session.flush()
             return db_nurse
     except IntegrityError:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=409,
                             detail="Nurse already exists")
 
 
-def service_create_handoffs(handoffs: HandoffsBase) -> Handoffs:
+async def service_create_handoffs(handoffs: HandoffsBase,
+                                  session: AsyncSession | None = None) -> Handoffs:
     try:
         db_handoffs = Handoffs(
             report_text=handoffs.report_text,
@@ -262,19 +606,132 @@ def service_create_handoffs(handoffs: HandoffsBase) -> Handoffs:
             incoming_nurse_id=handoffs.incoming_nurse_id
         )
 
-        with get_session() as session:
+        async with session_scope(session) as session:
             session.add(db_handoffs)
-            session.commit()
-            session.refresh(db_handoffs)
+            await session.flush()
             return db_handoffs
     except IntegrityError:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=400,
                             detail="Error in adding Handoffs")
 
 
+def parse_bulk_payload(body: bytes, content_type: str | None) -> list:
+    try:
+        if content_type and content_type.startswith("application/x-ndjson"):
+            rows = [json.loads(line) for line in body.splitlines()
+                    if line.strip()]
+        else:
+            rows = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400,
+                            detail=f"Malformed bulk payload: {e}")
+
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400,
+                            detail="Bulk payload must be a JSON array or NDJSON")
+    if len(rows) > MAX_BULK_ROWS:
+        raise HTTPException(status_code=413,
+                            detail=f"Bulk payload exceeds {MAX_BULK_ROWS} rows")
+    return rows
+
+
+async def get_existing_ids(model, ids: set[int],
+                           session: AsyncSession) -> set[int]:
+    if not ids:
+        return set()
+    statement = select(model.id).where(model.id.in_(ids))
+    return set((await session.exec(statement)).all())
+
+
+async def service_bulk_create(model, schema: type[BaseModel], rows: list,
+                              session: AsyncSession | None = None) -> BulkInsertResult:
+    statuses: list[BulkRowStatus | None] = [None] * len(rows)
+    validated = []
+
+    for index, row in enumerate(rows):
+        try:
+            validated.append((index, schema.model_validate(row)))
+        except ValidationError as e:
+            statuses[index] = BulkRowStatus(
+                index=index, status=BULK_STATUS_INVALID,
+                detail="; ".join(f"{'.'.join(map(str, error['loc']))}: "
+                                 f"{error['msg']}" for error in e.errors()))
+
+    try:
+        async with session_scope(session) as session:
+            # One set-based lookup per referenced table instead of one per
+            # row
+            patient_ids = await get_existing_ids(
+                Patients, {item.patient_id for _, item in validated}, session)
+            nurse_ids = await get_existing_ids(
+                Nurses, {item.nurse_id for _, item in validated
+                         if hasattr(item, "nurse_id")}, session)
+
+            accepted = []
+            for index, item in validated:
+                if item.patient_id not in patient_ids:
+                    statuses[index] = BulkRowStatus(
+                        index=index, status=BULK_STATUS_PATIENT_NOT_FOUND)
+                elif hasattr(item, "nurse_id") and \
+                        item.nurse_id not in nurse_ids:
+                    statuses[index] = BulkRowStatus(
+                        index=index, status=BULK_STATUS_NURSE_NOT_FOUND)
+                else:
+                    accepted.append((index, item))
+
+            if accepted:
+                # executemany over a single
+                # INSERT .. VALUES (..), (..) RETURNING
+                statement = insert(model).returning(
+                    model.id, sort_by_parameter_order=True)
+                params = [item.model_dump() for _, item in accepted]
+                for row in params:
+                    # The partition key cannot be NULL, same default as the
+                    # model
+                    if row["time_stamp"] is None:
+                        row["time_stamp"] = datetime.now()
+                results = await session.exec(statement, params=params)
+
+                for (index, _), row_id in zip(accepted, results.scalars()):
+                    statuses[index] = BulkRowStatus(
+                        index=index, status=BULK_STATUS_CREATED, id=row_id)
+
+                if model is VitalSigns:
+                    await record_vital_signs_rollups(params, session)
+    except IntegrityError:
+        # A patient or nurse removed after the lookup above
+        await session.rollback()
+        raise HTTPException(status_code=409,
+                            detail="Rows reference missing records")
+
+    return BulkInsertResult(
+        created=len(accepted),
+        failed=len(rows) - len(accepted),
+        rows=statuses
+    )
+
+
+async def service_bulk_create_vital_signs(
+        rows: list, session: AsyncSession | None = None) -> BulkInsertResult:
+    return await service_bulk_create(VitalSigns, VitalSignsBase, rows,
+                                     session)
+
+
+async def service_bulk_create_vital_medical(
+        rows: list, session: AsyncSession | None = None) -> BulkInsertResult:
+    return await service_bulk_create(VitalMedicalData, VitalMedicalDataBase,
+                                     rows, session)
+
+
+async def service_bulk_create_nurse_notes(
+        rows: list, session: AsyncSession | None = None) -> BulkInsertResult:
+    return await service_bulk_create(NurseNotes, NurseNotesBase, rows,
+                                     session)
+
+
 def main():
-    vital_signs = get_patient_data(1);
+    vital_signs = asyncio.run(get_patient_data(1))
 
     # handoff = get_latest_handoff(1, 1)
 
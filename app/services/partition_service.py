@@ -0,0 +1,159 @@
+import asyncio
+import re
+from datetime import date, datetime, time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.database import async_engine
+from app.models.nurses import PARTITIONED_MODELS
+from app.utility.constant import PARTITION_MAINTENANCE_LOCK_ID
+from app.utility.env import get_partition_months_ahead, \
+    get_partition_retention_months
+from app.utility.logger import get_logger
+
+logger = get_logger()
+
+PARTITION_NAME = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def get_partition_name(table_name: str, month: date) -> str:
+    return f"{table_name}_p{month:%Y_%m}"
+
+
+async def get_partitions(connection: AsyncConnection,
+                         table_name: str) -> dict[str, date]:
+    statement = text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = CAST(:table_name AS regclass)")
+    partitions = {}
+    for name in (await connection.execute(
+            statement, {"table_name": table_name})).scalars():
+        match = PARTITION_NAME.search(name)
+        if match:
+            partitions[name] = date(int(match[1]), int(match[2]), 1)
+    return partitions
+
+
+async def get_default_partition_months(connection: AsyncConnection,
+                                       table_name: str) -> set[date]:
+    statement = text(
+        "SELECT DISTINCT CAST(date_trunc('month', time_stamp) AS date) "
+        f"FROM {table_name}_default")
+    return set((await connection.execute(statement)).scalars())
+
+
+async def create_partition(connection: AsyncConnection, table_name: str,
+                           month: date):
+    name = get_partition_name(table_name, month)
+    lower, upper = month, add_months(month, 1)
+
+    # Rows of this month that already landed in the default partition have
+    # to move first, ATTACH fails while the default still holds any of them
+    await connection.execute(text(
+        f"CREATE TABLE {name} "
+        f"(LIKE {table_name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    await connection.execute(text(
+        f"WITH moved AS (DELETE FROM {table_name}_default "
+        f"WHERE time_stamp >= :lower AND time_stamp < :upper RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"),
+        {"lower": datetime.combine(lower, time.min),
+         "upper": datetime.combine(upper, time.min)})
+    await connection.execute(text(
+        f"ALTER TABLE {table_name} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{lower}') TO ('{upper}')"))
+
+
+async def detach_partition(connection: AsyncConnection, table_name: str,
+                           name: str):
+    # Detached partitions stay behind as plain tables to archive or drop
+    await connection.execute(text(
+        f"ALTER TABLE {table_name} DETACH PARTITION {name}"))
+
+
+async def maintain_partitions(months_ahead: int | None = None,
+                              retention_months: int | None = None) -> dict:
+    if months_ahead is None:
+        months_ahead = get_partition_months_ahead()
+    if retention_months is None:
+        retention_months = get_partition_retention_months()
+
+    current_month = date.today().replace(day=1)
+    cutoff = add_months(current_month, -retention_months) \
+        if retention_months else date.min
+    created, detached = [], []
+
+    for model in PARTITIONED_MODELS:
+        table_name = model.__tablename__
+        async with async_engine.begin() as connection:
+            partitions = await get_partitions(connection, table_name)
+            months = await get_default_partition_months(connection,
+                                                        table_name)
+
+        months.update(add_months(current_month, offset)
+                      for offset in range(months_ahead + 1))
+        for month in sorted(months):
+            name = get_partition_name(table_name, month)
+            if name in partitions or month < cutoff:
+                continue
+            # One transaction per partition so one failure does not hold
+            # back the rest
+            try:
+                async with async_engine.begin() as connection:
+                    await create_partition(connection, table_name, month)
+                created.append(name)
+            except Exception as e:
+                logger.error(f"Creating partition {name} failed: {e}")
+
+        for name, month in sorted(partitions.items()):
+            if month >= cutoff:
+                continue
+            try:
+                async with async_engine.begin() as connection:
+                    await detach_partition(connection, table_name, name)
+                detached.append(name)
+            except Exception as e:
+                logger.error(f"Detaching partition {name} failed: {e}")
+
+    if created or detached:
+        logger.info(f"Partition maintenance created {created}, "
+                    f"detached {detached}")
+    return {"created": created, "detached": detached}
+
+
+async def service_maintain_partitions(
+        months_ahead: int | None = None,
+        retention_months: int | None = None) -> dict:
+    # Every web worker runs this loop. The session level advisory lock lets
+    # one of them do the work, the others skip this round instead of racing
+    # on the same CREATE, ATTACH and DETACH.
+    async with async_engine.connect() as lock_connection:
+        is_locked = (await lock_connection.execute(
+            text("SELECT pg_try_advisory_lock(:lock_id)"),
+            {"lock_id": PARTITION_MAINTENANCE_LOCK_ID})).scalar()
+        await lock_connection.commit()
+        if not is_locked:
+            return {"created": [], "detached": [], "skipped": True}
+
+        try:
+            return await maintain_partitions(months_ahead, retention_months)
+        finally:
+            await lock_connection.execute(
+                text("SELECT pg_advisory_unlock(:lock_id)"),
+                {"lock_id": PARTITION_MAINTENANCE_LOCK_ID})
+            await lock_connection.commit()
+
+
+async def run_partition_maintenance(interval_seconds: int):
+    while True:
+        try:
+            await service_maintain_partitions()
+        except Exception as e:
+            logger.error(f"Partition maintenance failed: {e}")
+        await asyncio.sleep(interval_seconds)
@@ -1,8 +1,14 @@
+import asyncio
+
 from fastapi import HTTPException
 from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database import get_session
+from app.database import session_scope, read_session_scope, \
+    on_commit
 from app.models.user import Roles, Permissions
+from app.services.authorization_service import \
+    invalidate_permission_index
 from app.schemas.permissions import PermissionBase
 from passlib.context import CryptContext
 from sqlalchemy.exc import IntegrityError
@@ -10,68 +16,72 @@ from sqlalchemy.exc import IntegrityError
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-def service_get_permission_by_id(permission_id: int):
-    with get_session() as session:
+async def service_get_permission_by_id(permission_id: int,
+                                       session: AsyncSession | None = None):
+    async with read_session_scope(session) as session:
         statement = select(Permissions).where(Permissions.id == permission_id)
-        results = session.exec(statement)
+        results = await session.exec(statement)
         return results.first()
 
 
-def service_get_permission_by_name(permission_name: str):
-    with get_session() as session:
+async def service_get_permission_by_name(permission_name: str,
+                                         session: AsyncSession | None = None):
+    async with read_session_scope(session) as session:
         statement = select(Permissions).where(
             Permissions.permission_name == permission_name)
-        results = session.exec(statement)
+        results = await session.exec(statement)
         return results.first()
 
 
-def service_create_permission(permission: PermissionBase) -> Permissions:
+async def service_create_permission(permission: PermissionBase,
+                                    session: AsyncSession | None = None) -> Permissions:
     try:
         db_permission = Permissions(
             permission_name=permission.permission_name,
             descriptions=permission.descriptions
         )
 
-        with get_session() as session:
+        async with session_scope(session) as session:
             session.add(db_permission)
-            session.commit()
-            session.refresh(db_permission)
+            await session.flush()
+            on_commit(session, invalidate_permission_index)
             return db_permission
     except IntegrityError:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=409,
                             detail="Permission already exists")
 
 
-def service_delete_permission(permission_id: int):
-    with get_session() as session:
-        permission = session.get(Permissions, permission_id)
-        session.delete(permission)
-        session.commit()
+async def service_delete_permission(permission_id: int,
+                                    session: AsyncSession | None = None):
+    async with session_scope(session) as session:
+        permission = await session.get(Permissions, permission_id)
+        await session.delete(permission)
+        await session.flush()
+        on_commit(session, invalidate_permission_index)
         return permission
 
 
-def service_update_permission(permission_id: int,
-                              permission: PermissionBase) -> Permissions:
+async def service_update_permission(permission_id: int,
+                                    permission: PermissionBase,
+                                    session: AsyncSession | None = None) -> Permissions:
     try:
-        with get_session() as session:
-            db_permission = session.get(Roles, permission_id)
-        if db_permission is None:
-            raise HTTPException(status_code=404,
-                                detail="Permission not found")
+        async with session_scope(session) as session:
+            db_permission = await session.get(Permissions, permission_id)
+            if db_permission is None:
+                raise HTTPException(status_code=404,
+                                    detail="Permission not found")
 
-        user_data = permission.model_dump(exclude_unset=True)
-        for key, value in user_data.items():
-            setattr(db_permission, key, value)
+            user_data = permission.model_dump(exclude_unset=True)
+            for key, value in user_data.items():
+                setattr(db_permission, key, value)
 
-        with get_session() as session:
             session.add(db_permission)
-            session.commit()
-            session.refresh(db_permission)
-
-        return db_permission
+            await session.flush()
+            on_commit(session, invalidate_permission_index)
+            return db_permission
     except IntegrityError:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=409,
                             detail="Permission already exists")
 
@@ -81,7 +91,7 @@ def main():
         permission_name="api_manage_users",
         descriptions="Grants the ability to create, update, or delete user accounts via the API"
     )
-    print(service_create_permission(p))
+    print(asyncio.run(service_create_permission(p)))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,92 @@
+import asyncio
+
+import httpx
+from fastapi import HTTPException
+from google import genai
+from groq import AsyncGroq
+from openai import AsyncOpenAI
+
+from app.utility.constant import CHAT_GPT, GEMINI, GROQ, XAI, XAI_BASEURL
+from app.utility.env import get_open_ai_key, get_gemini_key, get_groq_key, \
+    get_xai_key, get_open_ai_model, get_gemini_model, get_groq_model, \
+    get_xai_model, get_llm_max_connections, \
+    get_llm_max_keepalive_connections, get_llm_timeout_seconds, \
+    get_llm_connect_timeout_seconds
+from app.utility.logger import get_logger
+
+logger = get_logger()
+
+PROVIDER_KEYS = {
+    CHAT_GPT: get_open_ai_key,
+    GEMINI: get_gemini_key,
+    GROQ: get_groq_key,
+    XAI: get_xai_key,
+}
+
+PROVIDER_MODELS = {
+    CHAT_GPT: get_open_ai_model,
+    GEMINI: get_gemini_model,
+    GROQ: get_groq_model,
+    XAI: get_xai_model,
+}
+
+
+def create_http_client() -> httpx.AsyncClient:
+    # One pool per provider, a provider that hangs cannot starve the others
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=get_llm_max_connections(),
+            max_keepalive_connections=get_llm_max_keepalive_connections()),
+        timeout=httpx.Timeout(get_llm_timeout_seconds(),
+                              connect=get_llm_connect_timeout_seconds()),
+        follow_redirects=True)
+
+
+def create_client(provider: str, api_key: str):
+    if provider == CHAT_GPT:
+        return AsyncOpenAI(api_key=api_key, http_client=create_http_client())
+    elif provider == XAI:
+        return AsyncOpenAI(api_key=api_key, base_url=XAI_BASEURL,
+                           http_client=create_http_client())
+    elif provider == GROQ:
+        return AsyncGroq(api_key=api_key, http_client=create_http_client())
+    elif provider == GEMINI:
+        # google-genai opens its own httpx client per request, only the
+        # timeout (in milliseconds) can be set here. Concurrency is capped
+        # with gemini_connections instead of a pool limit.
+        return genai.Client(api_key=api_key, http_options={
+            "timeout": get_llm_timeout_seconds() * 1000})
+    raise ValueError(f"Unknown provider {provider}")
+
+
+class ProviderRegistry:
+    def __init__(self):
+        self.clients: dict = {}
+        self.gemini_connections = asyncio.Semaphore(get_llm_max_connections())
+
+    def get(self, provider: str):
+        client = self.clients.get(provider)
+        if client is None:
+            api_key = PROVIDER_KEYS[provider]()
+            if not api_key:
+                raise HTTPException(status_code=503,
+                                    detail=f"Model {provider} is not configured")
+            client = self.clients[provider] = create_client(provider, api_key)
+        return client
+
+    def start(self):
+        # Clients of configured providers are created up front, the rest on
+        # first use
+        for provider, get_api_key in PROVIDER_KEYS.items():
+            if get_api_key():
+                self.get(provider)
+        logger.info(f"LLM clients ready for {list(self.clients)}")
+
+    async def close(self):
+        for provider, client in self.clients.items():
+            if provider != GEMINI:
+                await client.close()
+        self.clients.clear()
+
+
+provider_registry = ProviderRegistry()
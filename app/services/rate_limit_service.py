@@ -0,0 +1,127 @@
+import asyncio
+import time
+from collections import deque
+
+import logfire
+
+from app.utility.constant import CHAT_GPT, GEMINI, GROQ, XAI
+from app.utility.env import get_open_ai_requests_per_minute, \
+    get_open_ai_tokens_per_minute, get_gemini_requests_per_minute, \
+    get_gemini_tokens_per_minute, get_groq_requests_per_minute, \
+    get_groq_tokens_per_minute, get_xai_requests_per_minute, \
+    get_xai_tokens_per_minute
+from app.utility.others import get_latency_snapshot
+
+wait_time_histogram = logfire.metric_histogram(
+    "llm.rate_limit.wait_time", unit="ms",
+    description="Time spent waiting for the provider rate limit")
+waiting_gauge = logfire.metric_gauge(
+    "llm.rate_limit.waiting", unit="1",
+    description="Calls queued behind the provider rate limit")
+tokens_counter = logfire.metric_counter(
+    "llm.rate_limit.tokens", unit="1",
+    description="Tokens charged against the provider rate limit")
+
+
+class TokenBucket:
+    def __init__(self, per_minute: int):
+        # 0 disables the bucket
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity,
+                         self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        if not self.capacity:
+            return 0.0
+        self.refill()
+        # A call larger than the whole bucket waits for a full bucket
+        missing = min(amount, self.capacity) - self.level
+        return max(missing, 0) / self.rate
+
+    def take(self, amount: float):
+        if self.capacity:
+            self.refill()
+            # May go negative when a call used more than it reserved, the
+            # next callers then wait until the debt is paid back
+            self.level -= amount
+
+
+class ProviderRateLimiter:
+    def __init__(self, provider: str, requests_per_minute: int,
+                 tokens_per_minute: int, samples: int = 1000):
+        self.provider = provider
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        # asyncio.Lock wakes waiters in arrival order, the head of the queue
+        # holds it while it sleeps so later callers cannot overtake it
+        self._lock = asyncio.Lock()
+        self.waiting = 0
+        self.calls = 0
+        self.wait_times = deque(maxlen=samples)
+
+    async def acquire(self, estimated_tokens: int) -> float:
+        attributes = {"provider": self.provider}
+        start_time = time.perf_counter()
+        self.waiting += 1
+        waiting_gauge.set(self.waiting, attributes)
+        try:
+            async with self._lock:
+                while True:
+                    wait_time = max(self.requests.wait_time(1),
+                                    self.tokens.wait_time(estimated_tokens))
+                    if wait_time <= 0:
+                        break
+                    await asyncio.sleep(wait_time)
+                self.requests.take(1)
+                self.tokens.take(estimated_tokens)
+        finally:
+            self.waiting -= 1
+            waiting_gauge.set(self.waiting, attributes)
+
+        wait_time = time.perf_counter() - start_time
+        self.calls += 1
+        self.wait_times.append(wait_time)
+        wait_time_histogram.record(wait_time * 1000, attributes)
+        return wait_time
+
+    def settle(self, estimated_tokens: int, used_tokens: int):
+        # Replaces the estimate taken in acquire with what the provider
+        # reported, a failed call gives its tokens back
+        self.tokens.take(used_tokens - estimated_tokens)
+        tokens_counter.add(used_tokens, {"provider": self.provider})
+
+    def snapshot(self) -> dict:
+        wait_times = list(self.wait_times)
+        snapshot = {
+            "provider": self.provider,
+            "requests_per_minute": self.requests.capacity,
+            "tokens_per_minute": self.tokens.capacity,
+            "waiting": self.waiting,
+            "calls": self.calls,
+        }
+        if wait_times:
+            snapshot["wait_time_ms"] = get_latency_snapshot(wait_times)
+        return snapshot
+
+
+rate_limiters = {
+    CHAT_GPT: ProviderRateLimiter(CHAT_GPT, get_open_ai_requests_per_minute(),
+                                  get_open_ai_tokens_per_minute()),
+    GEMINI: ProviderRateLimiter(GEMINI, get_gemini_requests_per_minute(),
+                                get_gemini_tokens_per_minute()),
+    GROQ: ProviderRateLimiter(GROQ, get_groq_requests_per_minute(),
+                              get_groq_tokens_per_minute()),
+    XAI: ProviderRateLimiter(XAI, get_xai_requests_per_minute(),
+                             get_xai_tokens_per_minute()),
+}
+
+
+def get_rate_limit_metrics() -> list[dict]:
+    return [limiter.snapshot() for limiter in rate_limiters.values()]
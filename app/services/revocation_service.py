@@ -0,0 +1,112 @@
+import asyncio
+import time
+from datetime import datetime
+from functools import partial
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select, update, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import get_async_session, session_scope, on_commit
+from app.models import APIKeys, RevokedAPIKeys
+from app.utility.logger import get_logger
+
+logger = get_logger()
+
+# Ids are handed out before commit, re-read a few behind the high-water mark
+# so a revocation committed out of order is not skipped
+REVOCATION_FEED_OVERLAP = 100
+
+
+class RevocationSet:
+    def __init__(self):
+        self._revoked: dict[str, float] = {}
+        self.last_seen_id = 0
+
+    def add(self, api_key_digest: str, expires_at: float):
+        self._revoked[api_key_digest] = expires_at
+
+    def prune(self):
+        now = time.time()
+        self._revoked = {digest: expires_at
+                         for digest, expires_at in self._revoked.items()
+                         if expires_at > now}
+
+    def __contains__(self, api_key_digest: str) -> bool:
+        return api_key_digest in self._revoked
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+
+revocations = RevocationSet()
+
+
+async def service_revoke_api_keys(*criteria,
+                                  session: AsyncSession | None = None) -> int:
+    async with session_scope(session) as session:
+        statement = update(APIKeys).where(
+            APIKeys.is_active == True, *criteria).values(
+            is_active=False).returning(
+            APIKeys.api_key_digest, APIKeys.expires_at)
+
+        revoked = [(api_key_digest, expires_at)
+                   for api_key_digest, expires_at in
+                   (await session.exec(statement)).all()
+                   if api_key_digest is not None and expires_at is not None]
+
+        if revoked:
+            statement = insert(RevokedAPIKeys).values([
+                {"api_key_digest": api_key_digest, "expires_at": expires_at}
+                for api_key_digest, expires_at in revoked
+            ]).on_conflict_do_nothing(index_elements=["api_key_digest"])
+            await session.exec(statement)
+
+        for api_key_digest, expires_at in revoked:
+            on_commit(session, partial(revocations.add, api_key_digest,
+                                       expires_at.timestamp()))
+
+    return len(revoked)
+
+
+async def refresh_revocations() -> int:
+    async with get_async_session() as session:
+        statement = select(RevokedAPIKeys.id, RevokedAPIKeys.api_key_digest,
+                           RevokedAPIKeys.expires_at).where(
+            RevokedAPIKeys.id > revocations.last_seen_id -
+            REVOCATION_FEED_OVERLAP).where(
+            RevokedAPIKeys.expires_at > datetime.now()).order_by(
+            RevokedAPIKeys.id)
+
+        results = (await session.exec(statement)).all()
+
+    for revocation_id, api_key_digest, expires_at in results:
+        revocations.add(api_key_digest, expires_at.timestamp())
+        revocations.last_seen_id = max(revocations.last_seen_id,
+                                       revocation_id)
+    revocations.prune()
+    return len(results)
+
+
+async def service_compact_revocations() -> int:
+    async with get_async_session() as session:
+        statement = delete(RevokedAPIKeys).where(
+            RevokedAPIKeys.expires_at < datetime.now())
+
+        results = await session.exec(statement)
+        await session.commit()
+
+    return results.rowcount
+
+
+async def run_revocation_feed(interval_seconds: int):
+    while True:
+        try:
+            await refresh_revocations()
+        except Exception as e:
+            logger.error(f"Revocation feed refresh failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+def is_revoked(api_key_digest: str) -> bool:
+    return api_key_digest in revocations
@@ -0,0 +1,140 @@
+from datetime import datetime
+
+from sqlalchemy import Numeric, bindparam, case, cast, func, literal_column, \
+    select as select_columns
+from sqlalchemy.dialects.postgresql import JSONB, aggregate_order_by, insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import read_session_scope
+from app.models.nurses import VitalSignsHourly, VITAL_SIGN_FIELDS
+from app.schemas.nurses import VitalSignsHourlySummary
+
+
+def get_hour(time_stamp: datetime) -> datetime:
+    # The timestamp codec drops the offset of aware datetimes, the hour is
+    # taken from the same wall clock time that ends up in time_stamp
+    return time_stamp.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+
+
+def aggregate_vital_signs(rows: list[dict]) -> list[dict]:
+    hours = {}
+    for row in rows:
+        time_stamp = row["time_stamp"].replace(tzinfo=None)
+        key = (row["patient_id"], get_hour(time_stamp))
+
+        hour = hours.get(key)
+        if hour is None:
+            hour = hours[key] = {"patient_id": key[0], "hour": key[1],
+                                 "readings": 0, "last_time_stamp": time_stamp}
+            for field in VITAL_SIGN_FIELDS:
+                hour.update({f"{field}_min": row[field],
+                             f"{field}_max": row[field],
+                             f"{field}_sum": 0,
+                             f"{field}_last": row[field]})
+
+        is_latest = time_stamp >= hour["last_time_stamp"]
+        hour["readings"] += 1
+        if is_latest:
+            hour["last_time_stamp"] = time_stamp
+        for field in VITAL_SIGN_FIELDS:
+            value = row[field]
+            hour[f"{field}_min"] = min(hour[f"{field}_min"], value)
+            hour[f"{field}_max"] = max(hour[f"{field}_max"], value)
+            hour[f"{field}_sum"] += value
+            if is_latest:
+                hour[f"{field}_last"] = value
+
+    # Upserted in key order, concurrent batches lock shared hours in the
+    # same order and cannot deadlock
+    return [hours[key] for key in sorted(hours)]
+
+
+def build_rollup_upsert_statement():
+    table = VitalSignsHourly.__table__
+    statement = insert(table)
+    excluded = statement.excluded
+    # SET expressions see the stored row, not the one being merged in
+    is_latest = excluded.last_time_stamp >= table.c.last_time_stamp
+
+    updates = {
+        "readings": table.c.readings + excluded.readings,
+        "last_time_stamp": func.greatest(table.c.last_time_stamp,
+                                         excluded.last_time_stamp),
+    }
+    for field in VITAL_SIGN_FIELDS:
+        updates.update({
+            f"{field}_min": func.least(table.c[f"{field}_min"],
+                                       excluded[f"{field}_min"]),
+            f"{field}_max": func.greatest(table.c[f"{field}_max"],
+                                          excluded[f"{field}_max"]),
+            f"{field}_sum": table.c[f"{field}_sum"] + excluded[f"{field}_sum"],
+            f"{field}_last": case((is_latest, excluded[f"{field}_last"]),
+                                  else_=table.c[f"{field}_last"]),
+        })
+
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.patient_id, table.c.hour], set_=updates)
+
+
+def build_rollup_columns() -> list:
+    table = VitalSignsHourly.__table__
+    columns = [table.c.patient_id, table.c.hour, table.c.readings,
+               table.c.last_time_stamp]
+    for field in VITAL_SIGN_FIELDS:
+        columns += [
+            table.c[f"{field}_min"],
+            table.c[f"{field}_max"],
+            func.round(cast(table.c[f"{field}_sum"], Numeric)
+                       / table.c.readings, 2).label(f"{field}_mean"),
+            table.c[f"{field}_last"],
+        ]
+    return columns
+
+
+ROLLUP_UPSERT_STATEMENT = build_rollup_upsert_statement()
+ROLLUP_COLUMNS = build_rollup_columns()
+
+
+async def record_vital_signs_rollups(rows: list[dict],
+                                     session: AsyncSession):
+    # Runs in the transaction of the insert, the rollups never disagree with
+    # the committed readings
+    hours = aggregate_vital_signs(rows)
+    if hours:
+        await session.exec(ROLLUP_UPSERT_STATEMENT, params=hours)
+
+
+async def get_vital_signs_rollups(
+        patient_id: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        session: AsyncSession | None = None) -> list[VitalSignsHourlySummary]:
+    criteria = [VitalSignsHourly.patient_id == patient_id]
+    if start is not None:
+        # The hour holding start is included
+        criteria.append(VitalSignsHourly.hour >= get_hour(start))
+    if end is not None:
+        criteria.append(VitalSignsHourly.hour < end)
+
+    statement = select_columns(*ROLLUP_COLUMNS).where(*criteria).order_by(
+        VitalSignsHourly.hour)
+
+    async with read_session_scope(session) as session:
+        results = await session.exec(statement)
+        return [VitalSignsHourlySummary.model_validate(row._asdict())
+                for row in results]
+
+
+def shift_rollups_as_json():
+    # Same bind parameters as the raw rows in the shift context statement
+    rows = select_columns(*ROLLUP_COLUMNS).where(
+        VitalSignsHourly.patient_id == bindparam("patient_id"),
+        VitalSignsHourly.hour >= bindparam("start_of_day"),
+        VitalSignsHourly.hour < bindparam("end_of_day")
+    ).subquery()
+
+    return select(func.coalesce(
+        func.jsonb_agg(aggregate_order_by(rows.table_valued(),
+                                          rows.c.hour)),
+        literal_column("'[]'::jsonb"), type_=JSONB)).scalar_subquery()
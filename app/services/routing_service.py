@@ -0,0 +1,172 @@
+import asyncio
+import random
+from collections import deque
+from typing import Awaitable, Callable
+
+import logfire
+from fastapi import HTTPException
+
+from app.services.provider_service import PROVIDER_KEYS
+from app.utility.constant import PRICE_PER_TOKEN
+from app.utility.env import get_routing_window_size, \
+    get_routing_max_error_rate, get_routing_min_samples, \
+    get_routing_probe_share, get_sbar_hedge_percentile, \
+    get_sbar_hedge_after_seconds
+from app.utility.logger import get_logger
+from app.utility.others import get_latency_snapshot, get_percentile
+
+logger = get_logger()
+
+latency_histogram = logfire.metric_histogram(
+    "llm.latency", unit="ms",
+    description="Time from the rate limiter to a parsed SBAR per provider")
+outcome_counter = logfire.metric_counter(
+    "llm.outcomes", unit="1",
+    description="Provider calls by outcome, ok or error")
+
+
+class ProviderStats:
+    def __init__(self, provider: str, window_size: int):
+        self.provider = provider
+        self.latencies = deque(maxlen=window_size)
+        self.outcomes = deque(maxlen=window_size)
+
+    def record(self, latency: float, ok: bool | None):
+        # A call cancelled by a faster hedge only proves the provider was at
+        # least this slow, its latency counts but not its outcome
+        self.latencies.append(latency)
+        latency_histogram.record(latency * 1000, {"provider": self.provider})
+        if ok is not None:
+            self.outcomes.append(ok)
+            outcome_counter.add(1, {"provider": self.provider,
+                                    "outcome": "ok" if ok else "error"})
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def latency(self, percentile: float) -> float | None:
+        if len(self.latencies) < get_routing_min_samples():
+            return None
+        return get_percentile(list(self.latencies), percentile)
+
+    def snapshot(self) -> dict:
+        snapshot = {
+            "provider": self.provider,
+            "samples": len(self.latencies),
+            "error_rate": round(self.error_rate, 3),
+        }
+        if self.latencies:
+            snapshot["latency_ms"] = get_latency_snapshot(
+                list(self.latencies))
+        return snapshot
+
+
+class ProviderRouter:
+    def __init__(self, window_size: int):
+        self.stats = {provider: ProviderStats(provider, window_size)
+                      for provider in PROVIDER_KEYS}
+
+    def record(self, provider: str, latency: float, ok: bool | None):
+        self.stats[provider].record(latency, ok)
+
+    def is_failing(self, provider: str) -> bool:
+        return self.stats[provider].error_rate > get_routing_max_error_rate()
+
+    def is_measured(self, provider: str) -> bool:
+        return self.stats[provider].latency(50) is not None
+
+    def score(self, provider: str) -> tuple:
+        stats = self.stats[provider]
+        # Measured providers by latency, the others after them cheapest
+        # first, failing ones go last whatever their latency
+        median = stats.latency(50)
+        if median is None:
+            return self.is_failing(provider), True, PRICE_PER_TOKEN[provider]
+        return (self.is_failing(provider), False,
+                median / max(1 - stats.error_rate, 0.05))
+
+    def rank(self) -> list[str]:
+        providers = [provider for provider, get_api_key in
+                     PROVIDER_KEYS.items() if get_api_key()]
+        if not providers:
+            raise HTTPException(status_code=503,
+                                detail="No model is configured")
+        ranked = sorted(providers, key=self.score)
+
+        # A small share of the requests goes to the cheapest unmeasured
+        # provider first, otherwise it would only be measured by hedges
+        unmeasured = [provider for provider in ranked
+                      if not self.is_measured(provider)
+                      and not self.is_failing(provider)]
+        if unmeasured and unmeasured[0] != ranked[0] and \
+                random.random() < get_routing_probe_share():
+            ranked.remove(unmeasured[0])
+            ranked.insert(0, unmeasured[0])
+        return ranked
+
+    def hedge_deadline(self, provider: str) -> float | None:
+        # None when hedging is off
+        percentile = get_sbar_hedge_percentile()
+        if not percentile:
+            return None
+        latency = self.stats[provider].latency(percentile)
+        if latency is None:
+            return get_sbar_hedge_after_seconds()
+        return latency
+
+    async def request(self, request: Callable[[str], Awaitable]
+                      ) -> tuple[str, object, bool]:
+        # request(provider) calls one provider and raises unless it got a
+        # valid result. Starts with the best ranked provider. Once it passes
+        # its hedge deadline the next one is asked as well and the first
+        # valid result wins, a failure moves on to the next provider right
+        # away. Returns the provider, its result and whether it was hedged.
+        providers = self.rank()
+        pending = {}
+        hedged = False
+
+        def start_next():
+            provider = providers.pop(0)
+            pending[asyncio.create_task(request(provider))] = provider
+            return provider
+
+        deadline = self.hedge_deadline(start_next())
+        try:
+            while pending:
+                timeout = deadline if providers and not hedged else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    logger.info(f"Hedging request to {providers[0]} after "
+                                f"{deadline:.2f}s")
+                    start_next()
+                    hedged = True
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        return provider, task.result(), hedged
+                    logger.warning(f"Request to {provider} failed: "
+                                   f"{task.exception()}")
+
+                if not pending and providers:
+                    deadline = self.hedge_deadline(start_next())
+
+            raise HTTPException(status_code=502,
+                                detail="No model returned a valid SBAR")
+        finally:
+            # The slower request of a hedged pair is not needed anymore
+            for task in pending:
+                task.cancel()
+
+    def snapshot(self) -> list[dict]:
+        return [stats.snapshot() for stats in self.stats.values()]
+
+
+provider_router = ProviderRouter(get_routing_window_size())
@@ -1,46 +1,61 @@
+import asyncio
+from functools import partial
+
 from fastapi import HTTPException
 from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database import get_session
-from app.models import User, UserProfile
+from app.database import session_scope, read_session_scope, \
+    on_commit
+from app.models import User, UserProfile, APIKeys
 from app.models.user import Roles, Permissions, RolePermissions, UserRoles
 from app.schemas.role_permission import RolePermission
 from app.schemas.user import UserCreate, UserUpdate, \
     UserCreateRolePermission
-from passlib.context import CryptContext
 from sqlalchemy.exc import IntegrityError
 
 from app.schemas.user_profile import UserProfileBase
 from app.schemas.user_roles import UserRole
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.services.authorization_service import \
+    invalidate_permission_index
+from app.services.revocation_service import service_revoke_api_keys
+from app.utility.password import get_password_hash
+from app.utility.token_cache import invalidate_user
 
 
-def get_user_by_id(user_id: int):
-    with get_session() as session:
+async def get_user_by_id(user_id: int,
+                         session: AsyncSession | None = None):
+    async with read_session_scope(session) as session:
         statement = select(User).where(User.id == user_id)
-        results = session.exec(statement)
+        results = await session.exec(statement)
         return results.first()
 
 
-def get_user_by_username(username: str):
-    with get_session() as session:
+async def get_user_by_username(username: str,
+                               session: AsyncSession | None = None):
+    async with read_session_scope(session) as session:
         statement = select(User).where(User.username == username)
-        results = session.exec(statement)
+        results = await session.exec(statement)
         return results.first()
 
 
-def service_delete_user(user_id: int):
-    with get_session() as session:
-        user = session.get(User, user_id)
-        session.delete(user)
-        session.commit()
+async def service_delete_user(user_id: int,
+                              session: AsyncSession | None = None):
+    async with session_scope(session) as session:
+        await service_revoke_api_keys(APIKeys.user_id == user_id,
+                                      session=session)
+        user = await session.get(User, user_id)
+        await session.delete(user)
+        await session.flush()
+        on_commit(session, invalidate_permission_index)
+        on_commit(session, partial(invalidate_user, user_id))
         return user
 
 
-def service_create_user(user_create: UserCreate) -> User:
+async def service_create_user(user_create: UserCreate,
+                              session: AsyncSession | None = None) -> User:
     try:
-        hashed_password = pwd_context.hash(
+        hashed_password = await get_password_hash(
             user_create.password_hash)  # Hash password
 
         db_user = User(
@@ -51,21 +66,21 @@ def service_create_user(user_create: UserCreate) -> User:
             is_disabled=user_create.is_disabled
         )
 
-        with get_session() as session:
+        async with session_scope(session) as session:
             session.add(db_user)
-            session.commit()
-            session.refresh(db_user)
+            await session.flush()
             return db_user
     except IntegrityError:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=409,
                             detail="Username or email already exists")
 
 
-def service_create_user_with_role_permission(
-        user_create: UserCreateRolePermission) -> User:
+async def service_create_user_with_role_permission(
+        user_create: UserCreateRolePermission,
+        session: AsyncSession | None = None) -> User:
     try:
-        hashed_password = pwd_context.hash(
+        hashed_password = await get_password_hash(
             user_create.password_hash)  # Hash password
 
         permission = Permissions(
@@ -85,142 +100,146 @@ def service_create_user_with_role_permission(
             roles=[role]
         )
 
-        with get_session() as session:
+        async with session_scope(session) as session:
             session.add(db_user)
-            session.commit()
-            session.refresh(db_user)
+            await session.flush()
+            on_commit(session, invalidate_permission_index)
             return db_user
     except IntegrityError:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=409,
                             detail="Username or email already exists")
 
 
-def service_update_user(user_id: int, user: UserUpdate) -> User:
+async def service_update_user(user_id: int, user: UserUpdate,
+                              session: AsyncSession | None = None) -> User:
     try:
-        with get_session() as session:
-            db_user = session.get(User, user_id)
-        if db_user is None:
-            raise HTTPException(status_code=404, detail="User not found")
+        async with session_scope(session) as session:
+            db_user = await session.get(User, user_id)
+            if db_user is None:
+                raise HTTPException(status_code=404, detail="User not found")
 
-        user_data = user.model_dump(exclude_unset=True)
-        for key, value in user_data.items():
-            setattr(db_user, key, value)
+            user_data = user.model_dump(exclude_unset=True)
+            for key, value in user_data.items():
+                setattr(db_user, key, value)
 
-        with get_session() as session:
             session.add(db_user)
-            session.commit()
-            session.refresh(db_user)
+            await session.flush()
 
-        return db_user
+            if not db_user.is_active or db_user.is_disabled:
+                await service_revoke_api_keys(APIKeys.user_id == user_id,
+                                              session=session)
+            on_commit(session, partial(invalidate_user, user_id))
+            return db_user
     except IntegrityError:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=409,
                             detail="Username or email already exists")
 
 
-def service_create_user_profile(
-        user_create_profile: UserProfileBase):
-    user = get_user_by_id(user_create_profile.user_id)
-
-    if user is None:
-        raise HTTPException(status_code=404,
-                            detail="Username does not exists")
-
-    db_user_profile = UserProfile(
-        first_name=user_create_profile.first_name,
-        last_name=user_create_profile.last_name,
-        sex=user_create_profile.sex,
-        phone_number=user_create_profile.phone_number,
-        address=user_create_profile.address,
-        birth_date=user_create_profile.birth_date,
-        bio=user_create_profile.bio,
-        user_id=user.id
-    )
-    try:
-        with get_session() as session:
+async def service_create_user_profile(
+        user_create_profile: UserProfileBase,
+        session: AsyncSession | None = None):
+    async with session_scope(session) as session:
+        user = await get_user_by_id(user_create_profile.user_id, session)
+
+        if user is None:
+            raise HTTPException(status_code=404,
+                                detail="Username does not exists")
+
+        db_user_profile = UserProfile(
+            first_name=user_create_profile.first_name,
+            last_name=user_create_profile.last_name,
+            sex=user_create_profile.sex,
+            phone_number=user_create_profile.phone_number,
+            address=user_create_profile.address,
+            birth_date=user_create_profile.birth_date,
+            bio=user_create_profile.bio,
+            user_id=user.id
+        )
+        try:
             session.add(db_user_profile)
-            session.commit()
-            session.refresh(db_user_profile)
+            await session.flush()
             return db_user_profile
-    except IntegrityError:
-        session.rollback()
+        except IntegrityError:
+            await session.rollback()
 
 
-def service_assign_permission(
-        role_permission: RolePermission) -> RolePermissions:
+async def service_assign_permission(
+        role_permission: RolePermission,
+        session: AsyncSession | None = None) -> RolePermissions:
     try:
-        with get_session() as session:
-            permission = session.get(Permissions,
-                                     role_permission.permission_id)
-            role = session.get(Roles, role_permission.role_id)
+        async with session_scope(session) as session:
+            permission = await session.get(Permissions,
+                                           role_permission.permission_id)
+            role = await session.get(Roles, role_permission.role_id)
 
             if not permission or not role:
                 raise HTTPException(status_code=404,
                                     detail="Permission or Role not found")
 
-        role_permission = RolePermissions(
-            role_id=role_permission.role_id,
-            permission_id=role_permission.permission_id
-        )
+            role_permission = RolePermissions(
+                role_id=role_permission.role_id,
+                permission_id=role_permission.permission_id
+            )
 
-        with get_session() as session:
             session.add(role_permission)
-            session.commit()
-            session.refresh(role_permission)
+            await session.flush()
+            on_commit(session, invalidate_permission_index)
             return role_permission
     except IntegrityError:
-        session.rollback()
+        await session.rollback()
 
 
-def service_assign_role(user_roles: UserRole) -> UserRoles:
+async def service_assign_role(user_roles: UserRole,
+                              session: AsyncSession | None = None) -> UserRoles:
     try:
-        with get_session() as session:
-            user = session.get(User,
-                               user_roles.user_id)
-            role = session.get(Roles, user_roles.role_id)
+        async with session_scope(session) as session:
+            user = await session.get(User,
+                                     user_roles.user_id)
+            role = await session.get(Roles, user_roles.role_id)
 
             if not user or not role:
                 raise HTTPException(status_code=404,
                                     detail="User or Role not found")
 
-        user_roles = UserRoles(
-            role_id=user_roles.role_id,
-            user_id=user_roles.user_id
-        )
+            user_roles = UserRoles(
+                role_id=user_roles.role_id,
+                user_id=user_roles.user_id
+            )
 
-        with get_session() as session:
             session.add(user_roles)
-            session.commit()
-            session.refresh(user_roles)
+            await session.flush()
+            on_commit(session, invalidate_permission_index)
             return user_roles
     except IntegrityError as ex:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(ex)
 
 
-def get_user_role(user_id: int):
-    with (get_session() as session):
+async def get_user_role(user_id: int, session: AsyncSession | None = None):
+    async with read_session_scope(session) as session:
         statement = select(Roles).join(UserRoles).where(
             Roles.id == UserRoles.role_id).where(
             UserRoles.user_id == user_id)
 
-        results = session.exec(statement)
+        results = await session.exec(statement)
         return results.all()
 
 
-def get_role_permission(role_name: str):
-    with (get_session() as session):
+async def get_role_permission(role_name: str,
+                              session: AsyncSession | None = None):
+    async with read_session_scope(session) as session:
         statement = select(Permissions).join(RolePermissions).join(
             Roles).where(
             Roles.role_name == role_name)
 
-        results = session.exec(statement)
+        results = await session.exec(statement)
         return results.all()
 
 
 def main():
-    print(get_user_role(1))
+    print(asyncio.run(get_user_role(1)))
 
     """
     ur = UserRole(
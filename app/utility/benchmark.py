@@ -0,0 +1,697 @@
+"""
+    Benchmarks against the configured database environment.
+    Every benchmark works on TEMP tables inside a transaction that is rolled
+    back at the end, so nothing is left behind in the database. bulk_ingest
+    has to measure real commits, it writes to the real tables and deletes
+    its rows afterwards.
+
+    python -m app.utility.benchmark api_key_lookup --rows 1000000
+    python -m app.utility.benchmark password_verify --rounds 10 12
+    python -m app.utility.benchmark auth_modes --rows 100000
+    python -m app.utility.benchmark shift_queries --patients 40 --days 90
+    python -m app.utility.benchmark jsonb_queries --rows 500000
+    python -m app.utility.benchmark bulk_ingest --rows 500 --batch 5000
+    python -m app.utility.benchmark partitions --patients 40 --days 365
+    python -m app.utility.benchmark pagination --rows 1000000 --limit 50
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+
+import jwt
+from passlib.context import CryptContext
+from sqlalchemy import text
+from sqlmodel import create_engine, delete
+
+from app.database import db_path, database_environment, \
+    get_async_session, async_engine
+from app.models.nurses import Patients, VitalSigns
+from app.schemas.nurses import VitalSignsBase
+from app.services.nurse_services import service_create_vital_signs, \
+    service_bulk_create_vital_signs
+from app.services.partition_service import add_months, get_partition_name
+from app.services.revocation_service import RevocationSet
+from app.utility.others import get_database_configuration, digest_api_key
+
+
+def get_benchmark_engine():
+    return create_engine(
+        get_database_configuration(database_environment, "url", db_path),
+        echo=False)
+
+
+def report(name: str, samples: list[float]):
+    samples = sorted(samples)
+    p50 = statistics.median(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{name:<40} n={len(samples):<6} "
+          f"p50={p50 * 1000:9.3f}ms p95={p95 * 1000:9.3f}ms "
+          f"max={samples[-1] * 1000:9.3f}ms")
+
+
+def timed(connection, statement, params) -> float:
+    start_time = time.perf_counter()
+    connection.execute(statement, params).first()
+    return time.perf_counter() - start_time
+
+
+def generate_api_key(key_id: int) -> str:
+    # Same shape and length as the keys generated in SQL below
+    return "eyJ" + hashlib.md5(str(key_id).encode()).hexdigest() * 4
+
+
+def benchmark_api_key_lookup(rows: int, samples: int, scan_samples: int):
+    with get_benchmark_engine().connect() as connection:
+        connection.execute(text(
+            "CREATE TEMP TABLE apikeys_benchmark "
+            "(LIKE public.apikeys INCLUDING DEFAULTS INCLUDING INDEXES)"))
+        connection.execute(text(
+            "INSERT INTO apikeys_benchmark "
+            "(id, api_key, api_key_digest, expires_at, is_active, "
+            "created_at, updated_at, user_id) "
+            "SELECT i, k, encode(sha256(convert_to(k, 'UTF8')), 'hex'), "
+            "now() + interval '30 minutes', true, now(), now(), 1 "
+            "FROM (SELECT i, 'eyJ' || repeat(md5(i::text), 4) AS k "
+            "FROM generate_series(1, :rows) AS i) AS keys"),
+            {"rows": rows})
+        connection.execute(text("ANALYZE apikeys_benchmark"))
+
+        by_api_key = text(
+            "SELECT id FROM apikeys_benchmark WHERE api_key = :api_key")
+        by_digest = text(
+            "SELECT id FROM apikeys_benchmark WHERE api_key_digest = :digest")
+
+        keys = [generate_api_key(random.randint(1, rows))
+                for _ in range(samples)]
+
+        report(f"api_key full text ({rows} rows)",
+               [timed(connection, by_api_key, {"api_key": key})
+                for key in keys[:scan_samples]])
+        report(f"api_key_digest index ({rows} rows)",
+               [timed(connection, by_digest, {"digest": digest_api_key(key)})
+                for key in keys])
+
+        connection.rollback()
+
+
+async def measure_login_throughput(context: CryptContext, hashed: str,
+                                   logins: int,
+                                   executor: ThreadPoolExecutor) -> float:
+    loop = asyncio.get_running_loop()
+    start_time = time.perf_counter()
+    await asyncio.gather(*(
+        loop.run_in_executor(executor, context.verify, "password", hashed)
+        for _ in range(logins)))
+    return logins / (time.perf_counter() - start_time)
+
+
+def benchmark_password_verify(rounds: list[int], workers: list[int],
+                              logins: int):
+    for cost in rounds:
+        context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=cost)
+        hashed = context.hash("password")
+
+        for worker_count in workers:
+            with ThreadPoolExecutor(max_workers=worker_count) as executor:
+                throughput = asyncio.run(measure_login_throughput(
+                    context, hashed, logins, executor))
+            print(f"bcrypt rounds={cost:<3} workers={worker_count:<3} "
+                  f"{throughput:9.1f} logins/s "
+                  f"{worker_count / throughput * 1000:9.3f}ms per verify")
+
+
+def benchmark_auth_modes(rows: int, samples: int, revoked: int):
+    secret_key = "benchmark"
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=30)
+    tokens = [jwt.encode({"sub": "benchmark", "uid": 1, "exp": expires_at,
+                          "jti": str(i)}, secret_key, algorithm="HS256")
+              for i in range(samples)]
+
+    with get_benchmark_engine().connect() as connection:
+        connection.execute(text(
+            "CREATE TEMP TABLE user_benchmark "
+            "(LIKE public.\"user\" INCLUDING DEFAULTS INCLUDING INDEXES)"))
+        connection.execute(text(
+            "INSERT INTO user_benchmark "
+            "(id, username, email, password_hash, is_active, is_disabled, "
+            "created_at, updated_at) "
+            "VALUES (1, 'benchmark', 'benchmark', '', true, false, "
+            "now(), now())"))
+        connection.execute(text(
+            "CREATE TEMP TABLE apikeys_benchmark "
+            "(LIKE public.apikeys INCLUDING DEFAULTS INCLUDING INDEXES)"))
+        connection.execute(text(
+            "INSERT INTO apikeys_benchmark "
+            "(id, api_key, api_key_digest, expires_at, is_active, "
+            "created_at, updated_at, user_id) "
+            "SELECT i, k, encode(sha256(convert_to(k, 'UTF8')), 'hex'), "
+            "now() + interval '30 minutes', true, now(), now(), 1 "
+            "FROM (SELECT i, 'eyJ' || repeat(md5(i::text), 4) AS k "
+            "FROM generate_series(1, :rows) AS i) AS keys"),
+            {"rows": rows})
+        connection.execute(text(
+            "INSERT INTO apikeys_benchmark "
+            "(id, api_key, api_key_digest, expires_at, is_active, "
+            "created_at, updated_at, user_id) "
+            "VALUES (:id, :api_key, :digest, now() + interval '30 minutes', "
+            "true, now(), now(), 1)"),
+            [{"id": rows + i + 1, "api_key": token,
+              "digest": digest_api_key(token)}
+             for i, token in enumerate(tokens)])
+        connection.execute(text("ANALYZE apikeys_benchmark"))
+
+        # Same shape as the query behind get_api_key_principal
+        principal = text(
+            "SELECT u.id, u.username, k.is_active, k.expires_at "
+            "FROM user_benchmark AS u JOIN apikeys_benchmark AS k "
+            "ON k.user_id = u.id WHERE k.api_key_digest = :digest")
+
+        def database_mode(token: str) -> float:
+            start_time = time.perf_counter()
+            jwt.decode(token, secret_key, algorithms=["HS256"])
+            connection.execute(principal,
+                               {"digest": digest_api_key(token)}).first()
+            return time.perf_counter() - start_time
+
+        revocations = RevocationSet()
+        for key_id in range(revoked):
+            revocations.add(digest_api_key(generate_api_key(key_id)),
+                            expires_at.timestamp())
+
+        def stateless_mode(token: str) -> float:
+            start_time = time.perf_counter()
+            jwt.decode(token, secret_key, algorithms=["HS256"])
+            digest_api_key(token) in revocations
+            return time.perf_counter() - start_time
+
+        report(f"database mode ({rows} keys)",
+               [database_mode(token) for token in tokens])
+        report(f"stateless mode ({revoked} revoked)",
+               [stateless_mode(token) for token in tokens])
+
+        connection.rollback()
+
+
+def explain(connection, statement, params) -> tuple[str, float]:
+    plan = connection.execute(
+        text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}"),
+        params).scalar()[0]
+
+    nodes = []
+    pending = [plan["Plan"]]
+    while pending:
+        node = pending.pop(0)
+        if node["Node Type"] not in nodes:
+            nodes.append(node["Node Type"])
+        pending.extend(node.get("Plans", []))
+    return " > ".join(nodes), plan["Execution Time"] / 1000
+
+
+# Same shape as the shift and handoff queries in nurse_services
+SHIFT_QUERIES = {
+    "vital signs by shift": (
+        "SELECT * FROM vitalsigns_benchmark WHERE patient_id = :patient_id "
+        "AND time_stamp >= :start_of_day AND time_stamp < :end_of_day "
+        "ORDER BY time_stamp DESC"),
+    "medical data by shift": (
+        "SELECT * FROM vitalmedicaldata_benchmark "
+        "WHERE patient_id = :patient_id "
+        "AND time_stamp >= :start_of_day AND time_stamp < :end_of_day "
+        "ORDER BY time_stamp DESC"),
+    "nurse notes by shift": (
+        "SELECT * FROM nursenotes_benchmark WHERE patient_id = :patient_id "
+        "AND nurse_id = :nurse_id "
+        "AND time_stamp >= :start_of_day AND time_stamp < :end_of_day "
+        "ORDER BY time_stamp DESC"),
+    "latest handoff": (
+        "SELECT * FROM handoffs_benchmark WHERE patient_id = :patient_id "
+        "AND outgoing_nurse_id = :nurse_id AND model = :model "
+        "ORDER BY created_at DESC LIMIT 1"),
+}
+
+SHIFT_INDEXES = [
+    "CREATE INDEX ON vitalsigns_benchmark (patient_id, time_stamp DESC)",
+    "CREATE INDEX ON vitalmedicaldata_benchmark "
+    "(patient_id, time_stamp DESC)",
+    "CREATE INDEX ON nursenotes_benchmark "
+    "(patient_id, nurse_id, time_stamp DESC)",
+    "CREATE INDEX ON handoffs_benchmark "
+    "(patient_id, outgoing_nurse_id, model, created_at DESC)",
+]
+
+
+def generate_ward(connection, patients: int, nurses: int, days: int,
+                  vitals_per_hour: int):
+    for table in ("vitalsigns", "vitalmedicaldata", "nursenotes",
+                  "handoffs"):
+        # Only the primary key, the point is to compare against no index
+        connection.execute(text(
+            f"CREATE TEMP TABLE {table}_benchmark "
+            f"(LIKE public.{table} INCLUDING DEFAULTS)"))
+
+    series = ("FROM generate_series(1, :patients) AS p, "
+              "generate_series(now() - make_interval(days => :days), now(), "
+              "make_interval(secs => :step)) AS t")
+    params = {"patients": patients, "nurses": nurses, "days": days}
+
+    connection.execute(text(
+        "INSERT INTO vitalsigns_benchmark (time_stamp, "
+        "blood_pressure_systolic, blood_pressure_diastolic, heart_rate, "
+        "respiratory_rate, oxygen_saturation, temperature, source, "
+        "created_at, updated_at, patient_id) "
+        "SELECT t, 120, 80, 70, 16, 98, 36.8, 'monitor', t, t, p "
+        f"{series}"), {**params, "step": 3600 / vitals_per_hour})
+    connection.execute(text(
+        "INSERT INTO vitalmedicaldata_benchmark (time_stamp, data_type, "
+        "data_value, source, created_at, updated_at, patient_id) "
+        "SELECT t, 'lab', '{\"value\": 1}', 'lab', t, t, p "
+        f"{series}"), {**params, "step": 4 * 3600})
+    connection.execute(text(
+        "INSERT INTO nursenotes_benchmark (time_stamp, note_text, category, "
+        "created_at, updated_at, patient_id, nurse_id) "
+        "SELECT t, 'note', 'observation', t, t, p, "
+        "1 + (extract(epoch FROM t)::bigint / 3600) % :nurses "
+        f"{series}"), {**params, "step": 3600})
+    connection.execute(text(
+        "INSERT INTO handoffs_benchmark (report_text, status, model, "
+        "created_at, updated_at, patient_id, outgoing_nurse_id, "
+        "incoming_nurse_id) "
+        "SELECT '{}', 'draft', m, t, t, p, "
+        "1 + (extract(epoch FROM t)::bigint / 3600) % :nurses, 1 "
+        f"{series}, unnest(ARRAY['chatgpt', 'gemini', 'groq', 'xai']) AS m"),
+        {**params, "step": 8 * 3600})
+
+    for table in ("vitalsigns", "vitalmedicaldata", "nursenotes",
+                  "handoffs"):
+        connection.execute(text(f"ANALYZE {table}_benchmark"))
+
+
+def run_shift_queries(connection, label: str, patients: int, nurses: int,
+                      samples: int):
+    start_shift = datetime.today() - timedelta(hours=9)
+    start_of_day = datetime.combine(start_shift, datetime.min.time())
+
+    for name, statement in SHIFT_QUERIES.items():
+        plans = set()
+        timings = []
+        for _ in range(samples):
+            plan, execution_time = explain(connection, statement, {
+                "patient_id": random.randint(1, patients),
+                "nurse_id": random.randint(1, nurses),
+                "model": "chatgpt",
+                "start_of_day": start_of_day,
+                "end_of_day": datetime.today(),
+            })
+            plans.add(plan)
+            timings.append(execution_time)
+        report(f"{name} ({label})", timings)
+        for plan in sorted(plans):
+            print(f"    {plan}")
+
+
+def benchmark_shift_queries(patients: int, nurses: int, days: int,
+                            vitals_per_hour: int, samples: int):
+    with get_benchmark_engine().connect() as connection:
+        generate_ward(connection, patients, nurses, days, vitals_per_hour)
+        rows = connection.execute(text(
+            "SELECT count(*) FROM vitalsigns_benchmark")).scalar()
+        print(f"{patients} patients, {days} days, {rows} vital signs")
+
+        run_shift_queries(connection, "no index", patients, nurses, samples)
+
+        for statement in SHIFT_INDEXES:
+            connection.execute(text(statement))
+        for table in ("vitalsigns", "vitalmedicaldata", "nursenotes",
+                      "handoffs"):
+            connection.execute(text(f"ANALYZE {table}_benchmark"))
+
+        run_shift_queries(connection, "composite index", patients, nurses,
+                          samples)
+
+        connection.rollback()
+
+
+LAB_KEYS = ["potassium", "sodium", "chloride", "glucose", "creatinine",
+            "hemoglobin", "platelets", "wbc", "inr", "lactate", "troponin",
+            "magnesium", "calcium", "albumin", "bilirubin", "crp"]
+
+RECOMMENDATIONS = ["Monitor blood pressure every 4 hours",
+                   "Encourage oral fluids", "Reassess pain score after PRN",
+                   "Continue IV antibiotics as ordered",
+                   "Repeat potassium level in the morning",
+                   "Mobilise with physiotherapy", "Review wound dressing"]
+
+
+def jsonb_query_statements(cast: str) -> dict[str, str]:
+    return {
+        "medical data of type with key": (
+            "SELECT id FROM vitalmedicaldata_benchmark "
+            f"WHERE data_type = 'lab' AND data_value{cast} ? :key"),
+        "medical data containing value": (
+            "SELECT id FROM vitalmedicaldata_benchmark "
+            f"WHERE data_value{cast} @> CAST(:data_value AS jsonb)"),
+        "handoffs recommending fall risk": (
+            "SELECT id FROM handoffs_benchmark "
+            f"WHERE jsonb_to_tsvector('english', report_text{cast} "
+            "-> 'sbar_report' -> 'recommendation', '[\"string\"]') "
+            "@@ phraseto_tsquery('english', :phrase)"),
+    }
+
+
+def run_jsonb_queries(connection, label: str, cast: str, samples: int):
+    for name, statement in jsonb_query_statements(cast).items():
+        plans = set()
+        timings = []
+        for _ in range(samples):
+            plan, execution_time = explain(connection, statement, {
+                "key": random.choice(LAB_KEYS),
+                "data_value": json.dumps({"patient_state": "critical"}),
+                "phrase": "fall risk",
+            })
+            plans.add(plan)
+            timings.append(execution_time)
+        report(f"{name} ({label})", timings)
+        for plan in sorted(plans):
+            print(f"    {plan}")
+
+
+def benchmark_jsonb_queries(rows: int, handoffs: int, samples: int):
+    with get_benchmark_engine().connect() as connection:
+        for table in ("vitalmedicaldata", "handoffs"):
+            connection.execute(text(
+                f"CREATE TEMP TABLE {table}_benchmark "
+                f"(LIKE public.{table} INCLUDING DEFAULTS)"))
+        # The column type before this change
+        connection.execute(text(
+            "ALTER TABLE vitalmedicaldata_benchmark "
+            "ALTER COLUMN data_value TYPE json"))
+        connection.execute(text(
+            "ALTER TABLE handoffs_benchmark "
+            "ALTER COLUMN report_text TYPE json"))
+
+        connection.execute(text(
+            "INSERT INTO vitalmedicaldata_benchmark (time_stamp, data_type, "
+            "data_value, source, created_at, updated_at, patient_id) "
+            "SELECT now(), (ARRAY['lab', 'imaging', 'medication'])[1 + i % 3], "
+            "json_build_object((:keys)[1 + i % cardinality(:keys)], i % 100, "
+            "(:keys)[1 + (i / 7) % cardinality(:keys)], i % 10, "
+            "'patient_state', CASE WHEN i % 50 = 0 THEN 'critical' "
+            "ELSE 'stable' END), 'lab', now(), now(), 1 + i % 40 "
+            "FROM generate_series(1, :rows) AS i"),
+            {"rows": rows, "keys": LAB_KEYS})
+        connection.execute(text(
+            "INSERT INTO handoffs_benchmark (report_text, status, model, "
+            "created_at, updated_at, patient_id, outgoing_nurse_id, "
+            "incoming_nurse_id) "
+            "SELECT json_build_object('sbar_report', json_build_object("
+            "'recommendation', json_build_array("
+            "(:recommendations)[1 + i % cardinality(:recommendations)], "
+            "CASE WHEN i % 100 = 0 THEN 'Continue fall risk precautions' "
+            "ELSE (:recommendations)[1 + (i / 3) % "
+            "cardinality(:recommendations)] END))), "
+            "'draft', 'chatgpt', now(), now(), 1 + i % 40, 1, 1 "
+            "FROM generate_series(1, :handoffs) AS i"),
+            {"handoffs": handoffs, "recommendations": RECOMMENDATIONS})
+        connection.execute(text("ANALYZE vitalmedicaldata_benchmark"))
+        connection.execute(text("ANALYZE handoffs_benchmark"))
+        print(f"{rows} medical data rows, {handoffs} handoffs")
+
+        run_jsonb_queries(connection, "json", "::jsonb", samples)
+
+        connection.execute(text(
+            "ALTER TABLE vitalmedicaldata_benchmark "
+            "ALTER COLUMN data_value TYPE jsonb"))
+        connection.execute(text(
+            "ALTER TABLE handoffs_benchmark "
+            "ALTER COLUMN report_text TYPE jsonb"))
+        connection.execute(text(
+            "CREATE INDEX ON vitalmedicaldata_benchmark USING gin "
+            "(data_value)"))
+        connection.execute(text(
+            "CREATE INDEX ON handoffs_benchmark USING gin "
+            "(jsonb_to_tsvector('english', report_text -> 'sbar_report' "
+            "-> 'recommendation', '[\"string\"]'))"))
+        connection.execute(text("ANALYZE vitalmedicaldata_benchmark"))
+        connection.execute(text("ANALYZE handoffs_benchmark"))
+
+        run_jsonb_queries(connection, "jsonb + gin", "", samples)
+
+        connection.rollback()
+
+
+async def measure_ingest(rows: int, batch: int) -> tuple[float, float]:
+    async with get_async_session() as session:
+        patient = Patients(first_name="benchmark", last_name="benchmark",
+                           sex="-", birth_date=date(1970, 1, 1),
+                           medical_record_number=f"benchmark-{time.time()}",
+                           room_number="-", discharge_date=None)
+        session.add(patient)
+        await session.commit()
+
+    vital_sign = {"time_stamp": datetime.now().isoformat(),
+                  "blood_pressure_systolic": 120,
+                  "blood_pressure_diastolic": 80, "heart_rate": 70,
+                  "respiratory_rate": 16, "oxygen_saturation": 98,
+                  "temperature": 36.8, "source": "benchmark",
+                  "patient_id": patient.id}
+    try:
+        # What one request to POST /api/vital_signs/ does per row
+        start_time = time.perf_counter()
+        for _ in range(rows):
+            await service_create_vital_signs(
+                VitalSignsBase.model_validate(vital_sign))
+        single = rows / (time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        await service_bulk_create_vital_signs([vital_sign] * batch)
+        bulk = batch / (time.perf_counter() - start_time)
+    finally:
+        async with get_async_session() as session:
+            await session.exec(delete(VitalSigns).where(
+                VitalSigns.patient_id == patient.id))
+            await session.exec(delete(Patients).where(
+                Patients.id == patient.id))
+            await session.commit()
+
+    return single, bulk
+
+
+def benchmark_bulk_ingest(rows: int, batch: int):
+    # The dev environments log every statement
+    async_engine.echo = False
+    single, bulk = asyncio.run(measure_ingest(rows, batch))
+    print(f"single row service ({rows} rows) {single:12.1f} rows/s")
+    print(f"bulk service ({batch} rows)      {bulk:12.1f} rows/s "
+          f"{bulk / single:6.1f}x")
+
+
+def scanned_relations(connection, statement, params) -> list[str]:
+    plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {statement}"),
+                              params).scalar()[0]
+
+    relations = []
+    pending = [plan["Plan"]]
+    while pending:
+        node = pending.pop(0)
+        if "Relation Name" in node:
+            relations.append(node["Relation Name"])
+        pending.extend(node.get("Plans", []))
+    return relations
+
+
+def benchmark_partitions(patients: int, days: int, vitals_per_hour: int,
+                         samples: int):
+    with get_benchmark_engine().connect() as connection:
+        connection.execute(text(
+            "CREATE TEMP TABLE vitalsigns_unpartitioned "
+            "(LIKE public.vitalsigns INCLUDING DEFAULTS)"))
+        connection.execute(text(
+            "CREATE TEMP TABLE vitalsigns_partitioned "
+            "(LIKE public.vitalsigns INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (time_stamp)"))
+
+        current_month = date.today().replace(day=1)
+        month = (date.today() - timedelta(days=days)).replace(day=1)
+        while month <= current_month:
+            connection.execute(text(
+                f"CREATE TEMP TABLE "
+                f"{get_partition_name('vitalsigns_partitioned', month)} "
+                f"PARTITION OF vitalsigns_partitioned FOR VALUES "
+                f"FROM ('{month}') TO ('{add_months(month, 1)}')"))
+            month = add_months(month, 1)
+
+        for table in ("vitalsigns_unpartitioned", "vitalsigns_partitioned"):
+            connection.execute(text(
+                f"INSERT INTO {table} (time_stamp, blood_pressure_systolic, "
+                "blood_pressure_diastolic, heart_rate, respiratory_rate, "
+                "oxygen_saturation, temperature, source, created_at, "
+                "updated_at, patient_id) "
+                "SELECT t, 120, 80, 70, 16, 98, 36.8, 'monitor', t, t, p "
+                "FROM generate_series(1, :patients) AS p, "
+                "generate_series(now() - make_interval(days => :days), "
+                "now(), make_interval(secs => :step)) AS t"),
+                {"patients": patients, "days": days,
+                 "step": 3600 / vitals_per_hour})
+            # Same composite index as the model, on the partitioned table it
+            # is created on every partition
+            connection.execute(text(
+                f"CREATE INDEX ON {table} (patient_id, time_stamp DESC)"))
+            connection.execute(text(f"ANALYZE {table}"))
+
+        rows = connection.execute(text(
+            "SELECT count(*) FROM vitalsigns_unpartitioned")).scalar()
+        print(f"{patients} patients, {days} days, {rows} vital signs")
+
+        start_shift = datetime.today() - timedelta(hours=9)
+        start_of_day = datetime.combine(start_shift, datetime.min.time())
+        for table in ("vitalsigns_unpartitioned", "vitalsigns_partitioned"):
+            statement = (
+                f"SELECT * FROM {table} WHERE patient_id = :patient_id "
+                "AND time_stamp >= :start_of_day AND time_stamp < :end_of_day "
+                "ORDER BY time_stamp DESC")
+            params = {"patient_id": 1, "start_of_day": start_of_day,
+                      "end_of_day": datetime.today()}
+
+            timings = []
+            for _ in range(samples):
+                params["patient_id"] = random.randint(1, patients)
+                timings.append(explain(connection, statement, params)[1])
+            report(f"vital signs by shift ({table})", timings)
+            relations = scanned_relations(connection, statement, params)
+            print(f"    scans {', '.join(relations)}")
+
+        connection.rollback()
+
+
+def benchmark_pagination(rows: int, limit: int, pages: list[int],
+                         samples: int):
+    with get_benchmark_engine().connect() as connection:
+        connection.execute(text(
+            "CREATE TEMP TABLE vitalsigns_benchmark "
+            "(LIKE public.vitalsigns INCLUDING DEFAULTS)"))
+        # One patient with a long history, rows land on the same time_stamp
+        # in pairs so the id tie breaker is exercised
+        connection.execute(text(
+            "INSERT INTO vitalsigns_benchmark (time_stamp, "
+            "blood_pressure_systolic, blood_pressure_diastolic, heart_rate, "
+            "respiratory_rate, oxygen_saturation, temperature, source, "
+            "created_at, updated_at, patient_id) "
+            "SELECT now() - (i / 2) * interval '1 minute', 120, 80, 70, 16, "
+            "98, 36.8, 'monitor', now(), now(), 1 "
+            "FROM generate_series(1, :rows) AS i"), {"rows": rows})
+        connection.execute(text(
+            "CREATE INDEX ON vitalsigns_benchmark (patient_id, time_stamp DESC)"))
+        connection.execute(text("ANALYZE vitalsigns_benchmark"))
+
+        by_offset = (
+            "SELECT * FROM vitalsigns_benchmark WHERE patient_id = 1 "
+            "ORDER BY time_stamp DESC, id DESC LIMIT :limit OFFSET :offset")
+        # Same predicates get_page builds from a cursor
+        by_keyset = (
+            "SELECT * FROM vitalsigns_benchmark WHERE patient_id = 1 "
+            "AND time_stamp <= :time_stamp "
+            "AND (time_stamp, id) < (:time_stamp, :id) "
+            "ORDER BY time_stamp DESC, id DESC LIMIT :limit")
+
+        for page in pages:
+            offset = (page - 1) * limit
+            if offset >= rows:
+                continue
+            boundary = connection.execute(text(
+                "SELECT time_stamp, id FROM vitalsigns_benchmark "
+                "ORDER BY time_stamp DESC, id DESC LIMIT 1 OFFSET :offset"),
+                {"offset": max(offset - 1, 0)}).first()
+
+            report(f"page {page} offset", [
+                explain(connection, by_offset,
+                        {"limit": limit, "offset": offset})[1]
+                for _ in range(samples)])
+            report(f"page {page} keyset", [
+                explain(connection, by_keyset,
+                        {"limit": limit, "time_stamp": boundary.time_stamp,
+                         "id": boundary.id})[1]
+                for _ in range(samples)])
+
+        connection.rollback()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    api_key_lookup = subparsers.add_parser("api_key_lookup")
+    api_key_lookup.add_argument("--rows", type=int, default=1_000_000)
+    api_key_lookup.add_argument("--samples", type=int, default=1000)
+    api_key_lookup.add_argument("--scan-samples", type=int, default=20)
+
+    password_verify = subparsers.add_parser("password_verify")
+    password_verify.add_argument("--rounds", type=int, nargs="+",
+                                 default=[10, 11, 12])
+    password_verify.add_argument("--workers", type=int, nargs="+",
+                                 default=[1, 2, 4])
+    password_verify.add_argument("--logins", type=int, default=64)
+
+    auth_modes = subparsers.add_parser("auth_modes")
+    auth_modes.add_argument("--rows", type=int, default=100_000)
+    auth_modes.add_argument("--samples", type=int, default=1000)
+    auth_modes.add_argument("--revoked", type=int, default=10_000)
+
+    shift_queries = subparsers.add_parser("shift_queries")
+    shift_queries.add_argument("--patients", type=int, default=40)
+    shift_queries.add_argument("--nurses", type=int, default=12)
+    shift_queries.add_argument("--days", type=int, default=90)
+    shift_queries.add_argument("--vitals-per-hour", type=int, default=4)
+    shift_queries.add_argument("--samples", type=int, default=50)
+
+    jsonb_queries = subparsers.add_parser("jsonb_queries")
+    jsonb_queries.add_argument("--rows", type=int, default=500_000)
+    jsonb_queries.add_argument("--handoffs", type=int, default=100_000)
+    jsonb_queries.add_argument("--samples", type=int, default=20)
+
+    bulk_ingest = subparsers.add_parser("bulk_ingest")
+    bulk_ingest.add_argument("--rows", type=int, default=500)
+    bulk_ingest.add_argument("--batch", type=int, default=5000)
+
+    partitions = subparsers.add_parser("partitions")
+    partitions.add_argument("--patients", type=int, default=40)
+    partitions.add_argument("--days", type=int, default=365)
+    partitions.add_argument("--vitals-per-hour", type=int, default=4)
+    partitions.add_argument("--samples", type=int, default=50)
+
+    pagination = subparsers.add_parser("pagination")
+    pagination.add_argument("--rows", type=int, default=1_000_000)
+    pagination.add_argument("--limit", type=int, default=50)
+    pagination.add_argument("--pages", type=int, nargs="+",
+                            default=[1, 100, 1000, 10000])
+    pagination.add_argument("--samples", type=int, default=20)
+
+    args = parser.parse_args()
+
+    if args.benchmark == "api_key_lookup":
+        benchmark_api_key_lookup(args.rows, args.samples, args.scan_samples)
+    elif args.benchmark == "password_verify":
+        benchmark_password_verify(args.rounds, args.workers, args.logins)
+    elif args.benchmark == "auth_modes":
+        benchmark_auth_modes(args.rows, args.samples, args.revoked)
+    elif args.benchmark == "shift_queries":
+        benchmark_shift_queries(args.patients, args.nurses, args.days,
+                                args.vitals_per_hour, args.samples)
+    elif args.benchmark == "jsonb_queries":
+        benchmark_jsonb_queries(args.rows, args.handoffs, args.samples)
+    elif args.benchmark == "bulk_ingest":
+        benchmark_bulk_ingest(args.rows, args.batch)
+    elif args.benchmark == "partitions":
+        benchmark_partitions(args.patients, args.days, args.vitals_per_hour,
+                             args.samples)
+    elif args.benchmark == "pagination":
+        benchmark_pagination(args.rows, args.limit, args.pages, args.samples)
+
+
+if __name__ == '__main__':
+    main()
@@ -13,6 +13,8 @@ CHAT_GPT = "chatgpt"
 GEMINI = "gemini"
 GROQ = "groq"
 XAI = "xai"
+# Picks one of the above per request, see routing_service
+AUTO = "auto"
 XAI_BASEURL = "https://api.x.ai/v1"
 
 CHAT_GPT_PRICE_PER_TOKEN = 0.00000015
@@ -20,8 +22,55 @@ GEMINI_PRICE_PER_TOKEN = 0.0000001
 LLAMA_PRICE_PER_TOKEN = 0.00000059
 XAI_PRICE_PER_TOKEN = 0.00002
 
+PRICE_PER_TOKEN = {
+    CHAT_GPT: CHAT_GPT_PRICE_PER_TOKEN,
+    GEMINI: GEMINI_PRICE_PER_TOKEN,
+    GROQ: LLAMA_PRICE_PER_TOKEN,
+    XAI: XAI_PRICE_PER_TOKEN,
+}
+
 STATUS_DRAFT = "draft"
 
+# Rough token estimate of a prompt before the provider reports the real
+# usage, charged against the provider rate limit
+CHARS_PER_TOKEN = 4
+SBAR_COMPLETION_TOKENS = 1500
+
+# Part of the SBAR cache key, bump it when the output would change without
+# the prompts changing (response schema, temperature, parsing)
+SBAR_PROMPT_VERSION = 1
+SBAR_CACHE_HIT = "hit"
+SBAR_CACHE_MISS = "miss"
+
+# Server sent events of the streaming SBAR endpoints besides the sections
+SBAR_EVENT_HANDOFF = "handoff"
+SBAR_EVENT_ERROR = "error"
+
+BULK_STATUS_CREATED = "created"
+BULK_STATUS_INVALID = "invalid"
+BULK_STATUS_PATIENT_NOT_FOUND = "patient_not_found"
+BULK_STATUS_NURSE_NOT_FOUND = "nurse_not_found"
+BULK_STATUS_ERROR = "error"
+
+MAX_BULK_ROWS = 10000
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# pg_try_advisory_lock key, one worker at a time runs partition maintenance
+PARTITION_MAINTENANCE_LOCK_ID = 4206151
+
+# Frames a streaming client may have in flight before reads are paused
+MAX_PENDING_INGEST_FRAMES = 100
+
+AUTH_MODE_DATABASE = "database"
+AUTH_MODE_STATELESS = "stateless"
+# Claims a token needs to be validated without Postgres
+STATELESS_TOKEN_CLAIMS = ("uid", "active", "disabled")
+
+# Clients tracked for read your writes before expired entries are dropped
+MAX_RECENT_WRITERS = 10000
+
 MAX_MESSAGES = 5
 
 INDEX_NAME = "nursingassistant"
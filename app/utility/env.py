@@ -1,79 +1,274 @@
 import os
+from functools import lru_cache
 
 from dotenv import load_dotenv
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
-def get_key() -> str:
-    load_dotenv()
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(extra="ignore")
 
     # openssl rand -hex 32
-    return os.getenv('SECRET_KEY')
+    secret_key: str | None = None
+    access_token_expire_minutes: int = 30
 
+    logfire_token: str | None = None
+    pinecone_api_key: str | None = None
 
-def get_token_expire_minutes() -> str | None:
-    load_dotenv()
+    open_ai_key: str | None = None
+    gemini_key: str | None = None
+    groq_key: str | None = None
+    xai_api_key: str | None = None
 
-    return os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES')
+    open_ai_model: str | None = None
+    gemini_model: str | None = None
+    groq_model: str | None = None
+    xai_model: str | None = None
 
+    database_environment: str = "database_dev"
 
-def get_logfire_key() -> str:
+    token_cache_ttl_seconds: int = 60
+    token_cache_max_size: int = 10000
+
+    api_key_sweep_interval_seconds: int = 60
+
+    permission_index_ttl_seconds: int = 300
+
+    password_hash_workers: int = 4
+
+    auth_mode: str = "database"
+    revocation_refresh_seconds: int = 5
+
+    ingest_queue_size: int = 10000
+    ingest_batch_size: int = 500
+    ingest_flush_interval_ms: int = 50
+
+    partition_months_ahead: int = 3
+    partition_retention_months: int = 24
+    partition_maintenance_interval_seconds: int = 3600
+
+    read_your_writes_seconds: int = 0
+
+    shift_rollup_threshold: int = 48
+
+    llm_max_connections: int = 20
+    llm_max_keepalive_connections: int = 10
+    llm_timeout_seconds: int = 120
+    llm_connect_timeout_seconds: int = 5
+
+    # Provider quotas, 0 disables the limit
+    open_ai_requests_per_minute: int = 500
+    open_ai_tokens_per_minute: int = 200000
+    gemini_requests_per_minute: int = 2000
+    gemini_tokens_per_minute: int = 4000000
+    groq_requests_per_minute: int = 30
+    groq_tokens_per_minute: int = 12000
+    xai_requests_per_minute: int = 60
+    xai_tokens_per_minute: int = 100000
+
+    routing_window_size: int = 100
+    routing_min_samples: int = 5
+    routing_max_error_rate: float = 0.5
+    # Share of requests that measure an unmeasured provider first
+    routing_probe_share: float = 0.05
+    # 0 turns hedged SBAR requests off
+    sbar_hedge_percentile: int = 95
+    sbar_hedge_after_seconds: float = 10
+
+
+@lru_cache
+def get_settings() -> Settings:
+    # .env is read once per process, later lookups hit the environment only
     load_dotenv()
 
-    return os.getenv('LOGFIRE_TOKEN')
+    return Settings()
+
+
+def get_key() -> str:
+    return get_settings().secret_key
+
+
+def get_token_expire_minutes() -> int:
+    return get_settings().access_token_expire_minutes
+
+
+def get_logfire_key() -> str:
+    return get_settings().logfire_token
 
 
 def get_open_ai_key() -> str:
-    load_dotenv()
+    return get_settings().open_ai_key
 
-    return os.getenv('OPEN_AI_KEY')
 
 def get_xai_key() -> str:
-    load_dotenv()
+    return get_settings().xai_api_key
 
-    return os.getenv('XAI_API_KEY')
 
 def get_pinecone_key() -> str:
-    load_dotenv()
-
-    return os.getenv('PINECONE_API_KEY')
+    return get_settings().pinecone_api_key
 
 
 def get_gemini_key() -> str:
-    load_dotenv()
-
-    return os.getenv('GEMINI_KEY')
+    return get_settings().gemini_key
 
 
 def get_groq_key() -> str:
-    load_dotenv()
-
-    return os.getenv('GROQ_KEY')
+    return get_settings().groq_key
 
 
 def get_open_ai_model() -> str:
-    load_dotenv()
-
-    return os.getenv('OPEN_AI_MODEL')
+    return get_settings().open_ai_model
 
 
 def get_gemini_model() -> str:
-    load_dotenv()
-
-    return os.getenv('GEMINI_MODEL')
+    return get_settings().gemini_model
 
 
 def get_groq_model() -> str:
-    load_dotenv()
+    return get_settings().groq_model
 
-    return os.getenv('GROQ_MODEL')
 
 def get_xai_model() -> str:
-    load_dotenv()
+    return get_settings().xai_model
+
 
-    return os.getenv('XAI_MODEL')
+def get_database_environment() -> str:
+    return get_settings().database_environment
 
 
 def get_env_key(name: str) -> str:
-    load_dotenv()
+    get_settings()
 
     return os.getenv(name)
+
+
+def get_token_cache_ttl_seconds() -> int:
+    return get_settings().token_cache_ttl_seconds
+
+
+def get_token_cache_max_size() -> int:
+    return get_settings().token_cache_max_size
+
+
+def get_api_key_sweep_interval_seconds() -> int:
+    return get_settings().api_key_sweep_interval_seconds
+
+
+def get_permission_index_ttl_seconds() -> int:
+    return get_settings().permission_index_ttl_seconds
+
+
+def get_password_hash_workers() -> int:
+    return get_settings().password_hash_workers
+
+
+def get_auth_mode() -> str:
+    return get_settings().auth_mode
+
+
+def get_revocation_refresh_seconds() -> int:
+    return get_settings().revocation_refresh_seconds
+
+
+def get_ingest_queue_size() -> int:
+    return get_settings().ingest_queue_size
+
+
+def get_ingest_batch_size() -> int:
+    return get_settings().ingest_batch_size
+
+
+def get_ingest_flush_interval_ms() -> int:
+    return get_settings().ingest_flush_interval_ms
+
+
+def get_partition_months_ahead() -> int:
+    return get_settings().partition_months_ahead
+
+
+def get_partition_retention_months() -> int:
+    return get_settings().partition_retention_months
+
+
+def get_partition_maintenance_interval_seconds() -> int:
+    return get_settings().partition_maintenance_interval_seconds
+
+
+def get_read_your_writes_seconds() -> int:
+    return get_settings().read_your_writes_seconds
+
+
+def get_shift_rollup_threshold() -> int:
+    return get_settings().shift_rollup_threshold
+
+
+def get_llm_max_connections() -> int:
+    return get_settings().llm_max_connections
+
+
+def get_llm_max_keepalive_connections() -> int:
+    return get_settings().llm_max_keepalive_connections
+
+
+def get_llm_timeout_seconds() -> int:
+    return get_settings().llm_timeout_seconds
+
+
+def get_llm_connect_timeout_seconds() -> int:
+    return get_settings().llm_connect_timeout_seconds
+
+
+def get_open_ai_requests_per_minute() -> int:
+    return get_settings().open_ai_requests_per_minute
+
+
+def get_open_ai_tokens_per_minute() -> int:
+    return get_settings().open_ai_tokens_per_minute
+
+
+def get_gemini_requests_per_minute() -> int:
+    return get_settings().gemini_requests_per_minute
+
+
+def get_gemini_tokens_per_minute() -> int:
+    return get_settings().gemini_tokens_per_minute
+
+
+def get_groq_requests_per_minute() -> int:
+    return get_settings().groq_requests_per_minute
+
+
+def get_groq_tokens_per_minute() -> int:
+    return get_settings().groq_tokens_per_minute
+
+
+def get_xai_requests_per_minute() -> int:
+    return get_settings().xai_requests_per_minute
+
+
+def get_xai_tokens_per_minute() -> int:
+    return get_settings().xai_tokens_per_minute
+
+
+def get_routing_window_size() -> int:
+    return get_settings().routing_window_size
+
+
+def get_routing_min_samples() -> int:
+    return get_settings().routing_min_samples
+
+
+def get_routing_max_error_rate() -> float:
+    return get_settings().routing_max_error_rate
+
+
+def get_routing_probe_share() -> float:
+    return get_settings().routing_probe_share
+
+
+def get_sbar_hedge_percentile() -> int:
+    return get_settings().sbar_hedge_percentile
+
+
+def get_sbar_hedge_after_seconds() -> float:
+    return get_settings().sbar_hedge_after_seconds
@@ -0,0 +1,45 @@
+import json
+
+
+# Picks the top level members out of a JSON object that arrives in chunks.
+# feed() returns the (key, value) pairs the chunk completed, a member is
+# usable as soon as it is closed instead of when the whole document is.
+class JsonMemberStream:
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.member_start = None
+
+    def feed(self, chunk: str) -> list[tuple[str, object]]:
+        self.buffer += chunk
+        members = []
+
+        for index in range(self.position, len(self.buffer)):
+            character = self.buffer[index]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif character == "\\":
+                    self.escaped = True
+                elif character == '"':
+                    self.in_string = False
+            elif character == '"':
+                self.in_string = True
+            elif character in "{[":
+                self.depth += 1
+                if self.depth == 1:
+                    self.member_start = index + 1
+            elif character in "}]" or (character == "," and self.depth == 1):
+                if self.depth == 1:
+                    member = self.buffer[self.member_start:index].strip()
+                    if member:
+                        members.extend(json.loads("{" + member + "}").items())
+                    self.member_start = index + 1
+                if character != ",":
+                    self.depth -= 1
+
+        self.position = len(self.buffer)
+        return members
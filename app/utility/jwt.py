@@ -1,11 +1,12 @@
+import secrets
 from datetime import datetime, timedelta, timezone
 
-from passlib.context import CryptContext
 from pydantic import BaseModel
 
 from app.schemas.user import User
 from app.services.user_service import get_user_by_username
 from app.utility.env import get_key
+from app.utility.password import verify_password
 
 import jwt
 
@@ -21,26 +22,15 @@ class TokenData(BaseModel):
     username: str | None = None
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+async def get_user(username: str) -> User:
+    return await get_user_by_username(username)
 
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
-
-def get_user(username: str) -> User:
-    return get_user_by_username(username)
-
-
-def authenticate_user(username: str, password: str):
-    user = get_user(username)
+async def authenticate_user(username: str, password: str):
+    user = await get_user(username)
     if not user:
         return False
-    if not verify_password(password, user.password_hash):
+    if not await verify_password(password, user.password_hash):
         return False
     return user
 
@@ -51,6 +41,8 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    # exp has a one second resolution, without a jti two logins of the same
+    # user in the same second would mint the same token and api_key_digest
+    to_encode.update({"exp": expire, "jti": secrets.token_urlsafe(16)})
 
     return jwt.encode(to_encode, get_key(), algorithm=ALGORITHM)
@@ -1,4 +1,7 @@
+import hashlib
 import json
+import statistics
+from functools import lru_cache
 
 from app.utility.logger import get_logger
 
@@ -13,7 +16,8 @@ def construct_sbar_report(situation,
                           prompt_tokens,
                           completion_tokens,
                           total_tokens,
-                          cost_estimate) -> json:
+                          cost_estimate,
+                          cache) -> json:
     report_dict = {
         "sbar_report": {
             "patient": {
@@ -38,7 +42,8 @@ def construct_sbar_report(situation,
         "token_usage": {
             "prompt_tokens": prompt_tokens,
             "completion_tokens": completion_tokens,
-            "total_tokens": total_tokens
+            "total_tokens": total_tokens,
+            "cache": cache
         },
         "cost_estimate": cost_estimate
     }
@@ -46,6 +51,24 @@ def construct_sbar_report(situation,
     return json.dumps(report_dict)
 
 
+def digest_api_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def get_percentile(values: list[float], percentile: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percentile / 100))]
+
+
+def get_latency_snapshot(values: list[float]) -> dict:
+    # p50/p95/max of durations in seconds, reported in milliseconds
+    return {
+        "p50": round(statistics.median(values) * 1000, 3),
+        "p95": round(get_percentile(values, 95) * 1000, 3),
+        "max": round(max(values) * 1000, 3),
+    }
+
+
 def construct_question_answer(answer: str) -> json:
     report_dict = {
         "answer": answer
@@ -54,11 +77,20 @@ def construct_question_answer(answer: str) -> json:
     return json.dumps(report_dict)
 
 
-def get_database_configuration(environment, url, path):
+@lru_cache
+def load_configuration(path) -> dict:
     try:
         with open(path, 'r') as config_file:
-            config = json.load(config_file)
+            return json.load(config_file)
     except (FileNotFoundError, json.JSONDecodeError) as e:
         logger.error(f"Error loading database configuration: {e}")
         raise SystemExit(1)
-    return config[environment][url]
+
+
+def get_database_configuration(environment, url, path):
+    return load_configuration(path)[environment][url]
+
+
+def get_optional_database_configuration(environment, key, path,
+                                        default=None):
+    return load_configuration(path)[environment].get(key, default)
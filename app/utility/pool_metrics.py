@@ -0,0 +1,128 @@
+import time
+from collections import deque
+from threading import Lock
+
+import logfire
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.utility.others import get_latency_snapshot
+
+checkout_counter = logfire.metric_counter(
+    "db.pool.checkouts", unit="1",
+    description="Connections handed out by the pool")
+timeout_counter = logfire.metric_counter(
+    "db.pool.timeouts", unit="1",
+    description="Checkouts that gave up after pool_timeout")
+wait_time_histogram = logfire.metric_histogram(
+    "db.pool.wait_time", unit="ms",
+    description="Time spent waiting for a pooled connection")
+checked_out_gauge = logfire.metric_gauge(
+    "db.pool.checked_out", unit="1",
+    description="Connections currently checked out")
+overflow_gauge = logfire.metric_gauge(
+    "db.pool.overflow", unit="1",
+    description="Connections opened beyond pool_size")
+saturation_gauge = logfire.metric_gauge(
+    "db.pool.saturation", unit="1",
+    description="Checked out connections over pool_size + max_overflow")
+
+
+class PoolMetrics:
+    def __init__(self, name: str, pool_size: int, max_overflow: int,
+                 samples: int = 1000):
+        self.name = name
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.checkouts = 0
+        self.timeouts = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.overflow = 0
+        self.wait_times = deque(maxlen=samples)
+        self._lock = Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self.pool_size + self.max_overflow
+
+    @property
+    def saturation(self) -> float:
+        return self.checked_out / self.capacity if self.capacity else 0.0
+
+    def record_usage(self, checked_out: int, overflow: int):
+        attributes = {"pool": self.name}
+        with self._lock:
+            self.checked_out = checked_out
+            self.max_checked_out = max(self.max_checked_out, checked_out)
+            self.overflow = max(overflow, 0)
+        checked_out_gauge.set(self.checked_out, attributes)
+        overflow_gauge.set(self.overflow, attributes)
+        saturation_gauge.set(self.saturation, attributes)
+
+    def record_checkout(self, wait_time: float):
+        attributes = {"pool": self.name}
+        with self._lock:
+            self.checkouts += 1
+            self.wait_times.append(wait_time)
+        checkout_counter.add(1, attributes)
+        wait_time_histogram.record(wait_time * 1000, attributes)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+        timeout_counter.add(1, {"pool": self.name})
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            wait_times = list(self.wait_times)
+            snapshot = {
+                "pool": self.name,
+                "pool_size": self.pool_size,
+                "max_overflow": self.max_overflow,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "overflow": self.overflow,
+                "saturation": round(self.saturation, 3),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+            }
+        if wait_times:
+            snapshot["wait_time_ms"] = get_latency_snapshot(wait_times)
+        return snapshot
+
+
+class TimedPoolMixin:
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        # SQLAlchemy has no event for the start of a checkout, so the wait is
+        # measured around the queue get of the pool itself
+        start_time = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start_time)
+        self.metrics.record_usage(self.checkedout(), self.overflow())
+        return connection
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self.metrics.record_usage(self.checkedout(), self.overflow())
+
+
+pool_metrics: dict[str, PoolMetrics] = {}
+
+
+def timed_pool_class(pool_class, name: str, pool_size: int,
+                     max_overflow: int):
+    # A class attribute survives engine.dispose(), which recreates the pool
+    metrics = PoolMetrics(name, pool_size, max_overflow)
+    pool_metrics[name] = metrics
+    return type(f"Timed{pool_class.__name__}", (TimedPoolMixin, pool_class),
+                {"metrics": metrics})
+
+
+def get_pool_metrics() -> list[dict]:
+    return [metrics.snapshot() for metrics in pool_metrics.values()]
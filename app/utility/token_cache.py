@@ -0,0 +1,60 @@
+import time
+from threading import Lock
+from typing import NamedTuple
+
+from cachetools import TLRUCache
+
+from app.models import User
+from app.utility.env import get_token_cache_ttl_seconds, \
+    get_token_cache_max_size
+
+token_cache_ttl = get_token_cache_ttl_seconds()
+
+
+class CachedPrincipal(NamedTuple):
+    user: User
+    expires_at: float
+
+
+def _time_to_use(token: str, principal: CachedPrincipal, now: float) -> float:
+    # An entry never outlives the api key it was validated against
+    return min(now + token_cache_ttl, principal.expires_at)
+
+
+_cache = TLRUCache(maxsize=get_token_cache_max_size(),
+                   ttu=_time_to_use,
+                   timer=time.time)
+_lock = Lock()
+
+
+def get_cached_user(token: str) -> User | None:
+    with _lock:
+        principal = _cache.get(token)
+    if principal is None:
+        return None
+    return principal.user
+
+
+def cache_user(token: str, user: User, expires_at: float | None):
+    if expires_at is None or expires_at <= time.time():
+        return
+    with _lock:
+        _cache[token] = CachedPrincipal(user=user, expires_at=expires_at)
+
+
+def invalidate_token(token: str):
+    with _lock:
+        _cache.pop(token, None)
+
+
+def invalidate_user(user_id: int):
+    with _lock:
+        tokens = [token for token, principal in _cache.items()
+                  if principal.user.id == user_id]
+        for token in tokens:
+            _cache.pop(token, None)
+
+
+def clear_token_cache():
+    with _lock:
+        _cache.clear()
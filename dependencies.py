@@ -1,61 +1,140 @@
+from datetime import datetime
 from typing import Annotated
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, status, WebSocket, \
+    WebSocketException
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 
-from app.schemas.apikeys import ApiKeysVerify
-from app.schemas.user import User
-from app.services.auth_service import is_api_key_active, \
-    is_api_key_expired_set_inactive
-from app.services.user_service import get_user_by_username
-from app.utility.env import get_key
+from app.models import User
+from app.services.auth_service import get_api_key_principal
+from app.services.authorization_service import user_has_permission
+from app.services.revocation_service import is_revoked
+from app.utility.constant import PERMISSIONS, AUTH_MODE_STATELESS, \
+    STATELESS_TOKEN_CLAIMS
+from app.utility.env import get_key, get_auth_mode
+from app.utility.others import digest_api_key
+from app.utility.token_cache import get_cached_user, cache_user
 
 import jwt
 
-from app.utility.jwt import get_user, TokenData
+from app.utility.jwt import TokenData
 
 ALGORITHM = "HS256"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+api_key_exception = HTTPException(
+    status_code=401,
+    detail="The API key validation was unsuccessful.")
+
+
+def decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, get_key(), algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
+        return payload
+    except InvalidTokenError:
+        raise credentials_exception
 
-        user = get_user_by_username(token_data.username)
 
-        key = ApiKeysVerify(
-            api_key=token,
-            user_id=user.id
-        )
-        is_valid = is_api_key_active(key)
+def validate_stateless_token(token: str, payload: dict) -> User:
+    # jwt.decode already rejected an expired exp claim. Deactivating or
+    # disabling a user revokes its keys, so claims that went stale are
+    # caught by the revocation set.
+    if is_revoked(digest_api_key(token)):
+        raise api_key_exception
 
-        is_api_key_expired_set_inactive(token)
+    if not payload["active"]:
+        raise api_key_exception
 
-        if not is_valid:
-            raise HTTPException(status_code=401,
-                                detail="The API key validation was unsuccessful.")
-    except InvalidTokenError:
-        raise credentials_exception
-    user = get_user(username=token_data.username)
-    if user is None:
+    # Only the claims are known, the other User fields keep their defaults.
+    # Handlers that need them load the user by id.
+    return User(id=payload["uid"], username=payload["sub"],
+                is_active=payload["active"], is_disabled=payload["disabled"])
+
+
+async def validate_database_token(token: str) -> User:
+    cached_user = get_cached_user(token)
+    if cached_user is not None:
+        return cached_user
+
+    payload = decode_token(token)
+    token_data = TokenData(username=payload.get("sub"))
+
+    principal = await get_api_key_principal(token)
+
+    if principal is None or principal.user.username != token_data.username:
         raise credentials_exception
+
+    # Expired keys are flagged inactive by the background sweeper
+    if principal.expires_at is None or principal.expires_at < datetime.now():
+        raise api_key_exception
+
+    if not principal.is_active or not principal.user.is_active:
+        raise api_key_exception
+
+    user = principal.user
+
+    expires_at = principal.expires_at.timestamp()
+    cache_user(token, user, min(payload.get("exp", expires_at), expires_at))
     return user
 
 
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
+    if get_auth_mode() == AUTH_MODE_STATELESS:
+        payload = decode_token(token)
+        # Tokens issued without the status claims are still checked in
+        # Postgres
+        if all(claim in payload for claim in STATELESS_TOKEN_CLAIMS):
+            return validate_stateless_token(token, payload)
+
+    return await validate_database_token(token)
+
+
 async def get_current_active_user(
         current_user: Annotated[User, Depends(get_current_user)],
 ):
     if current_user.is_disabled:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+
+async def get_current_websocket_user(websocket: WebSocket):
+    # Browsers cannot set headers on a WebSocket, so a token query parameter
+    # is accepted as well
+    scheme, _, token = websocket.headers.get("authorization", "").partition(
+        " ")
+    if scheme.lower() != "bearer":
+        token = websocket.query_params.get("token")
+    if not token:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION,
+                                 reason="Not authenticated")
+
+    try:
+        return await get_current_active_user(await get_current_user(token))
+    except HTTPException as e:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION,
+                                 reason=e.detail)
+
+
+def require_permission(permission: PERMISSIONS | str):
+    permission_name = permission.value if isinstance(
+        permission, PERMISSIONS) else permission
+
+    async def check_permission(
+            current_user: Annotated[User, Depends(get_current_active_user)],
+    ):
+        if not await user_has_permission(current_user.id, permission_name):
+            raise HTTPException(status_code=403,
+                                detail="The user does not have the required permission.")
+        return current_user
+
+    return check_permission
@@ -0,0 +1,49 @@
+-- Adds a fixed-length SHA-256 digest of apikeys.api_key so bearer token
+-- lookups use a unique btree index instead of comparing the full JWT.
+--
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block, run this
+-- file with autocommit (psql default). Existing rows can also be backfilled
+-- from the application with auth_service.service_backfill_api_key_digests.
+--
+-- A failed CREATE INDEX CONCURRENTLY leaves an INVALID index that IF NOT
+-- EXISTS would then skip. Check before rerunning and drop it if needed:
+--   SELECT indisvalid FROM pg_index
+--   WHERE indexrelid = 'public.ix_apikeys_api_key_digest'::regclass;
+--   DROP INDEX CONCURRENTLY IF EXISTS public.ix_apikeys_api_key_digest;
+
+ALTER TABLE public.apikeys
+    ADD COLUMN IF NOT EXISTS api_key_digest character varying(64);
+
+-- Tokens minted in the same second for the same user were identical before
+-- the jti claim, so an api_key can appear more than once. One row per key
+-- is kept (one that already has a digest, then an active one, then the
+-- oldest), the others are deactivated and keep a NULL digest.
+WITH ranked AS (
+    SELECT id,
+           row_number() OVER (
+               PARTITION BY api_key
+               ORDER BY api_key_digest IS NULL, is_active DESC, id) AS rank
+    FROM public.apikeys
+)
+UPDATE public.apikeys
+SET is_active = false
+FROM ranked
+WHERE apikeys.id = ranked.id
+  AND ranked.rank > 1;
+
+WITH ranked AS (
+    SELECT id,
+           row_number() OVER (
+               PARTITION BY api_key
+               ORDER BY api_key_digest IS NULL, is_active DESC, id) AS rank
+    FROM public.apikeys
+)
+UPDATE public.apikeys
+SET api_key_digest = encode(sha256(convert_to(api_key, 'UTF8')), 'hex')
+FROM ranked
+WHERE apikeys.id = ranked.id
+  AND ranked.rank = 1
+  AND apikeys.api_key_digest IS NULL;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_apikeys_api_key_digest
+    ON public.apikeys USING btree (api_key_digest);
@@ -0,0 +1,17 @@
+-- Compact revocation table read by workers running with AUTH_MODE=stateless.
+-- Rows are written when an api key is deactivated and removed by the api key
+-- sweeper once the key would have expired anyway.
+
+CREATE TABLE IF NOT EXISTS public.revokedapikeys
+(
+    id             serial PRIMARY KEY,
+    api_key_digest character varying(64) NOT NULL,
+    expires_at     timestamp without time zone NOT NULL,
+    revoked_at     timestamp without time zone
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_revokedapikeys_api_key_digest
+    ON public.revokedapikeys USING btree (api_key_digest);
+
+CREATE INDEX IF NOT EXISTS ix_revokedapikeys_expires_at
+    ON public.revokedapikeys USING btree (expires_at);
@@ -0,0 +1,24 @@
+-- Composite indexes matching the shift queries in nurse_services: equality
+-- on patient (and nurse / model) followed by the time column in the same
+-- descending order the queries sort by, so Postgres can read the newest
+-- rows of one patient directly from the index instead of sorting.
+--
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block, run this
+-- file with autocommit (psql default).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vitalsigns_patient_id_time_stamp
+    ON public.vitalsigns USING btree (patient_id, time_stamp DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vitalmedicaldata_patient_id_time_stamp
+    ON public.vitalmedicaldata USING btree (patient_id, time_stamp DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_nursenotes_patient_id_nurse_id_time_stamp
+    ON public.nursenotes USING btree (patient_id, nurse_id, time_stamp DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_handoffs_patient_id_outgoing_nurse_id_model_created_at
+    ON public.handoffs USING btree (patient_id, outgoing_nurse_id, model, created_at DESC);
+
+ANALYZE public.vitalsigns;
+ANALYZE public.vitalmedicaldata;
+ANALYZE public.nursenotes;
+ANALYZE public.handoffs;
@@ -0,0 +1,35 @@
+-- Moves handoffs.report_text and vitalmedicaldata.data_value from json to
+-- jsonb and indexes them with GIN, so containment, key existence and the
+-- recommendation full text search helpers in nurse_services use an index.
+--
+-- Handoffs written before this change hold the SBAR report as a JSON encoded
+-- string, those are unwrapped into the document itself.
+--
+-- ALTER COLUMN TYPE rewrites the table under an ACCESS EXCLUSIVE lock, run
+-- it in a maintenance window. CREATE INDEX CONCURRENTLY cannot run inside a
+-- transaction block, run this file with autocommit (psql default).
+
+ALTER TABLE public.handoffs
+    ALTER COLUMN report_text TYPE jsonb
+        USING CASE
+                  WHEN json_typeof(report_text) = 'string'
+                      THEN (report_text #>> '{}')::jsonb
+                  ELSE report_text::jsonb
+        END;
+
+ALTER TABLE public.vitalmedicaldata
+    ALTER COLUMN data_value TYPE jsonb USING data_value::jsonb;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vitalmedicaldata_data_value
+    ON public.vitalmedicaldata USING gin (data_value);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_handoffs_report_text
+    ON public.handoffs USING gin (report_text jsonb_path_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_handoffs_recommendation_search
+    ON public.handoffs USING gin (jsonb_to_tsvector('english',
+                                                    report_text -> 'sbar_report' -> 'recommendation',
+                                                    '["string"]'));
+
+ANALYZE public.handoffs;
+ANALYZE public.vitalmedicaldata;
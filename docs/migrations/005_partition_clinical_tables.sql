@@ -0,0 +1,82 @@
+-- Turns vitalsigns, vitalmedicaldata and nursenotes into tables range
+-- partitioned by month on time_stamp, so the shift queries in nurse_services
+-- only touch the partitions of the current shift.
+--
+-- A partitioned table needs the partition key in its primary key, the
+-- primary key becomes (id, time_stamp) and time_stamp NOT NULL. Rows without
+-- a time_stamp take their created_at.
+--
+-- Each table is rebuilt: the old one is renamed, its rows are copied into
+-- the new partitioned table and it is dropped. This holds an ACCESS
+-- EXCLUSIVE lock for the whole copy, run it in a maintenance window. One
+-- partition per month with data is created here, plus the default partition.
+-- Future months are created by partition maintenance at application start.
+
+BEGIN;
+
+DO
+$$
+    DECLARE
+        table_name text;
+        month      date;
+    BEGIN
+        FOREACH table_name IN ARRAY ARRAY ['vitalsigns', 'vitalmedicaldata', 'nursenotes']
+            LOOP
+                EXECUTE format('ALTER TABLE public.%I RENAME TO %I',
+                               table_name, table_name || '_unpartitioned');
+                EXECUTE format('ALTER INDEX public.%I RENAME TO %I',
+                               table_name || '_pkey', table_name || '_unpartitioned_pkey');
+                EXECUTE format('UPDATE public.%I SET time_stamp = coalesce(created_at, now()) '
+                                   'WHERE time_stamp IS NULL', table_name || '_unpartitioned');
+
+                EXECUTE format('CREATE TABLE public.%I (LIKE public.%I INCLUDING DEFAULTS) '
+                                   'PARTITION BY RANGE (time_stamp)',
+                               table_name, table_name || '_unpartitioned');
+                EXECUTE format('ALTER TABLE public.%I ALTER COLUMN time_stamp SET NOT NULL, '
+                                   'ADD PRIMARY KEY (id, time_stamp), '
+                                   'ADD CONSTRAINT %I FOREIGN KEY (patient_id) REFERENCES public.patients (id)',
+                               table_name, table_name || '_patient_id_fkey');
+                EXECUTE format('CREATE TABLE public.%I PARTITION OF public.%I DEFAULT',
+                               table_name || '_default', table_name);
+
+                FOR month IN EXECUTE format(
+                        'SELECT DISTINCT CAST(date_trunc(''month'', time_stamp) AS date) FROM public.%I',
+                        table_name || '_unpartitioned')
+                    LOOP
+                        EXECUTE format('CREATE TABLE public.%I PARTITION OF public.%I '
+                                           'FOR VALUES FROM (%L) TO (%L)',
+                                       table_name || to_char(month, '"_p"YYYY_MM'), table_name,
+                                       month, month + interval '1 month');
+                    END LOOP;
+
+                EXECUTE format('INSERT INTO public.%I SELECT * FROM public.%I',
+                               table_name, table_name || '_unpartitioned');
+                EXECUTE format('ALTER SEQUENCE public.%I OWNED BY public.%I.id',
+                               table_name || '_id_seq', table_name);
+                EXECUTE format('DROP TABLE public.%I', table_name || '_unpartitioned');
+            END LOOP;
+    END
+$$;
+
+ALTER TABLE public.nursenotes
+    ADD CONSTRAINT nursenotes_nurse_id_fkey FOREIGN KEY (nurse_id) REFERENCES public.nurses (id);
+
+-- Created on the parent, Postgres creates the matching index on every
+-- partition and on partitions attached later
+CREATE INDEX ix_vitalsigns_patient_id_time_stamp
+    ON public.vitalsigns USING btree (patient_id, time_stamp DESC);
+
+CREATE INDEX ix_vitalmedicaldata_patient_id_time_stamp
+    ON public.vitalmedicaldata USING btree (patient_id, time_stamp DESC);
+
+CREATE INDEX ix_vitalmedicaldata_data_value
+    ON public.vitalmedicaldata USING gin (data_value);
+
+CREATE INDEX ix_nursenotes_patient_id_nurse_id_time_stamp
+    ON public.nursenotes USING btree (patient_id, nurse_id, time_stamp DESC);
+
+COMMIT;
+
+ANALYZE public.vitalsigns;
+ANALYZE public.vitalmedicaldata;
+ANALYZE public.nursenotes;
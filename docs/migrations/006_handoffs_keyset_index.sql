@@ -0,0 +1,12 @@
+-- Index in the keyset order of GET /api/handoffs/, newest first with id as
+-- tie breaker, so every page of an unfiltered listing is an index range
+-- scan. Vital signs and nurse notes pages use the (patient_id, time_stamp)
+-- indexes from 003, patients pages the primary key.
+--
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block, run this
+-- file with autocommit (psql default).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_handoffs_created_at_id
+    ON public.handoffs USING btree (created_at DESC, id DESC);
+
+ANALYZE public.handoffs;
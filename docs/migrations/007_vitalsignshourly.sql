@@ -0,0 +1,81 @@
+-- Hourly rollups of vitalsigns per patient, kept up to date on insert by
+-- rollup_service and read by GET /api/vital_signs/hourly and by the SBAR
+-- prompt of shifts with many readings.
+--
+-- Sums and reading counts are stored instead of means so a new batch of
+-- readings can be merged into an existing hour. The table is backfilled
+-- from the readings already stored, run it before deploying the code that
+-- writes it or readings inserted in between are counted twice.
+
+BEGIN;
+
+CREATE TABLE public.vitalsignshourly
+(
+    patient_id                   integer          NOT NULL,
+    hour                         timestamp        NOT NULL,
+    readings                     integer          NOT NULL,
+    last_time_stamp              timestamp        NOT NULL,
+    blood_pressure_systolic_min  integer          NOT NULL,
+    blood_pressure_systolic_max  integer          NOT NULL,
+    blood_pressure_systolic_sum  integer          NOT NULL,
+    blood_pressure_systolic_last integer          NOT NULL,
+    blood_pressure_diastolic_min integer          NOT NULL,
+    blood_pressure_diastolic_max integer          NOT NULL,
+    blood_pressure_diastolic_sum integer          NOT NULL,
+    blood_pressure_diastolic_last integer         NOT NULL,
+    heart_rate_min               integer          NOT NULL,
+    heart_rate_max               integer          NOT NULL,
+    heart_rate_sum               integer          NOT NULL,
+    heart_rate_last              integer          NOT NULL,
+    respiratory_rate_min         integer          NOT NULL,
+    respiratory_rate_max         integer          NOT NULL,
+    respiratory_rate_sum         integer          NOT NULL,
+    respiratory_rate_last        integer          NOT NULL,
+    oxygen_saturation_min        integer          NOT NULL,
+    oxygen_saturation_max        integer          NOT NULL,
+    oxygen_saturation_sum        integer          NOT NULL,
+    oxygen_saturation_last       integer          NOT NULL,
+    temperature_min              double precision NOT NULL,
+    temperature_max              double precision NOT NULL,
+    temperature_sum              double precision NOT NULL,
+    temperature_last             double precision NOT NULL,
+    PRIMARY KEY (patient_id, hour),
+    CONSTRAINT vitalsignshourly_patient_id_fkey
+        FOREIGN KEY (patient_id) REFERENCES public.patients (id)
+);
+
+INSERT INTO public.vitalsignshourly
+SELECT patient_id,
+       date_trunc('hour', time_stamp),
+       count(*),
+       max(time_stamp),
+       min(blood_pressure_systolic),
+       max(blood_pressure_systolic),
+       sum(blood_pressure_systolic),
+       (array_agg(blood_pressure_systolic ORDER BY time_stamp DESC))[1],
+       min(blood_pressure_diastolic),
+       max(blood_pressure_diastolic),
+       sum(blood_pressure_diastolic),
+       (array_agg(blood_pressure_diastolic ORDER BY time_stamp DESC))[1],
+       min(heart_rate),
+       max(heart_rate),
+       sum(heart_rate),
+       (array_agg(heart_rate ORDER BY time_stamp DESC))[1],
+       min(respiratory_rate),
+       max(respiratory_rate),
+       sum(respiratory_rate),
+       (array_agg(respiratory_rate ORDER BY time_stamp DESC))[1],
+       min(oxygen_saturation),
+       max(oxygen_saturation),
+       sum(oxygen_saturation),
+       (array_agg(oxygen_saturation ORDER BY time_stamp DESC))[1],
+       min(temperature),
+       max(temperature),
+       sum(temperature),
+       (array_agg(temperature ORDER BY time_stamp DESC))[1]
+FROM public.vitalsigns
+GROUP BY patient_id, date_trunc('hour', time_stamp);
+
+COMMIT;
+
+ANALYZE public.vitalsignshourly;
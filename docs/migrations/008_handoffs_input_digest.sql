@@ -0,0 +1,13 @@
+-- Key of the SBAR result cache: service_generate_sbar hashes the prompts
+-- and model of a request and reuses the newest handoff of the patient with
+-- the same digest instead of calling the provider again. Reports generated
+-- before this migration have no digest and are never reused.
+--
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block, run this
+-- file with autocommit (psql default).
+
+ALTER TABLE public.handoffs
+    ADD COLUMN IF NOT EXISTS input_digest varchar;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_handoffs_input_digest
+    ON public.handoffs USING btree (input_digest);
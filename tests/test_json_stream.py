@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from app.utility.json_stream import JsonMemberStream
+
+REPORT = {
+    "situation": {"patient_name": "Jane \"JD\" Doe", "age": 71,
+                  "list_situations_feedback": ["fell, {no} injury"]},
+    "background": {"list_backgrounds": ["a \\ b", "[stable]"]},
+    "assessment": {"list_assessments": []},
+    "reported_by": {"nurse": "Ann", "license_number": "RN-1"},
+}
+
+
+def feed_chunks(chunks: list[str]) -> list[list[tuple[str, object]]]:
+    stream = JsonMemberStream()
+    return [stream.feed(chunk) for chunk in chunks]
+
+
+class TestJsonMemberStream:
+    def test_whole_document_in_one_chunk(self) -> None:
+        members, = feed_chunks([json.dumps(REPORT)])
+
+        assert members == list(REPORT.items())
+
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 16])
+    def test_any_chunk_boundary(self, size: int) -> None:
+        document = json.dumps(REPORT, indent=2)
+        chunks = [document[start:start + size]
+                  for start in range(0, len(document), size)]
+
+        members = [member for chunk_members in feed_chunks(chunks)
+                   for member in chunk_members]
+
+        assert members == list(REPORT.items())
+
+    def test_member_is_returned_once_closed(self) -> None:
+        first, second, third = feed_chunks([
+            '{"situation": {"age": 71',
+            '}, "background": {"list_backgrounds": ["a"',
+            ']}}',
+        ])
+
+        assert first == []
+        assert second == [("situation", {"age": 71})]
+        assert third == [("background", {"list_backgrounds": ["a"]})]
+
+    def test_brackets_and_escapes_inside_strings(self) -> None:
+        first, second = feed_chunks([
+            '{"note": "ends with \\\\", "quote": "say \\"}\\"", ',
+            '"list": ["{", "]"]}',
+        ])
+
+        assert first == [("note", "ends with \\"), ("quote", 'say "}"')]
+        assert second == [("list", ["{", "]"])]
+
+    def test_escape_split_across_chunks(self) -> None:
+        first, second = feed_chunks(['{"quote": "a\\', '"b"}'])
+
+        assert first == []
+        assert second == [("quote", 'a"b')]
+
+    def test_buffer_holds_the_whole_document(self) -> None:
+        document = json.dumps(REPORT)
+        stream = JsonMemberStream()
+        for start in range(0, len(document), 5):
+            stream.feed(document[start:start + 5])
+
+        assert json.loads(stream.buffer) == REPORT
@@ -0,0 +1,71 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.nurses import VitalSigns
+from app.services.nurse_services import decode_cursor, encode_cursor, \
+    get_projection
+
+
+def encode_raw(value: bytes) -> str:
+    return base64.urlsafe_b64encode(value).decode()
+
+
+class TestCursor:
+    def test_id_cursor_round_trip(self) -> None:
+        assert decode_cursor(encode_cursor([42]), keyed_by_time=False) == (
+            42,)
+
+    def test_time_cursor_round_trip(self) -> None:
+        time_stamp = datetime(2025, 3, 1, 7, 30, 15, 123456)
+
+        cursor = encode_cursor([time_stamp, 7])
+
+        assert decode_cursor(cursor, keyed_by_time=True) == (time_stamp, 7)
+
+    def test_cursor_is_url_safe(self) -> None:
+        cursor = encode_cursor([datetime(2025, 3, 1, 7, 30), 10 ** 12])
+
+        assert all(character.isalnum() or character in "-_="
+                   for character in cursor)
+
+    @pytest.mark.parametrize("cursor, keyed_by_time", [
+        ("not a cursor!", False),
+        (encode_raw(b"\xff\xfe"), False),
+        (encode_raw(b"{not json"), False),
+        (encode_cursor(5), False),
+        (encode_cursor([1, 2]), False),
+        (encode_cursor(["abc"]), False),
+        (encode_cursor([1]), True),
+        (encode_cursor(["yesterday", 1]), True),
+        (encode_cursor([5, 1]), True),
+        (encode_raw(json.dumps(["2025-03-01T07:30:00", None]).encode()),
+         True),
+    ])
+    def test_malformed_cursor_is_rejected(self, cursor: str,
+                                          keyed_by_time: bool) -> None:
+        with pytest.raises(HTTPException) as error:
+            decode_cursor(cursor, keyed_by_time)
+        assert error.value.status_code == 400
+
+
+class TestProjection:
+    def test_sort_columns_are_always_returned(self) -> None:
+        columns = get_projection(VitalSigns, "heart_rate,id", ["id"],
+                                 ["time_stamp", "id"])
+
+        assert [column.key for column in columns] == [
+            "time_stamp", "id", "heart_rate"]
+
+    def test_default_fields_without_fields(self) -> None:
+        columns = get_projection(VitalSigns, None, ["heart_rate"], ["id"])
+
+        assert [column.key for column in columns] == ["id", "heart_rate"]
+
+    def test_unknown_field_is_rejected(self) -> None:
+        with pytest.raises(HTTPException) as error:
+            get_projection(VitalSigns, "heart_rate,password", ["id"], ["id"])
+        assert error.value.status_code == 400
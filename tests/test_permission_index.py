@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services import authorization_service
+from app.services.authorization_service import PermissionIndex, \
+    get_permission_index, invalidate_permission_index, user_has_permission
+
+
+def create_index() -> PermissionIndex:
+    return PermissionIndex(
+        user_roles={1: frozenset({"nurse"}),
+                    2: frozenset({"nurse", "admin"})},
+        role_permissions={"nurse": frozenset({"read_patient"}),
+                          "admin": frozenset({"create_role"})})
+
+
+@pytest.fixture
+def loads(monkeypatch) -> list[PermissionIndex]:
+    # Every call of load_permission_index is recorded instead of querying
+    # Postgres
+    loaded = []
+
+    async def load_permission_index():
+        index = create_index()
+        loaded.append(index)
+        return index
+
+    monkeypatch.setattr(authorization_service, "load_permission_index",
+                        load_permission_index)
+    monkeypatch.setattr(authorization_service, "_permission_index", None)
+    return loaded
+
+
+class TestPermissionIndex:
+    def test_permissions_follow_roles(self) -> None:
+        index = create_index()
+
+        assert index.has_role(2, "admin")
+        assert not index.has_role(1, "admin")
+        assert index.role_has_permission("admin", "create_role")
+        assert index.has_permission(2, "read_patient")
+        assert index.has_permission(2, "create_role")
+        assert not index.has_permission(1, "create_role")
+        assert not index.has_permission(3, "read_patient")
+
+    @pytest.mark.asyncio
+    async def test_index_is_loaded_once(self, loads) -> None:
+        first = await get_permission_index()
+        second = await get_permission_index()
+
+        assert first is second
+        assert len(loads) == 1
+        assert await user_has_permission(1, "read_patient")
+
+    @pytest.mark.asyncio
+    async def test_index_reloads_after_ttl(self, loads) -> None:
+        first = await get_permission_index()
+        first.loaded_at = time.monotonic() - 3600
+
+        second = await get_permission_index()
+
+        assert second is not first
+        assert len(loads) == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidation_forces_a_reload(self, loads) -> None:
+        first = await get_permission_index()
+        invalidate_permission_index()
+
+        second = await get_permission_index()
+
+        assert second is not first
+        assert len(loads) == 2
+
+    @pytest.mark.asyncio
+    async def test_index_loaded_across_invalidation_is_not_kept(
+            self, monkeypatch) -> None:
+        loaded = []
+
+        async def load_permission_index():
+            index = create_index()
+            loaded.append(index)
+            if len(loaded) == 1:
+                # A role changes while the first load is running
+                await asyncio.sleep(0)
+                invalidate_permission_index()
+            return index
+
+        monkeypatch.setattr(authorization_service, "load_permission_index",
+                            load_permission_index)
+        monkeypatch.setattr(authorization_service, "_permission_index", None)
+
+        first = await get_permission_index()
+        second = await get_permission_index()
+
+        assert first is loaded[0]
+        assert second is loaded[1]
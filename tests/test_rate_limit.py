@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from app.services import rate_limit_service
+from app.services.rate_limit_service import ProviderRateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit_service.time, "monotonic", clock)
+    return clock
+
+
+class TestTokenBucket:
+    def test_full_bucket_does_not_wait(self, clock) -> None:
+        bucket = TokenBucket(60)
+
+        assert bucket.wait_time(60) == 0
+
+    def test_wait_until_refilled(self, clock) -> None:
+        bucket = TokenBucket(60)
+        bucket.take(60)
+
+        assert bucket.wait_time(3) == pytest.approx(3)
+
+        clock.now += 2
+        assert bucket.wait_time(3) == pytest.approx(1)
+
+    def test_refill_stops_at_capacity(self, clock) -> None:
+        bucket = TokenBucket(60)
+        bucket.take(10)
+
+        clock.now += 3600
+        bucket.refill()
+
+        assert bucket.level == 60
+
+    def test_call_larger_than_bucket_waits_for_a_full_bucket(
+            self, clock) -> None:
+        bucket = TokenBucket(60)
+        bucket.take(60)
+
+        assert bucket.wait_time(600) == pytest.approx(60)
+
+    def test_debt_delays_the_next_call(self, clock) -> None:
+        bucket = TokenBucket(60)
+        bucket.take(90)
+
+        assert bucket.wait_time(1) == pytest.approx(31)
+
+    def test_zero_disables_the_bucket(self, clock) -> None:
+        bucket = TokenBucket(0)
+        bucket.take(1000)
+
+        assert bucket.wait_time(1000) == 0
+
+
+class TestProviderRateLimiter:
+    @pytest.mark.asyncio
+    async def test_waiters_are_served_in_arrival_order(self) -> None:
+        limiter = ProviderRateLimiter("test", requests_per_minute=0,
+                                      tokens_per_minute=6000)
+        limiter.tokens.take(6000)
+        served = []
+
+        async def acquire(name: str, tokens: int):
+            await limiter.acquire(tokens)
+            served.append(name)
+
+        # The small call behind the large one could fit sooner, it still
+        # has to wait its turn
+        first = asyncio.create_task(acquire("large", 20))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(acquire("small", 1))
+        await asyncio.gather(first, second)
+
+        assert served == ["large", "small"]
+        assert limiter.calls == 2
+        assert limiter.waiting == 0
+
+    @pytest.mark.asyncio
+    async def test_settle_replaces_the_estimate(self, clock) -> None:
+        limiter = ProviderRateLimiter("test", requests_per_minute=60,
+                                      tokens_per_minute=1000)
+
+        await limiter.acquire(100)
+        assert limiter.tokens.level == pytest.approx(900)
+
+        limiter.settle(100, 150)
+        assert limiter.tokens.level == pytest.approx(850)
+
+    @pytest.mark.asyncio
+    async def test_failed_call_gives_its_tokens_back(self, clock) -> None:
+        limiter = ProviderRateLimiter("test", requests_per_minute=60,
+                                      tokens_per_minute=1000)
+
+        await limiter.acquire(100)
+        limiter.settle(100, 0)
+
+        assert limiter.tokens.level == pytest.approx(1000)
+        assert limiter.requests.level == pytest.approx(59)
+
+    @pytest.mark.asyncio
+    async def test_snapshot(self, clock) -> None:
+        limiter = ProviderRateLimiter("test", requests_per_minute=60,
+                                      tokens_per_minute=1000)
+        await limiter.acquire(10)
+
+        snapshot = limiter.snapshot()
+
+        assert snapshot["provider"] == "test"
+        assert snapshot["calls"] == 1
+        assert snapshot["waiting"] == 0
+        assert set(snapshot["wait_time_ms"]) == {"p50", "p95", "max"}
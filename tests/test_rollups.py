@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+
+from app.models.nurses import VITAL_SIGN_FIELDS
+from app.services.rollup_service import aggregate_vital_signs, get_hour
+
+
+def create_reading(patient_id: int, time_stamp: datetime,
+                   value: float) -> dict:
+    return {"patient_id": patient_id, "time_stamp": time_stamp,
+            **{field: value for field in VITAL_SIGN_FIELDS}}
+
+
+class TestAggregateVitalSigns:
+    def test_hour_drops_minutes_and_offset(self) -> None:
+        time_stamp = datetime(2025, 3, 1, 7, 45, 12, 5,
+                              tzinfo=timezone(timedelta(hours=2)))
+
+        assert get_hour(time_stamp) == datetime(2025, 3, 1, 7)
+
+    def test_readings_of_one_hour_are_merged(self) -> None:
+        hour = datetime(2025, 3, 1, 7)
+        rows = [
+            create_reading(1, hour + timedelta(minutes=10), 80),
+            create_reading(1, hour + timedelta(minutes=50), 60),
+            create_reading(1, hour + timedelta(minutes=30), 100),
+        ]
+
+        rollup, = aggregate_vital_signs(rows)
+
+        assert rollup["patient_id"] == 1
+        assert rollup["hour"] == hour
+        assert rollup["readings"] == 3
+        assert rollup["last_time_stamp"] == hour + timedelta(minutes=50)
+        assert rollup["heart_rate_min"] == 60
+        assert rollup["heart_rate_max"] == 100
+        assert rollup["heart_rate_sum"] == 240
+        # Last is the latest reading, not the last one in the batch
+        assert rollup["heart_rate_last"] == 60
+
+    def test_first_reading_counts_towards_the_sum(self) -> None:
+        rollup, = aggregate_vital_signs(
+            [create_reading(1, datetime(2025, 3, 1, 7, 5), 37.5)])
+
+        assert rollup["readings"] == 1
+        assert rollup["temperature_sum"] == 37.5
+        assert rollup["temperature_min"] == rollup["temperature_max"] == 37.5
+
+    def test_aware_and_naive_timestamps_share_an_hour(self) -> None:
+        rows = [
+            create_reading(1, datetime(2025, 3, 1, 7, 5), 70),
+            create_reading(1, datetime(2025, 3, 1, 7, 55,
+                                       tzinfo=timezone.utc), 90),
+        ]
+
+        rollup, = aggregate_vital_signs(rows)
+
+        assert rollup["readings"] == 2
+        assert rollup["heart_rate_last"] == 90
+        assert rollup["last_time_stamp"].tzinfo is None
+
+    def test_hours_are_split_by_patient_and_sorted(self) -> None:
+        rows = [
+            create_reading(2, datetime(2025, 3, 1, 7, 5), 70),
+            create_reading(1, datetime(2025, 3, 1, 8, 5), 80),
+            create_reading(1, datetime(2025, 3, 1, 7, 5), 90),
+        ]
+
+        rollups = aggregate_vital_signs(rows)
+
+        assert [(rollup["patient_id"], rollup["hour"].hour)
+                for rollup in rollups] == [(1, 7), (1, 8), (2, 7)]
+        assert all(rollup["readings"] == 1 for rollup in rollups)
+
+    def test_no_rows(self) -> None:
+        assert aggregate_vital_signs([]) == []
@@ -0,0 +1,203 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import routing_service
+from app.services.routing_service import ProviderRouter
+from app.utility.constant import CHAT_GPT, GEMINI, GROQ, XAI
+from app.utility.others import get_percentile
+
+
+@pytest.fixture(autouse=True)
+def routing_settings(monkeypatch):
+    monkeypatch.setattr(routing_service, "get_routing_min_samples", lambda: 2)
+    monkeypatch.setattr(routing_service, "get_routing_max_error_rate",
+                        lambda: 0.5)
+    monkeypatch.setattr(routing_service, "get_routing_probe_share", lambda: 0)
+    monkeypatch.setattr(routing_service, "get_sbar_hedge_percentile",
+                        lambda: 95)
+    monkeypatch.setattr(routing_service, "get_sbar_hedge_after_seconds",
+                        lambda: 0.05)
+
+
+def create_router(monkeypatch, *providers: str) -> ProviderRouter:
+    # Only the given providers have an api key
+    monkeypatch.setattr(routing_service, "PROVIDER_KEYS", {
+        provider: (lambda configured=provider in providers:
+                   "key" if configured else None)
+        for provider in (CHAT_GPT, GEMINI, GROQ, XAI)})
+    return ProviderRouter(10)
+
+
+def record(router: ProviderRouter, provider: str, latency: float,
+           ok: bool = True, times: int = 2):
+    for _ in range(times):
+        router.record(provider, latency, ok)
+
+
+class TestRank:
+    def test_percentile(self) -> None:
+        values = [float(value) for value in range(1, 101)]
+
+        assert get_percentile(values, 50) == 51
+        assert get_percentile(values, 95) == 96
+        assert get_percentile([3.0], 95) == 3
+
+    def test_cold_start_is_cheapest_first(self, monkeypatch) -> None:
+        router = create_router(monkeypatch, CHAT_GPT, GEMINI, GROQ, XAI)
+
+        assert router.rank() == [GEMINI, CHAT_GPT, GROQ, XAI]
+
+    def test_only_configured_providers(self, monkeypatch) -> None:
+        router = create_router(monkeypatch, XAI, GROQ)
+
+        assert router.rank() == [GROQ, XAI]
+
+    def test_no_configured_provider(self, monkeypatch) -> None:
+        router = create_router(monkeypatch)
+
+        with pytest.raises(HTTPException) as error:
+            router.rank()
+        assert error.value.status_code == 503
+
+    def test_measured_providers_by_latency(self, monkeypatch) -> None:
+        router = create_router(monkeypatch, CHAT_GPT, GEMINI, XAI)
+        record(router, GEMINI, 2.0)
+        record(router, CHAT_GPT, 1.0)
+
+        assert router.rank() == [CHAT_GPT, GEMINI, XAI]
+
+    def test_errors_weigh_on_latency(self, monkeypatch) -> None:
+        router = create_router(monkeypatch, CHAT_GPT, GEMINI)
+        record(router, CHAT_GPT, 1.0)
+        record(router, CHAT_GPT, 1.0, ok=False, times=1)
+        record(router, GEMINI, 1.2)
+
+        assert router.rank() == [GEMINI, CHAT_GPT]
+
+    def test_failing_provider_goes_last(self, monkeypatch) -> None:
+        router = create_router(monkeypatch, CHAT_GPT, XAI)
+        record(router, CHAT_GPT, 0.1, ok=False)
+
+        assert router.rank() == [XAI, CHAT_GPT]
+
+    def test_cancelled_call_counts_latency_only(self, monkeypatch) -> None:
+        router = create_router(monkeypatch, CHAT_GPT)
+        router.record(CHAT_GPT, 5.0, None)
+
+        assert router.stats[CHAT_GPT].error_rate == 0
+        assert router.snapshot()[0]["samples"] == 1
+
+    def test_probe_moves_cheapest_unmeasured_first(self,
+                                                   monkeypatch) -> None:
+        router = create_router(monkeypatch, CHAT_GPT, GEMINI, XAI)
+        record(router, CHAT_GPT, 1.0)
+        monkeypatch.setattr(routing_service, "get_routing_probe_share",
+                            lambda: 0.05)
+
+        monkeypatch.setattr(routing_service.random, "random", lambda: 0.01)
+        assert router.rank() == [GEMINI, CHAT_GPT, XAI]
+
+        monkeypatch.setattr(routing_service.random, "random", lambda: 0.5)
+        assert router.rank() == [CHAT_GPT, GEMINI, XAI]
+
+    def test_hedge_deadline(self, monkeypatch) -> None:
+        router = create_router(monkeypatch, CHAT_GPT)
+        assert router.hedge_deadline(CHAT_GPT) == 0.05
+
+        record(router, CHAT_GPT, 1.5)
+        assert router.hedge_deadline(CHAT_GPT) == 1.5
+
+        monkeypatch.setattr(routing_service, "get_sbar_hedge_percentile",
+                            lambda: 0)
+        assert router.hedge_deadline(CHAT_GPT) is None
+
+
+class FakeProviders:
+    # Stands in for request_sbar, each provider answers after its delay or
+    # fails
+    def __init__(self, delays: dict[str, float], failing: set[str] = ()):
+        self.delays = delays
+        self.failing = failing
+        self.started = []
+        self.cancelled = []
+
+    async def __call__(self, provider: str):
+        self.started.append(provider)
+        try:
+            await asyncio.sleep(self.delays[provider])
+        except asyncio.CancelledError:
+            self.cancelled.append(provider)
+            raise
+        if provider in self.failing:
+            raise HTTPException(status_code=502, detail="invalid")
+        return f"report from {provider}"
+
+
+class TestRequest:
+    @pytest.mark.asyncio
+    async def test_fast_provider_is_not_hedged(self, monkeypatch) -> None:
+        router = create_router(monkeypatch, GEMINI, CHAT_GPT)
+        providers = FakeProviders({GEMINI: 0, CHAT_GPT: 0})
+
+        result = await router.request(providers)
+
+        assert result == (GEMINI, f"report from {GEMINI}", False)
+        assert providers.started == [GEMINI]
+
+    @pytest.mark.asyncio
+    async def test_slow_provider_is_hedged_and_cancelled(
+            self, monkeypatch) -> None:
+        router = create_router(monkeypatch, GEMINI, CHAT_GPT)
+        providers = FakeProviders({GEMINI: 10, CHAT_GPT: 0.01})
+
+        result = await router.request(providers)
+        await asyncio.sleep(0)
+
+        assert result == (CHAT_GPT, f"report from {CHAT_GPT}", True)
+        assert providers.started == [GEMINI, CHAT_GPT]
+        assert providers.cancelled == [GEMINI]
+
+    @pytest.mark.asyncio
+    async def test_hedged_provider_may_still_win(self, monkeypatch) -> None:
+        router = create_router(monkeypatch, GEMINI, CHAT_GPT)
+        providers = FakeProviders({GEMINI: 0.1, CHAT_GPT: 10})
+
+        result = await router.request(providers)
+        await asyncio.sleep(0)
+
+        assert result == (GEMINI, f"report from {GEMINI}", True)
+        assert providers.cancelled == [CHAT_GPT]
+
+    @pytest.mark.asyncio
+    async def test_failure_moves_on_right_away(self, monkeypatch) -> None:
+        router = create_router(monkeypatch, GEMINI, CHAT_GPT)
+        providers = FakeProviders({GEMINI: 0, CHAT_GPT: 0}, failing={GEMINI})
+
+        result = await router.request(providers)
+
+        assert result == (CHAT_GPT, f"report from {CHAT_GPT}", False)
+        assert providers.started == [GEMINI, CHAT_GPT]
+
+    @pytest.mark.asyncio
+    async def test_all_providers_failing(self, monkeypatch) -> None:
+        router = create_router(monkeypatch, GEMINI, CHAT_GPT)
+        providers = FakeProviders({GEMINI: 0, CHAT_GPT: 0},
+                                  failing={GEMINI, CHAT_GPT})
+
+        with pytest.raises(HTTPException) as error:
+            await router.request(providers)
+        assert error.value.status_code == 502
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_when_disabled(self, monkeypatch) -> None:
+        monkeypatch.setattr(routing_service, "get_sbar_hedge_percentile",
+                            lambda: 0)
+        router = create_router(monkeypatch, GEMINI, CHAT_GPT)
+        providers = FakeProviders({GEMINI: 0.1, CHAT_GPT: 0})
+
+        result = await router.request(providers)
+
+        assert result == (GEMINI, f"report from {GEMINI}", False)
+        assert providers.started == [GEMINI]
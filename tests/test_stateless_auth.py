@@ -0,0 +1,88 @@
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+import dependencies
+from app.services import revocation_service
+from app.services.revocation_service import RevocationSet
+from app.utility import jwt as jwt_utility
+from app.utility.constant import AUTH_MODE_STATELESS
+from app.utility.jwt import create_access_token
+from app.utility.others import digest_api_key
+from dependencies import get_current_active_user, get_current_user
+
+
+@pytest.fixture(autouse=True)
+def stateless_mode(monkeypatch):
+    monkeypatch.setattr(dependencies, "get_auth_mode",
+                        lambda: AUTH_MODE_STATELESS)
+    monkeypatch.setattr(dependencies, "get_key", lambda: "secret")
+    monkeypatch.setattr(jwt_utility, "get_key", lambda: "secret")
+    monkeypatch.setattr(revocation_service, "revocations", RevocationSet())
+
+
+def create_token(**claims) -> str:
+    data = {"sub": "nurse", "uid": 1, "active": True, "disabled": False}
+    return create_access_token({**data, **claims},
+                               expires_delta=timedelta(minutes=5))
+
+
+class TestStatelessAuth:
+    @pytest.mark.asyncio
+    async def test_user_comes_from_the_claims(self) -> None:
+        user = await get_current_user(create_token())
+
+        assert user.id == 1
+        assert user.username == "nurse"
+        assert user.is_active
+        assert not user.is_disabled
+
+    @pytest.mark.asyncio
+    async def test_inactive_user_is_rejected(self) -> None:
+        with pytest.raises(HTTPException) as error:
+            await get_current_user(create_token(active=False))
+        assert error.value.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_disabled_user_is_rejected(self) -> None:
+        user = await get_current_user(create_token(disabled=True))
+
+        with pytest.raises(HTTPException) as error:
+            await get_current_active_user(user)
+        assert error.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_token_of_disabled_user_is_rejected_once_revoked(
+            self) -> None:
+        # Issued while the user was still enabled
+        token = create_token()
+        assert await get_current_user(token)
+
+        # Disabling the user revokes its keys, the feed then adds them to
+        # the revocation set of every worker
+        revocation_service.revocations.add(digest_api_key(token),
+                                           time.time() + 300)
+
+        with pytest.raises(HTTPException) as error:
+            await get_current_user(token)
+        assert error.value.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_token_without_status_claims_is_checked_in_postgres(
+            self, monkeypatch) -> None:
+        checked = []
+
+        async def validate_database_token(token: str):
+            checked.append(token)
+            return None
+
+        monkeypatch.setattr(dependencies, "validate_database_token",
+                            validate_database_token)
+        token = create_access_token({"sub": "nurse", "uid": 1},
+                                    expires_delta=timedelta(minutes=5))
+
+        await get_current_user(token)
+
+        assert checked == [token]
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from app.models import User
+from app.utility import token_cache
+from app.utility.token_cache import cache_user, clear_token_cache, \
+    get_cached_user, invalidate_token, invalidate_user
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_token_cache()
+    yield
+    clear_token_cache()
+
+
+def create_user(user_id: int) -> User:
+    return User(id=user_id, username=f"nurse{user_id}")
+
+
+class TestTokenCache:
+    def test_cached_user_is_returned(self) -> None:
+        user = create_user(1)
+        cache_user("token", user, time.time() + 60)
+
+        assert get_cached_user("token") is user
+        assert get_cached_user("other") is None
+
+    def test_expired_or_unknown_expiry_is_not_cached(self) -> None:
+        cache_user("expired", create_user(1), time.time() - 1)
+        cache_user("no_expiry", create_user(1), None)
+
+        assert get_cached_user("expired") is None
+        assert get_cached_user("no_expiry") is None
+
+    def test_entry_expires_after_ttl(self, monkeypatch) -> None:
+        monkeypatch.setattr(token_cache, "token_cache_ttl", 0.05)
+        cache_user("token", create_user(1), time.time() + 60)
+        assert get_cached_user("token") is not None
+
+        time.sleep(0.1)
+        assert get_cached_user("token") is None
+
+    def test_entry_never_outlives_api_key(self) -> None:
+        cache_user("token", create_user(1), time.time() + 0.05)
+        assert get_cached_user("token") is not None
+
+        time.sleep(0.1)
+        assert get_cached_user("token") is None
+
+    def test_invalidate_token(self) -> None:
+        cache_user("first", create_user(1), time.time() + 60)
+        cache_user("second", create_user(1), time.time() + 60)
+
+        invalidate_token("first")
+
+        assert get_cached_user("first") is None
+        assert get_cached_user("second") is not None
+
+    def test_invalidate_user_drops_all_its_tokens(self) -> None:
+        cache_user("first", create_user(1), time.time() + 60)
+        cache_user("second", create_user(1), time.time() + 60)
+        cache_user("third", create_user(2), time.time() + 60)
+
+        invalidate_user(1)
+
+        assert get_cached_user("first") is None
+        assert get_cached_user("second") is None
+        assert get_cached_user("third") is not None